@@ -0,0 +1,419 @@
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+import redis
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# Konfiguration
+ASR_CONNECT_TIMEOUT = float(os.getenv("ASR_CONNECT_TIMEOUT", "5"))
+# Lange Aufnahmen brauchen auf der GPU durchaus einige Minuten
+ASR_READ_TIMEOUT = float(os.getenv("ASR_READ_TIMEOUT", "1800"))
+HEALTH_TIMEOUT = float(os.getenv("ASR_HEALTH_TIMEOUT", "5"))
+ASR_POOL_SIZE = int(os.getenv("ASR_POOL_SIZE", "4"))
+# Circuit Breaker: nach so vielen Fehlern in Folge (Requests und Health-Checks)
+# wird der Service gesperrt
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("ASR_CIRCUIT_FAILURE_THRESHOLD", "3"))
+# Danach gehen wieder Requests durch (half-open); der erste Fehler sperrt erneut
+CIRCUIT_OPEN_SECONDS = int(os.getenv("ASR_CIRCUIT_OPEN_SECONDS", "30"))
+# Fehler gelten als in Folge, solange zwischen zweien weniger Zeit liegt; länger
+# als der Abstand der Health-Checks (jede Minute)
+CIRCUIT_FAILURE_WINDOW_SECONDS = int(
+    os.getenv("ASR_CIRCUIT_FAILURE_WINDOW_SECONDS", "600")
+)
+# Gleichzeitige Requests pro Backend und maximale Wartezeit auf einen freien Slot
+ASR_BACKEND_CONCURRENCY = int(os.getenv("ASR_BACKEND_CONCURRENCY", "1"))
+ASR_ACQUIRE_TIMEOUT = float(os.getenv("ASR_ACQUIRE_TIMEOUT", "300"))
+# Audio-Sekunden pro Sekunde eines Backends, solange noch nichts gemessen ist
+ASR_REALTIME_FACTOR = float(os.getenv("ASR_REALTIME_FACTOR", "8"))
+# Gewicht einer neuen Messung im gleitenden Mittel des Durchsatzes
+ASR_THROUGHPUT_ALPHA = float(os.getenv("ASR_THROUGHPUT_ALPHA", "0.2"))
+
+logger = logging.getLogger(__name__)
+
+
+class ASRUnavailableError(Exception):
+    """Whisper-Service ist vorübergehend nicht erreichbar; ein Retry lohnt sich."""
+
+
+class CircuitOpenError(ASRUnavailableError):
+    """Circuit Breaker ist offen, der Service wird gerade nicht angefragt."""
+
+
+# Fehler, bei denen Celery-Tasks mit Backoff erneut versucht werden
+RETRYABLE_ERRORS = (
+    ASRUnavailableError,
+    requests.ConnectionError,
+    requests.Timeout,
+)
+
+
+class CircuitBreaker:
+    """
+    Circuit Breaker mit Zustand in Redis, damit alle Worker-Prozesse ihn teilen.
+
+    Ist Redis nicht erreichbar, bleibt der Circuit geschlossen, damit
+    Transkriptionen nicht an der Überwachung scheitern.
+    """
+
+    def __init__(self, redis_url: str, name: str):
+        self._redis = redis.Redis.from_url(
+            redis_url, socket_timeout=1, socket_connect_timeout=1
+        )
+        self.open_key = f"asr:circuit:{name}:open"
+        self._failures_key = f"asr:circuit:{name}:failures"
+
+    def is_open(self) -> bool:
+        try:
+            return bool(self._redis.exists(self.open_key))
+        except redis.RedisError as e:
+            logger.warning(f"Circuit breaker state unavailable: {e}")
+            return False
+
+    def open(self, reason: str):
+        logger.warning(f"Opening ASR circuit for {CIRCUIT_OPEN_SECONDS}s: {reason}")
+        try:
+            self._redis.set(self.open_key, reason, ex=CIRCUIT_OPEN_SECONDS)
+        except redis.RedisError as e:
+            logger.warning(f"Could not open circuit breaker: {e}")
+
+    def close(self):
+        try:
+            self._redis.delete(self.open_key, self._failures_key)
+        except redis.RedisError as e:
+            logger.warning(f"Could not close circuit breaker: {e}")
+
+    def record_failure(self, reason: str):
+        try:
+            pipe = self._redis.pipeline()
+            pipe.incr(self._failures_key)
+            pipe.expire(self._failures_key, CIRCUIT_FAILURE_WINDOW_SECONDS)
+            failures = pipe.execute()[0]
+        except redis.RedisError as e:
+            logger.warning(f"Could not record ASR failure: {e}")
+            return
+        if failures >= CIRCUIT_FAILURE_THRESHOLD:
+            self.open(reason)
+
+    def record_success(self):
+        try:
+            self._redis.delete(self._failures_key)
+        except redis.RedisError as e:
+            logger.warning(f"Could not reset ASR failures: {e}")
+
+
+class ASRClient:
+    """
+    Client für den Whisper-ASR-Webservice.
+
+    Hält pro Prozess eine requests.Session mit Connection-Pool, damit nicht jeder
+    Job eine neue TCP-Verbindung aufbaut. Alle Aufrufe haben Connect- und
+    Read-Timeouts und laufen über einen gemeinsamen Circuit Breaker.
+    """
+
+    def __init__(self, base_url: str, redis_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.breaker = CircuitBreaker(redis_url, self.base_url)
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @property
+    def session(self) -> requests.Session:
+        # Nach einem fork (Celery prefork) keine geerbten Sockets weiterverwenden
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=ASR_POOL_SIZE, max_retries=0
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+                self._pid = os.getpid()
+            return self._session
+
+    def transcribe(
+        self, audio_file: BinaryIO, language: str, output: str = "txt"
+    ) -> requests.Response:
+        """
+        Sendet eine Audiodatei an /asr.
+
+        Raises:
+            CircuitOpenError: Service ist gesperrt
+            ASRUnavailableError: Service antwortet mit 5xx oder 429
+            requests.ConnectionError, requests.Timeout: Netzwerkfehler
+            requests.HTTPError: Sonstige Fehlerantwort (nicht wiederholbar)
+        """
+        if self.breaker.is_open():
+            raise CircuitOpenError("Transkriptionsservice ist vorübergehend gesperrt")
+
+        started = time.monotonic()
+        try:
+            response = self.session.post(
+                f"{self.base_url}/asr",
+                files={"audio_file": audio_file},
+                data={"task": "transcribe", "language": language, "output": output},
+                timeout=(ASR_CONNECT_TIMEOUT, ASR_READ_TIMEOUT),
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self._observe(started, "network")
+            self.breaker.record_failure(str(e))
+            raise
+        self._observe(started, "ok" if response.ok else "error")
+
+        if response.status_code >= 500 or response.status_code == 429:
+            reason = f"ASR service returned {response.status_code}: {response.text}"
+            self.breaker.record_failure(reason)
+            raise ASRUnavailableError(reason)
+
+        response.raise_for_status()
+        self.breaker.record_success()
+        return response
+
+    def _observe(self, started: float, outcome: str):
+        metrics.observe(
+            "asr_request_duration_seconds",
+            time.monotonic() - started,
+            backend=self.base_url,
+            outcome=outcome,
+        )
+
+    def health(self) -> Dict[str, str]:
+        """
+        Fragt /health ab und schließt den Circuit Breaker bzw. zählt einen Fehler.
+
+        Wie bei Requests sperrt erst CIRCUIT_FAILURE_THRESHOLD-mal in Folge
+        ein fehlgeschlagener Health-Check das Backend.
+
+        Returns:
+            Dictionary mit status ("healthy" oder "unhealthy") und ggf. error
+        """
+        try:
+            response = self.session.get(
+                f"{self.base_url}/health",
+                timeout=(ASR_CONNECT_TIMEOUT, HEALTH_TIMEOUT),
+            )
+            healthy = response.status_code == 200
+            error = (
+                None
+                if healthy
+                else f"Health check failed with status code {response.status_code}: {response.text}"
+            )
+        except requests.RequestException as e:
+            healthy, error = False, f"Health check exception: {str(e)}"
+
+        if healthy:
+            self.breaker.close()
+            return {"status": "healthy"}
+
+        self.breaker.record_failure(error)
+        return {"status": "unhealthy", "error": error}
+
+
+# Wählt atomar das gesunde Backend mit den wenigsten ausstehenden Audio-Sekunden,
+# das noch einen freien Slot hat. Pro Backend liegen die laufenden Requests
+# (Leases) mit Ablaufzeit in einem Sorted Set und ihre Audio-Sekunden in einem
+# Hash; abgelaufene Leases abgestürzter Worker werden dabei mit aufgeräumt.
+#   KEYS: je Backend leases, costs, circuit-open
+#   ARGV: now, ttl, limit, lease, audio_seconds
+# Rückgabe: Index des Backends, -1 wenn alle ausgelastet, -2 wenn alle gesperrt
+ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local best, best_load = nil, nil
+local any_healthy = false
+for i = 1, #KEYS, 3 do
+    local leases, costs = KEYS[i], KEYS[i + 1]
+    local expired = redis.call('ZRANGEBYSCORE', leases, '-inf', now)
+    if #expired > 0 then
+        redis.call('ZREM', leases, unpack(expired))
+        redis.call('HDEL', costs, unpack(expired))
+    end
+    if redis.call('EXISTS', KEYS[i + 2]) == 0 then
+        any_healthy = true
+        if redis.call('ZCARD', leases) < tonumber(ARGV[3]) then
+            local load = 0
+            for _, cost in ipairs(redis.call('HVALS', costs)) do
+                load = load + tonumber(cost)
+            end
+            if best == nil or load < best_load then
+                best, best_load = i, load
+            end
+        end
+    end
+end
+if best == nil then
+    return any_healthy and -1 or -2
+end
+redis.call('ZADD', KEYS[best], now + tonumber(ARGV[2]), ARGV[4])
+redis.call('HSET', KEYS[best + 1], ARGV[4], ARGV[5])
+return (best - 1) / 3
+"""
+
+# Führt den Durchsatz eines Backends (Audio-Sekunden pro Sekunde) als
+# exponentiell gleitendes Mittel; die erste Messung wird übernommen.
+#   KEYS: Hash Backend -> Durchsatz
+#   ARGV: backend, gemessener Durchsatz, alpha
+THROUGHPUT_SCRIPT = """
+local sample = tonumber(ARGV[2])
+local rate = tonumber(redis.call('HGET', KEYS[1], ARGV[1]))
+if rate then
+    sample = rate + tonumber(ARGV[3]) * (sample - rate)
+end
+redis.call('HSET', KEYS[1], ARGV[1], tostring(sample))
+return tostring(sample)
+"""
+
+
+class ASRPool:
+    """
+    Verteilt Transkriptionen auf mehrere Whisper-Backends.
+
+    Jeder Request geht an das gesunde Backend mit den wenigsten ausstehenden
+    Audio-Sekunden, höchstens ASR_BACKEND_CONCURRENCY gleichzeitig pro Backend.
+    Backends mit offenem Circuit Breaker bekommen keine neuen Requests, bis der
+    Health-Check sie wieder freigibt oder die Sperre abläuft. Aus jedem erfolgreichen Request lernt der
+    Pool den Durchsatz des Backends für Zeitschätzungen.
+    """
+
+    def __init__(
+        self,
+        base_urls: List[str],
+        redis_url: str,
+        concurrency: int = ASR_BACKEND_CONCURRENCY,
+    ):
+        # Beim Start scheitern statt bei der ersten Transkription oder Schätzung
+        if not base_urls:
+            raise ValueError(
+                "Kein ASR-Backend konfiguriert (TRANSCRIPTION_SERVICE_URLS)"
+            )
+        self.backends = [ASRClient(url, redis_url) for url in base_urls]
+        self.concurrency = concurrency
+        self._redis = redis.Redis.from_url(
+            redis_url, socket_timeout=1, socket_connect_timeout=1
+        )
+        self._acquire_script = self._redis.register_script(ACQUIRE_SCRIPT)
+        self._throughput_script = self._redis.register_script(THROUGHPUT_SCRIPT)
+        self._throughput_key = "asr:pool:throughput"
+        # Leases laufen spätestens nach dem längsten möglichen Request ab
+        self._lease_ttl = ASR_CONNECT_TIMEOUT + ASR_READ_TIMEOUT + 60
+        self._keys = []
+        for backend in self.backends:
+            prefix = f"asr:pool:{backend.base_url}"
+            self._keys += [
+                f"{prefix}:leases",
+                f"{prefix}:costs",
+                backend.breaker.open_key,
+            ]
+
+    def _try_acquire(self, lease: str, audio_seconds: float) -> int:
+        try:
+            return self._acquire_script(
+                keys=self._keys,
+                args=[
+                    time.time(),
+                    self._lease_ttl,
+                    self.concurrency,
+                    lease,
+                    audio_seconds,
+                ],
+            )
+        except redis.RedisError as e:
+            # Ohne Redis keine Koordination; zufällig verteilen statt blockieren
+            logger.warning(f"ASR scheduler unavailable, picking random backend: {e}")
+            return random.randrange(len(self.backends))
+
+    def _release(self, index: int, lease: str):
+        try:
+            pipe = self._redis.pipeline()
+            pipe.zrem(self._keys[index * 3], lease)
+            pipe.hdel(self._keys[index * 3 + 1], lease)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not release ASR lease {lease}: {e}")
+
+    @contextmanager
+    def backend(self, audio_seconds: float) -> Iterator[ASRClient]:
+        """
+        Reserviert einen Slot auf dem am wenigsten ausgelasteten Backend.
+
+        Sind alle Backends ausgelastet, wird bis zu ASR_ACQUIRE_TIMEOUT gewartet.
+
+        Args:
+            audio_seconds: Länge der zu transkribierenden Audiodatei
+
+        Raises:
+            CircuitOpenError: Alle Backends sind gesperrt
+            ASRUnavailableError: Kein Slot innerhalb von ASR_ACQUIRE_TIMEOUT frei
+        """
+        lease = uuid.uuid4().hex
+        deadline = time.monotonic() + ASR_ACQUIRE_TIMEOUT
+        while (index := self._try_acquire(lease, audio_seconds)) < 0:
+            if index == -2:
+                raise CircuitOpenError("Alle Transkriptionsservices sind gesperrt")
+            if time.monotonic() > deadline:
+                raise ASRUnavailableError(
+                    "Alle Transkriptionsservices sind ausgelastet"
+                )
+            time.sleep(random.uniform(0.1, 0.5))
+
+        started = time.monotonic()
+        try:
+            yield self.backends[index]
+        finally:
+            self._release(index, lease)
+        # Nur erfolgreiche Requests gehen in den Durchsatz ein
+        self._record_throughput(
+            self.backends[index], audio_seconds, time.monotonic() - started
+        )
+        metrics.inc(
+            "asr_audio_seconds_total",
+            audio_seconds,
+            backend=self.backends[index].base_url,
+        )
+
+    def _record_throughput(
+        self, backend: ASRClient, audio_seconds: float, elapsed: float
+    ):
+        if audio_seconds <= 0 or elapsed <= 0:
+            return
+        try:
+            self._throughput_script(
+                keys=[self._throughput_key],
+                args=[backend.base_url, audio_seconds / elapsed, ASR_THROUGHPUT_ALPHA],
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Could not record ASR throughput: {e}")
+
+    def throughput(self) -> Dict[str, float]:
+        """
+        Gelernter Durchsatz je Backend in Audio-Sekunden pro Sekunde.
+
+        Backends ohne Messung (oder ohne Redis) bekommen ASR_REALTIME_FACTOR.
+        """
+        try:
+            measured = self._redis.hgetall(self._throughput_key)
+        except redis.RedisError as e:
+            logger.warning(f"Could not read ASR throughput: {e}")
+            measured = {}
+        return {
+            backend.base_url: float(
+                measured.get(backend.base_url.encode(), ASR_REALTIME_FACTOR)
+            )
+            for backend in self.backends
+        }
+
+    def health(self) -> List[Dict[str, str]]:
+        """Prüft alle Backends; wiederholt ungesunde werden gesperrt."""
+        return [
+            {"backend": backend.base_url, **backend.health()}
+            for backend in self.backends
+        ]
@@ -0,0 +1,198 @@
+import os
+import re
+import subprocess
+from typing import List, Tuple
+
+# Konfiguration der Stillen-Erkennung
+SILENCE_NOISE_DB = int(os.getenv("SILENCE_NOISE_DB", "-35"))
+SILENCE_MIN_DURATION = float(os.getenv("SILENCE_MIN_DURATION", "0.5"))
+# Ränder, die beim Abschneiden von Stille am Anfang/Ende stehen bleiben
+TRIM_PADDING_SECONDS = 0.25
+# Zielformat für Whisper: 16 kHz Mono in Opus
+NORMALIZED_BITRATE = os.getenv("NORMALIZED_BITRATE", "24k")
+
+_SILENCE_START = re.compile(r"silence_start: (-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end: (-?[\d.]+)")
+
+
+def probe_duration(path: str) -> float:
+    """Ermittelt die Dauer einer Audiodatei in Sekunden per ffprobe."""
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "format=duration",
+            "-of",
+            "default=noprint_wrappers=1:nokey=1",
+            path,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip())
+
+
+def detect_silences(path: str) -> List[Tuple[float, float]]:
+    """
+    Findet stille Abschnitte in einer Audiodatei.
+
+    Returns:
+        Liste von (start, end) in Sekunden
+    """
+    result = subprocess.run(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-nostats",
+            "-i",
+            path,
+            "-af",
+            f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_DURATION}",
+            "-f",
+            "null",
+            "-",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    silences = []
+    start = None
+    for line in result.stderr.splitlines():
+        if match := _SILENCE_START.search(line):
+            start = max(0.0, float(match.group(1)))
+        elif (match := _SILENCE_END.search(line)) and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    return silences
+
+
+def plan_segments(
+    duration: float,
+    silences: List[Tuple[float, float]],
+    target_length: float,
+    max_length: float,
+) -> List[Tuple[float, float]]:
+    """
+    Teilt eine Aufnahme in Segmente, deren Grenzen möglichst in Stillen liegen.
+
+    Jede Grenze wird in die Mitte der Stille gelegt, die dem Zielpunkt am nächsten
+    liegt, ohne dass ein Segment länger als max_length wird. Gibt es keine passende
+    Stille, wird hart bei max_length geschnitten.
+
+    Args:
+        duration: Gesamtdauer in Sekunden
+        silences: Stille Abschnitte aus detect_silences
+        target_length: Angestrebte Segmentlänge in Sekunden
+        max_length: Maximale Segmentlänge in Sekunden
+
+    Returns:
+        Liste von (start, end) in Sekunden
+    """
+    split_candidates = sorted((start + end) / 2 for start, end in silences)
+
+    segments = []
+    start = 0.0
+    while duration - start > max_length:
+        target = start + target_length
+        window = [
+            point
+            for point in split_candidates
+            if start + target_length / 2 <= point <= start + max_length
+        ]
+        end = (
+            min(window, key=lambda p: abs(p - target)) if window else start + max_length
+        )
+        segments.append((start, end))
+        start = end
+    segments.append((start, duration))
+    return segments
+
+
+def extract_segment(
+    path: str, start: float, end: float, output_path: str, copy: bool = False
+):
+    """
+    Schneidet einen Abschnitt aus einer Audiodatei.
+
+    Standardmäßig wird als 16 kHz Mono-FLAC kodiert. Mit copy=True wird der
+    Audiostream unverändert übernommen, z.B. für bereits normalisierte Dateien.
+    """
+    codec = ["-c:a", "copy"] if copy else ["-ac", "1", "-ar", "16000", "-c:a", "flac"]
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-ss",
+            f"{start:.3f}",
+            "-to",
+            f"{end:.3f}",
+            "-i",
+            path,
+            "-vn",
+            *codec,
+            output_path,
+        ],
+        capture_output=True,
+        check=True,
+    )
+
+
+def speech_bounds(
+    duration: float, silences: List[Tuple[float, float]]
+) -> Tuple[float, float]:
+    """
+    Bestimmt den Bereich zwischen Stille am Anfang und am Ende einer Aufnahme.
+
+    Returns:
+        (start, end) in Sekunden, inklusive TRIM_PADDING_SECONDS
+    """
+    start, end = 0.0, duration
+    if silences and silences[0][0] <= TRIM_PADDING_SECONDS:
+        start = max(0.0, silences[0][1] - TRIM_PADDING_SECONDS)
+    if silences and silences[-1][1] >= duration - TRIM_PADDING_SECONDS:
+        end = min(duration, silences[-1][0] + TRIM_PADDING_SECONDS)
+    # Komplett stille Aufnahmen nicht auf Länge 0 schneiden
+    if end <= start:
+        return 0.0, duration
+    return start, end
+
+
+def normalize_for_asr(path: str, start: float, end: float, output_path: str):
+    """Schneidet eine Aufnahme zu und kodiert sie als 16 kHz Mono-Opus."""
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-ss",
+            f"{start:.3f}",
+            "-to",
+            f"{end:.3f}",
+            "-i",
+            path,
+            "-vn",
+            "-ac",
+            "1",
+            "-ar",
+            "16000",
+            "-c:a",
+            "libopus",
+            "-b:a",
+            NORMALIZED_BITRATE,
+            "-application",
+            "voip",
+            output_path,
+        ],
+        capture_output=True,
+        check=True,
+    )
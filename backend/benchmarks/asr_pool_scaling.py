@@ -0,0 +1,88 @@
+"""
+Durchsatz des ASR-Pools mit einem und mehreren Whisper-Backends.
+
+Startet Stub-Backends (tests/asr_stub.py) mit fester Antwortzeit und schickt
+Jobs aus mehreren Threads über ASRPool.backend(); gemessen werden Jobs pro
+Sekunde und die Verteilung auf die Backends. Ohne --redis-url läuft Redis im
+Prozess (fakeredis mit Lua), mit --redis-url gegen einen echten Server.
+
+Aufruf aus backend/:
+
+    python benchmarks/asr_pool_scaling.py --backends 1 2 4 --jobs 16
+"""
+
+import argparse
+import collections
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "tests"))
+
+import redis  # noqa: E402
+
+from asr_client import ASRPool  # noqa: E402
+from asr_stub import StubASR  # noqa: E402
+
+
+def use_fake_redis():
+    # Der TCP-Server von fakeredis verträgt die großen SCRIPT LOAD-Payloads
+    # nicht, deshalb Redis im Prozess
+    import fakeredis
+
+    server = fakeredis.FakeServer()
+    redis.Redis.from_url = lambda url, **kwargs: fakeredis.FakeRedis(server=server)
+
+
+def run(pool: ASRPool, jobs: int, threads: int, audio_seconds: float):
+    used = collections.Counter()
+
+    def job(_):
+        with pool.backend(audio_seconds) as backend:
+            backend.transcribe(io.BytesIO(b"\0" * 1000), "de")
+            used[backend.base_url] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(job, range(jobs)))
+    return jobs / (time.perf_counter() - started), sorted(used.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backends", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--jobs", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.5, help="Sekunden je Request")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--redis-url")
+    args = parser.parse_args()
+
+    if args.redis_url is None:
+        use_fake_redis()
+    redis_url = args.redis_url or "redis://localhost:6379"
+
+    stubs = [StubASR().start() for _ in range(max(args.backends))]
+    for stub in stubs:
+        stub.delay = args.delay
+    try:
+        for count in args.backends:
+            urls = [stub.url for stub in stubs[:count]]
+            pool = ASRPool(urls, redis_url, concurrency=args.concurrency)
+            rate, distribution = run(pool, args.jobs, args.threads, 30.0)
+            ideal = count * args.concurrency / args.delay
+            print(
+                f"{count} backend(s): {rate:.2f} jobs/s "
+                f"(ideal {ideal:.2f}), jobs per backend {distribution}"
+            )
+    finally:
+        for stub in stubs:
+            stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Durchsatz der Datenbankzugriffe mit mehreren Threads.
+
+Jeder Thread liest abwechselnd ein Meeting und ändert dessen Titel, wie es die
+Handler und Worker tun; gemessen werden Paare pro Sekunde mit einem und mit
+mehreren Threads, dazu das Lesen der ganzen Meeting-Liste. Da konkurrierende
+Schreiber in SQLite im Busy-Handler warten, streuen die Werte stark; jede
+Messung wird deshalb wiederholt und Median und Spanne ausgegeben.
+
+Aufruf aus backend/:
+
+    python benchmarks/db_pool.py --operations 2000 --threads 1 4 --repeat 5
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+MEETINGS = 200
+
+
+def read_and_update(db, meeting_ids, operations: int, errors):
+    from models import MeetingUpdate
+
+    for index in range(operations):
+        meeting_id = meeting_ids[index % len(meeting_ids)]
+        try:
+            db.get_meeting(meeting_id)
+            db.update_meeting(meeting_id, MeetingUpdate(title=f"Titel {index}"))
+        except Exception as e:
+            # Ohne Pool scheitern parallele Schreiber an "database is locked"
+            errors.append(e)
+
+
+def run_threads(db, meeting_ids, count: int, operations: int):
+    """Ein Durchlauf mit count Threads: Paare pro Sekunde und Fehler."""
+    errors = []
+    threads = [
+        threading.Thread(
+            target=read_and_update, args=(db, meeting_ids, operations, errors)
+        )
+        for _ in range(count)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return (count * operations - len(errors)) / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # database legt beim Import data/meetings.db relativ zum Arbeitsverzeichnis an
+    workdir = tempfile.mkdtemp(prefix="bench-db-")
+    os.chdir(workdir)
+    from database import Database
+    from models import MeetingCreate
+
+    try:
+        db = Database(os.path.join(workdir, "bench.db"))
+        meeting_ids = [
+            db.create_meeting(
+                MeetingCreate(title=f"Sitzung {i}", date=datetime.now())
+            ).id
+            for i in range(MEETINGS)
+        ]
+
+        for count in args.threads:
+            rates, errors = [], []
+            for _ in range(args.repeat):
+                rate, failed = run_threads(db, meeting_ids, count, args.operations)
+                rates.append(rate)
+                errors += failed
+            print(
+                f"threads={count}: median {statistics.median(rates):,.0f} "
+                f"get+update/s (min {min(rates):,.0f}, max {max(rates):,.0f}), "
+                f"{len(errors)} failed" + (f" ({errors[0]})" if errors else "")
+            )
+
+        started = time.perf_counter()
+        for _ in range(MEETINGS):
+            db.get_all_meetings()
+        print(
+            f"get_all_meetings ({MEETINGS} rows): "
+            f"{MEETINGS / (time.perf_counter() - started):,.0f}/s"
+        )
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
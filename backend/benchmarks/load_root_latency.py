@@ -0,0 +1,222 @@
+"""
+Latenz der Startseite unter gleichzeitiger Last.
+
+Startet die API mit uvicorn auf einer frischen Datenbank mit 300 Meetings und
+offenen Jobs und misst GET / mit mehreren Clients, einmal ohne weitere Last und
+einmal, während
+  - ein zweiter Prozess wiederholt 0,3 s lange Schreibtransaktionen hält
+    (wie ein Worker, der große Transkripte speichert),
+  - zwei Clients Audiodateien hochladen und
+  - vier Clients /queue, /queue/{job_id} und /status abfragen.
+
+Uploads und /status brauchen Redis (REDIS_URL, Standard localhost:6379) als
+Celery-Broker; ein Worker muss nicht laufen.
+
+Aufruf aus backend/:
+
+    python benchmarks/load_root_latency.py --duration 15 --clients 8
+"""
+
+import argparse
+import asyncio
+import io
+import multiprocessing
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import wave
+from datetime import datetime
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+MEETINGS = 300
+
+
+def seed(workdir: str):
+    """Legt Meetings mit je einem wartenden Job an (im Arbeitsverzeichnis)."""
+    from database import Database
+    from models import MeetingCreate
+
+    db = Database(os.path.join(workdir, "data", "meetings.db"))
+    for index in range(MEETINGS):
+        meeting = db.create_meeting(
+            MeetingCreate(
+                title=f"Sitzung {index}", date=datetime(2026, 1, 1 + index % 28)
+            )
+        )
+        db.create_transcription_job(
+            meeting.id,
+            str(uuid.uuid4()),
+            queue="interactive",
+            submitter=f"user-{index % 5}",
+            audio_seconds=60,
+        )
+    db.close_all()
+
+
+def silent_wav(seconds: float = 5.0) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as audio:
+        audio.setnchannels(1)
+        audio.setsampwidth(2)
+        audio.setframerate(16000)
+        audio.writeframes(b"\0\0" * int(16000 * seconds))
+    return buffer.getvalue()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def writer(db_path: str, stop_at: float):
+    # Hält wie ein speichernder Worker immer wieder die Schreibsperre
+    connection = sqlite3.connect(db_path, timeout=30)
+    while time.time() < stop_at:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("UPDATE meetings SET updated_at = updated_at WHERE id = 1")
+        time.sleep(0.3)
+        connection.commit()
+        time.sleep(0.2)
+
+
+async def root_client(base_url: str, latencies, stop_at: float):
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        while time.time() < stop_at:
+            started = time.perf_counter()
+            response = await client.get("/")
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+            await asyncio.sleep(0.05)
+
+
+async def uploader(base_url: str, meeting_ids, statuses, stop_at: float):
+    audio = silent_wav()
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        index = 0
+        while time.time() < stop_at:
+            response = await client.post(
+                f"/meetings/{meeting_ids[index % len(meeting_ids)]}/upload",
+                files={"file": ("aufnahme.wav", audio, "audio/wav")},
+            )
+            statuses.append(response.status_code)
+            index += 1
+
+
+async def poller(base_url: str, job_id: str, statuses, stop_at: float):
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        while time.time() < stop_at:
+            for path, params in (
+                ("/queue", None),
+                (f"/queue/{job_id}", None),
+                ("/status", {"task_id": job_id}),
+            ):
+                response = await client.get(path, params=params)
+                statuses.append(response.status_code)
+
+
+async def run(base_url: str, db_path: str, args, load: bool):
+    stop_at = time.time() + args.duration
+    latencies, statuses = [], []
+    with sqlite3.connect(db_path) as connection:
+        meeting_ids = [
+            row[0]
+            for row in connection.execute(
+                "SELECT id FROM meetings ORDER BY id LIMIT 20"
+            )
+        ]
+        job_id = connection.execute(
+            "SELECT job_id FROM transcription_jobs WHERE status = 'pending' LIMIT 1"
+        ).fetchone()[0]
+
+    clients = [root_client(base_url, latencies, stop_at) for _ in range(args.clients)]
+    if load:
+        process = multiprocessing.Process(target=writer, args=(db_path, stop_at))
+        process.start()
+        clients += [
+            uploader(base_url, meeting_ids, statuses, stop_at) for _ in range(2)
+        ]
+        clients += [poller(base_url, job_id, statuses, stop_at) for _ in range(4)]
+    await asyncio.gather(*clients)
+    if load:
+        process.join()
+
+    latencies.sort()
+
+    def quantile(q: float) -> float:
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    errors = sum(1 for status in statuses if status != 200)
+    print(
+        f"{'load' if load else 'idle':5} requests={len(latencies)} "
+        f"p50={quantile(0.5):.1f}ms p99={quantile(0.99):.1f}ms "
+        f"max={latencies[-1] * 1000:.0f}ms other_requests={len(statuses)} "
+        f"non_200={errors}"
+    )
+
+
+def wait_for(base_url: str, server: subprocess.Popen):
+    for _ in range(100):
+        if server.poll() is not None:
+            sys.exit("uvicorn exited during startup")
+        try:
+            httpx.get(f"{base_url}/", timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    sys.exit("uvicorn did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--clients", type=int, default=8)
+    args = parser.parse_args()
+
+    # Wie im Container liegen Daten und Templates relativ zum Arbeitsverzeichnis
+    workdir = tempfile.mkdtemp(prefix="bench-load-")
+    os.symlink(
+        os.path.join(BACKEND_DIR, "templates"), os.path.join(workdir, "templates")
+    )
+    env = {
+        **os.environ,
+        "PYTHONPATH": BACKEND_DIR,
+        "DATA_DIR": os.path.join(workdir, "data"),
+        "UPLOAD_FOLDER": os.path.join(workdir, "data", "uploads"),
+        "IMPORT_DIR": os.path.join(workdir, "data", "import"),
+    }
+    os.environ.update(env)
+    os.chdir(workdir)
+    seed(workdir)
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)]
+        + ["--log-level", "warning"],
+        cwd=workdir,
+        env=env,
+    )
+    try:
+        wait_for(base_url, server)
+        db_path = os.path.join(workdir, "data", "meetings.db")
+        asyncio.run(run(base_url, db_path, args, load=False))
+        asyncio.run(run(base_url, db_path, args, load=True))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Volltextsuche über viele lange Transkripte.
+
+Erzeugt synthetische Meetings (Wörter mit Zipf-Verteilung, wie in echter
+Sprache) in einer frischen Datenbank und misst search_meetings für eine Seite
+mit einem seltenen Wort, einem Wort aus jedem Transkript und einem breiten
+Präfix.
+
+Aufruf aus backend/:
+
+    python benchmarks/search_fts.py --meetings 10000 --words 9000
+
+Die Datenbank bleibt mit --keep erhalten und kann mit --db erneut gemessen
+werden, ohne neu zu befüllen.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Silben für die künstlichen Wörter; "ver" ergibt den breiten Präfix
+SYLLABLES = [
+    "ver",
+    "an",
+    "ge",
+    "be",
+    "schaft",
+    "ung",
+    "heit",
+    "lich",
+    "rat",
+    "haus",
+    "stadt",
+    "bau",
+    "plan",
+    "ord",
+    "nung",
+    "mit",
+    "tel",
+    "stel",
+    "lung",
+    "wahl",
+    "über",
+    "prü",
+    "fung",
+    "straßen",
+    "schul",
+    "kin",
+    "der",
+    "gär",
+    "ten",
+    "ab",
+]
+# Füllwörter, die in jedem Transkript vorkommen
+COMMON_WORDS = ["und", "die", "der", "das", "wir", "ist", "nicht", "zu", "auf"]
+RARE_WORD = "Zwischenfinanzierung"
+# Jedes so vielte Meeting enthält das seltene Wort
+RARE_EVERY = 1000
+
+QUERIES = {
+    "rare term": RARE_WORD.lower(),
+    "term in every document": "und",
+    "broad prefix": "ver*",
+}
+
+
+def build_vocabulary(size: int, rng: random.Random):
+    """Künstliche Wörter aus zwei bis vier Silben, dazu Zipf-Gewichte."""
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    return words, weights
+
+
+def transcript(index: int, words: int, vocabulary, rng: random.Random) -> str:
+    """Ein Transkript aus Zeilen zu je zwölf Wörtern."""
+    tokens = rng.choices(vocabulary[0], weights=vocabulary[1], k=words)
+    for position in range(0, words, 25):
+        tokens[position] = rng.choice(COMMON_WORDS)
+    tokens[0] = "und"
+    if index % RARE_EVERY == 0:
+        tokens[rng.randrange(words)] = RARE_WORD
+    return "\n".join(" ".join(tokens[i : i + 12]) for i in range(0, words, 12))
+
+
+def seed(db, meetings: int, words: int, seed_value: int):
+    from models import MeetingCreate
+
+    rng = random.Random(seed_value)
+    vocabulary = build_vocabulary(20000, rng)
+    start_date = datetime(2015, 1, 1)
+    started = time.perf_counter()
+    for index in range(meetings):
+        meeting = db.create_meeting(
+            MeetingCreate(
+                title=f"Sitzung des Bauausschusses Nr. {index}",
+                date=start_date + timedelta(days=index % 3650),
+            )
+        )
+        db.save_transcript(meeting.id, transcript(index, words, vocabulary, rng))
+        if (index + 1) % 1000 == 0:
+            print(f"  seeded {index + 1}/{meetings} meetings", flush=True)
+    print(f"Seeding took {time.perf_counter() - started:.1f}s")
+
+
+def measure(db, query: str, repeat: int):
+    """Median und Maximum (ms) für die erste Seite einer Suche."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        page = db.search_meetings(query, limit=20)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), max(timings), len(page.items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--meetings", type=int, default=10000)
+    parser.add_argument("--words", type=int, default=9000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", help="Vorhandene Datenbank messen statt zu befüllen")
+    parser.add_argument("--keep", action="store_true", help="Datenbank behalten")
+    args = parser.parse_args()
+
+    # database legt beim Import data/meetings.db relativ zum Arbeitsverzeichnis an
+    workdir = tempfile.mkdtemp(prefix="bench-search-")
+    os.chdir(workdir)
+    from database import Database
+
+    db_path = args.db or os.path.join(workdir, "search.db")
+    db = Database(db_path)
+    if not args.db:
+        print(f"Seeding {args.meetings} meetings x {args.words} words into {db_path}")
+        seed(db, args.meetings, args.words, args.seed)
+    print(f"Database size: {os.path.getsize(db_path) / 1e6:.0f} MB")
+
+    for name, query in QUERIES.items():
+        median, worst, hits = measure(db, query, args.repeat)
+        print(
+            f"{name:24} {query!r:24} median {median:7.1f} ms  max {worst:7.1f} ms  ({hits} hits)"
+        )
+
+    db.close_all()
+    if args.keep:
+        print(f"Kept {db_path}")
+    else:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import tarfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from database import db
+from events import publish_job_updates
+from models import ImportReport, MeetingImport, TranscriptionStatus
+from storage import (
+    blob_path,
+    data_dir,
+    file_sha256,
+    link_into_store,
+    receive_stream,
+)
+from task import BULK_QUEUE, app, enqueue_transcriptions
+
+# Meetings pro Transaktion und Celery-Gruppe
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+# Dateien, die beim Import aus einem Verzeichnis parallel gehasht werden
+IMPORT_HASH_THREADS = int(os.getenv("IMPORT_HASH_THREADS", "4"))
+# Serverseitige Archivverzeichnisse, die über die API importiert werden dürfen
+import_dir = os.getenv("IMPORT_DIR", os.path.join(data_dir, "import"))
+# Einreicher der Jobs, falls nichts anderes angegeben ist
+IMPORT_SUBMITTER = "import"
+# Pflichtfelder jeder Manifest-Zeile
+MANIFEST_FIELDS = ("title", "date", "file")
+
+logger = logging.getLogger(__name__)
+
+# Relativer Pfad im Audio-Speicher, SHA-256 und Größe in Bytes
+StoredAudio = Tuple[str, str, int]
+# Pfad der Quelldatei (im Verzeichnis oder entpackt), SHA-256 und Größe
+SourceAudio = Tuple[str, str, int]
+
+
+class ManifestError(ValueError):
+    """Manifest ist nicht lesbar oder eine Zeile ist ungültig."""
+
+
+class ManifestEntry(NamedTuple):
+    line: int
+    title: str
+    date: datetime
+    link: Optional[str]
+    file: str
+
+
+def is_jsonl(filename: str) -> bool:
+    """Manifeste mit Endung .jsonl/.ndjson sind JSONL, alle anderen CSV."""
+    return os.path.splitext(filename)[1].lower() in (".jsonl", ".ndjson")
+
+
+def read_manifest(text: str, jsonl: bool = False) -> List[ManifestEntry]:
+    """
+    Liest ein Import-Manifest.
+
+    Jede Zeile beschreibt ein Meeting: title, date (ISO 8601), file (Pfad der
+    Audiodatei relativ zum Verzeichnis bzw. Archiv) und optional link. Das
+    ganze Manifest wird geprüft, bevor etwas geschrieben wird.
+
+    Args:
+        text: Inhalt des Manifests
+        jsonl: JSONL (ein Objekt pro Zeile) statt CSV mit Kopfzeile
+
+    Returns:
+        Einträge in Reihenfolge des Manifests
+    """
+    records = []
+    if jsonl:
+        for line, raw in enumerate(text.splitlines(), start=1):
+            if not raw.strip():
+                continue
+            try:
+                records.append((line, json.loads(raw)))
+            except json.JSONDecodeError as e:
+                raise ManifestError(f"Zeile {line}: kein gültiges JSON ({e.msg})")
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        missing = set(MANIFEST_FIELDS) - set(reader.fieldnames or ())
+        if missing:
+            raise ManifestError(f"Spalten fehlen: {', '.join(sorted(missing))}")
+        for row in reader:
+            records.append((reader.line_num, row))
+
+    return [_parse_entry(line, record) for line, record in records]
+
+
+def _parse_entry(line: int, record) -> ManifestEntry:
+    if not isinstance(record, dict):
+        raise ManifestError(f"Zeile {line}: Objekt erwartet")
+    missing = [
+        name for name in MANIFEST_FIELDS if not str(record.get(name) or "").strip()
+    ]
+    if missing:
+        raise ManifestError(f"Zeile {line}: {', '.join(missing)} fehlt")
+
+    try:
+        date = datetime.fromisoformat(str(record["date"]).strip())
+    except ValueError:
+        raise ManifestError(f"Zeile {line}: Ungültiges Datum: {record['date']}")
+
+    # Nur Pfade innerhalb des Verzeichnisses bzw. Archivs
+    file = os.path.normpath(str(record["file"]).strip())
+    if os.path.isabs(file) or file.split(os.sep)[0] == "..":
+        raise ManifestError(f"Zeile {line}: Ungültiger Pfad: {record['file']}")
+
+    return ManifestEntry(
+        line, str(record["title"]).strip(), date, record.get("link") or None, file
+    )
+
+
+def _hash_file(source_dir: str, file: str) -> Tuple[str, int]:
+    path = os.path.join(source_dir, file)
+    return file_sha256(path), os.path.getsize(path)
+
+
+def _extract_archive(archive_path: str, files: Set[str]) -> Dict[str, SourceAudio]:
+    # Nur nach audio/incoming entpacken; in den Speicher kommen die Dateien erst
+    # batchweise und nur für neue Meetings
+    extracted: Dict[str, SourceAudio] = {}
+    try:
+        # Stream-Modus: das (auch komprimierte) Archiv wird genau einmal gelesen
+        with tarfile.open(archive_path, "r|*") as archive:
+            for member in archive:
+                name = os.path.normpath(member.name)
+                if member.isfile() and name in files and name not in extracted:
+                    extracted[name] = receive_stream(archive.extractfile(member))
+    except BaseException:
+        _remove_extracted(extracted)
+        raise
+    return extracted
+
+
+def _remove_extracted(extracted: Dict[str, SourceAudio]):
+    # Übernommene Dateien bleiben als Hardlink im Speicher erhalten
+    for path, _, _ in extracted.values():
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _source_files(
+    batch: List[ManifestEntry],
+    source: str,
+    extracted: Optional[Dict[str, SourceAudio]],
+    pool: ThreadPoolExecutor,
+    report: ImportReport,
+) -> List[Tuple[ManifestEntry, SourceAudio]]:
+    # Datei jedes Eintrags mit Prüfsumme; fehlende landen im Bericht
+    found = []
+    if extracted is not None:
+        for entry in batch:
+            audio = extracted.get(entry.file)
+            if audio is None:
+                report.errors.append(
+                    f"Zeile {entry.line}: nicht im Archiv: {entry.file}"
+                )
+                continue
+            found.append((entry, audio))
+        return found
+
+    futures = [pool.submit(_hash_file, source, entry.file) for entry in batch]
+    for entry, future in zip(batch, futures):
+        try:
+            sha256, size = future.result()
+        except OSError as e:
+            report.errors.append(f"Zeile {entry.line}: {e.strerror}: {entry.file}")
+            continue
+        found.append((entry, (os.path.join(source, entry.file), sha256, size)))
+    return found
+
+
+def _new_entries(
+    found: List[Tuple[ManifestEntry, SourceAudio]], report: ImportReport
+) -> List[Tuple[ManifestEntry, SourceAudio]]:
+    # Was import_meetings überspringen würde, gar nicht erst speichern
+    seen = db.get_imported_audio([sha256 for _, (_, sha256, _) in found])
+    new = []
+    for entry, audio in found:
+        key = (audio[1], entry.date.isoformat())
+        if key in seen:
+            report.skipped += 1
+            continue
+        seen.add(key)
+        new.append((entry, audio))
+    return new
+
+
+def _link_entry(entry: ManifestEntry, audio: SourceAudio) -> StoredAudio:
+    path, sha256, size = audio
+    relative_path = link_into_store(path, sha256, os.path.splitext(entry.file)[1])
+    return relative_path, sha256, size
+
+
+def _stored_batches(
+    entries: List[ManifestEntry], source: str, report: ImportReport
+) -> Iterator[List[Tuple[ManifestEntry, StoredAudio]]]:
+    # Liefert die neuen Einträge batchweise mit ihrer Datei im Audio-Speicher
+    extracted = None
+    if not os.path.isdir(source):
+        extracted = _extract_archive(source, {entry.file for entry in entries})
+
+    try:
+        with ThreadPoolExecutor(max_workers=IMPORT_HASH_THREADS) as pool:
+            for start in range(0, len(entries), IMPORT_BATCH_SIZE):
+                batch = entries[start : start + IMPORT_BATCH_SIZE]
+                new = _new_entries(
+                    _source_files(batch, source, extracted, pool, report), report
+                )
+
+                # Vor dem Hardlink eintragen: der Link behält die alte mtime
+                # des Originals und sähe für cleanup_audio_files sonst verwaist
+                # aus
+                db.register_audio_blobs(
+                    [
+                        (
+                            sha256,
+                            blob_path(sha256, os.path.splitext(entry.file)[1]),
+                            size,
+                        )
+                        for entry, (_, sha256, size) in new
+                    ]
+                )
+                # Gleicher Inhalt unter mehreren Namen: nur einmal verlinken
+                futures: Dict[str, Future] = {}
+                for entry, audio in new:
+                    if audio[1] not in futures:
+                        futures[audio[1]] = pool.submit(_link_entry, entry, audio)
+                stored = []
+                for entry, (_, sha256, _) in new:
+                    try:
+                        stored.append((entry, futures[sha256].result()))
+                    except OSError as e:
+                        report.errors.append(
+                            f"Zeile {entry.line}: {e.strerror}: {entry.file}"
+                        )
+                yield stored
+    finally:
+        if extracted is not None:
+            _remove_extracted(extracted)
+
+
+def _import_batch(
+    batch: List[Tuple[ManifestEntry, StoredAudio]],
+    transcribe: bool,
+    submitter: str,
+    report: ImportReport,
+):
+    meetings = [
+        MeetingImport(
+            title=entry.title,
+            date=entry.date,
+            link=entry.link,
+            audio_file=audio_file,
+            audio_sha256=audio_sha256,
+            audio_size=size,
+        )
+        for entry, (audio_file, audio_sha256, size) in batch
+    ]
+    meeting_ids, jobs = db.import_meetings(
+        meetings, transcribe=transcribe, queue=BULK_QUEUE, submitter=submitter
+    )
+    created = [meeting_id for meeting_id in meeting_ids if meeting_id is not None]
+    report.meetings += len(created)
+    report.skipped += len(meeting_ids) - len(created)
+    if not jobs:
+        return
+
+    publish_job_updates(jobs, "created")
+    audio_files = {
+        meeting_id: meeting.audio_file
+        for meeting_id, meeting in zip(meeting_ids, meetings)
+        if meeting_id is not None
+    }
+    try:
+        enqueue_transcriptions(jobs, audio_files)
+    except Exception as e:
+        # Meetings bleiben erhalten und können später transkribiert werden
+        failed = db.apply_transcription_job_statuses(
+            {job.job_id: TranscriptionStatus.FAILED for job in jobs}
+        )
+        publish_job_updates(failed)
+        report.errors.append(
+            f"Zeilen {batch[0][0].line}-{batch[-1][0].line}: "
+            f"Transkriptions-Queue nicht erreichbar ({e})"
+        )
+        return
+    report.jobs += len(jobs)
+
+
+def import_archive(
+    entries: List[ManifestEntry],
+    source: str,
+    transcribe: bool = True,
+    submitter: str = IMPORT_SUBMITTER,
+) -> ImportReport:
+    """
+    Importiert historische Meetings mitsamt ihren Aufnahmen.
+
+    Dateien aus einem Verzeichnis werden per Hardlink in den Audio-Speicher
+    übernommen, Tar-Archive in einem Durchgang entpackt. Je IMPORT_BATCH_SIZE
+    Einträge werden die Meetings in einer Transaktion angelegt und ihre
+    Transkriptionen als eine Celery-Gruppe in die Bulk-Queue gestellt.
+
+    Args:
+        entries: Einträge aus read_manifest
+        source: Verzeichnis oder Tar-Archiv (auch .tar.gz) mit den Audiodateien
+        transcribe: Transkriptionen einreihen
+        submitter: Einreicher der Jobs (für die faire Reihenfolge)
+
+    Returns:
+        Bericht mit Anzahl angelegter, übersprungener und eingereihter Meetings
+    """
+    report = ImportReport()
+    for batch in _stored_batches(entries, source, report):
+        if batch:
+            _import_batch(batch, transcribe, submitter, report)
+            logger.info(
+                f"Imported up to manifest line {batch[-1][0].line}: "
+                f"{report.meetings} meetings, {report.jobs} jobs queued"
+            )
+    return report
+
+
+@app.task
+def import_manifest(
+    manifest_path: str,
+    source: str,
+    transcribe: bool = True,
+    submitter: str = IMPORT_SUBMITTER,
+    remove_source: bool = False,
+) -> Dict[str, Any]:
+    """
+    Führt einen über POST /imports angenommenen Import im Bulk-Worker aus.
+
+    Das Manifest wurde dort schon geprüft und liegt als Datei vor, damit die
+    Nachricht an den Broker klein bleibt. Manifest und (mit remove_source)
+    hochgeladenes Archiv werden danach entfernt.
+
+    Args:
+        manifest_path: Zwischengespeichertes Manifest (CSV oder JSONL)
+        source: Verzeichnis oder Tar-Archiv mit den Audiodateien
+        transcribe: Transkriptionen einreihen
+        submitter: Einreicher der Jobs
+        remove_source: source ist ein hochgeladenes Archiv und wird gelöscht
+
+    Returns:
+        ImportReport als Dictionary
+    """
+    try:
+        with open(manifest_path, encoding="utf-8-sig") as f:
+            entries = read_manifest(f.read(), is_jsonl(manifest_path))
+        return import_archive(entries, source, transcribe, submitter).model_dump()
+    finally:
+        os.remove(manifest_path)
+        if remove_source and os.path.exists(source):
+            os.remove(source)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Importiert historische Meetings aus einem Archiv."
+    )
+    parser.add_argument("manifest", help="Manifest (CSV oder JSONL)")
+    parser.add_argument(
+        "source", help="Verzeichnis oder Tar-Archiv mit den Audiodateien"
+    )
+    parser.add_argument(
+        "--no-transcribe",
+        action="store_true",
+        help="Meetings nur anlegen, nichts transkribieren",
+    )
+    parser.add_argument(
+        "--submitter", default=IMPORT_SUBMITTER, help="Einreicher der Jobs"
+    )
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        parser.error(f"Quelle nicht gefunden: {args.source}")
+    try:
+        with open(args.manifest, encoding="utf-8-sig") as f:
+            entries = read_manifest(f.read(), is_jsonl(args.manifest))
+    except (OSError, ManifestError) as e:
+        parser.error(str(e))
+
+    report = import_archive(
+        entries, args.source, not args.no_transcribe, args.submitter
+    )
+    print(report.model_dump_json(indent=2))
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
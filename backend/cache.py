@@ -0,0 +1,113 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import metrics
+
+# Maximale Zahl gerenderter Antworten pro Prozess
+FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "512"))
+# Maximale Gesamtgröße der Antworten pro Prozess; Detailseiten enthalten das
+# ganze Transkript und können einzeln mehrere MB groß sein
+FRAGMENT_CACHE_MAX_BYTES = int(
+    os.getenv("FRAGMENT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+)
+# Antworten mit Zeitschätzungen (Queue-Position, Fortschritt) höchstens so
+# lange wiederverwenden
+ESTIMATE_REFRESH_SECONDS = int(os.getenv("ESTIMATE_REFRESH_SECONDS", "15"))
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    media_type: Optional[str]
+    headers: Dict[str, str]
+
+
+def estimate_bucket() -> int:
+    """Zeitfenster, in dem Zeitschätzungen als unverändert gelten."""
+    return int(time.time() // ESTIMATE_REFRESH_SECONDS)
+
+
+class FragmentCache:
+    """
+    LRU-Cache für gerenderte HTML-Fragmente und JSON-Antworten.
+
+    Die Schlüssel enthalten die Version der angezeigten Daten (updated_at eines
+    Meetings oder Jobs bzw. den Änderungszähler einer Tabelle). Nach einer
+    Änderung wird ein alter Eintrag also nie mehr getroffen und fällt irgendwann
+    aus dem LRU; explizites Invalidieren ist nicht nötig, auch nicht bei
+    Änderungen aus anderen Prozessen. Der ETag wird aus dem Schlüssel
+    abgeleitet, sodass ein 304 ohne Rendern möglich ist.
+
+    Verdrängt wird, bis sowohl die Zahl der Einträge als auch ihre Gesamtgröße
+    unter der Grenze liegen. Antworten über einem Viertel von max_bytes werden
+    gar nicht gespeichert, damit eine einzelne große Seite nicht den ganzen
+    Cache leert; ihr ETag funktioniert trotzdem.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = FRAGMENT_CACHE_SIZE,
+        max_bytes: int = FRAGMENT_CACHE_MAX_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def etag(key: Tuple[Any, ...]) -> str:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:20]
+        return f'W/"{digest}"'
+
+    def get(self, etag: str) -> Optional[CachedResponse]:
+        with self._lock:
+            cached = self._entries.get(etag)
+            if cached is None:
+                self.misses += 1
+                metrics.inc("fragment_cache_requests_total", result="misses")
+                return None
+            self._entries.move_to_end(etag)
+            self.hits += 1
+            metrics.inc("fragment_cache_requests_total", result="hits")
+            return cached
+
+    def put(self, etag: str, response: CachedResponse):
+        if len(response.body) > self.max_bytes // 4:
+            return
+        with self._lock:
+            previous = self._entries.pop(etag, None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            self._entries[etag] = response
+            self._bytes += len(response.body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+            metrics.set_gauge("fragment_cache_bytes", self._bytes)
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+        metrics.inc("fragment_cache_requests_total", result="not_modified")
+
+    def stats(self) -> Dict[str, int]:
+        """Zähler seit Prozessstart und aktuelle Größe des Caches."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+# Ein Cache pro API-Prozess
+fragment_cache = FragmentCache()
@@ -1,35 +1,508 @@
+import asyncio
+import base64
+import functools
+import html
+import json
+import math
 import os
 import sqlite3
-from datetime import datetime
-from typing import List, Optional
+import struct
+import threading
+import uuid
+import weakref
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple
 
+import metrics
 from models import (
     Meeting,
     MeetingCreate,
+    MeetingImport,
+    MeetingPage,
+    MeetingSummary,
     MeetingUpdate,
+    SearchPage,
+    SearchResult,
     TranscriptionJob,
+    TranscriptionJobPage,
     TranscriptionStatus,
+    TranscriptCue,
+    TranscriptSegment,
+    UploadSession,
 )
 
 
+# SQLite-Tuning für jede gepoolte Verbindung
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+# Spalten für Listenansichten; das Transkript selbst wird nie mitgeladen
+MEETING_SUMMARY_COLUMNS = """
+    id, title, date, link, audio_file, status, created_at, updated_at,
+    EXISTS (
+        SELECT 1 FROM transcript_segments WHERE meeting_id = meetings.id
+    ) AS has_transcript
+"""
+
+# Anzahl der pro Verbindung gecachten Prepared Statements
+SQLITE_CACHED_STATEMENTS = 256
+
+# Threads (und damit Verbindungen) für Datenbankzugriffe aus async-Handlern
+DB_EXECUTOR_THREADS = int(os.getenv("DB_EXECUTOR_THREADS", "8"))
+
+# Schema-Migrationen, Version = Index + 1 (gespeichert in PRAGMA user_version).
+# Neue Migrationen immer nur hinten anhängen.
+MIGRATIONS: List[List[str]] = [
+    # 1: Indizes für Pagination und Job-Lookups
+    [
+        # Doppelte Job-IDs aus alten Datenbanken entfernen, sonst schlägt der
+        # UNIQUE-Index fehl
+        """
+        DELETE FROM transcription_jobs WHERE id NOT IN (
+            SELECT MIN(id) FROM transcription_jobs GROUP BY job_id
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_meetings_date ON meetings (date)",
+        """
+        CREATE INDEX IF NOT EXISTS idx_transcription_jobs_created_at
+        ON transcription_jobs (created_at)
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_transcription_jobs_job_id
+        ON transcription_jobs (job_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_transcription_jobs_meeting_id
+        ON transcription_jobs (meeting_id)
+        """,
+    ],
+    # 2: Prüfsumme der hochgeladenen Audiodatei
+    ["ALTER TABLE meetings ADD COLUMN audio_sha256 TEXT"],
+    # 3: Sitzungen für resumierbare Uploads
+    [
+        """
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            id TEXT PRIMARY KEY,
+            meeting_id INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            total_size INTEGER NOT NULL,
+            received INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            expires_at TEXT NOT NULL,
+            FOREIGN KEY (meeting_id) REFERENCES meetings (id)
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_upload_sessions_expires_at
+        ON upload_sessions (expires_at)
+        """,
+    ],
+    # 4: Inhaltsadressierter Audio-Speicher und Transkript-Cache
+    [
+        """
+        CREATE TABLE IF NOT EXISTS audio_blobs (
+            sha256 TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            size INTEGER,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_audio_blobs_ref_count
+        ON audio_blobs (ref_count, updated_at)
+        """,
+        # Bereits hochgeladene Dateien mit Prüfsumme übernehmen
+        """
+        INSERT OR IGNORE INTO audio_blobs
+            (sha256, path, ref_count, created_at, updated_at)
+        SELECT audio_sha256, MIN(audio_file), COUNT(*), MIN(updated_at), MAX(updated_at)
+        FROM meetings
+        WHERE audio_sha256 IS NOT NULL AND audio_file IS NOT NULL
+        GROUP BY audio_sha256
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS transcript_cache (
+            audio_sha256 TEXT NOT NULL,
+            model TEXT NOT NULL,
+            language TEXT NOT NULL,
+            transcript TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (audio_sha256, model, language)
+        )
+        """,
+    ],
+    # 5: Übertragene Bytes und End-to-End-Latenz pro Job
+    [
+        "ALTER TABLE transcription_jobs ADD COLUMN asr_bytes INTEGER",
+        "ALTER TABLE transcription_jobs ADD COLUMN latency_seconds REAL",
+    ],
+    # 6: Offene Jobs für den Abgleich mit dem Celery-Backend schnell finden
+    [
+        """
+        CREATE INDEX IF NOT EXISTS idx_transcription_jobs_status
+        ON transcription_jobs (status)
+        """,
+    ],
+    # 7: Transkripte komprimiert und in Blöcken außerhalb der meetings-Zeile,
+    # dazu die Volltextsuche über Titel und Transkripte
+    [
+        """
+        CREATE TABLE IF NOT EXISTS transcript_segments (
+            id INTEGER PRIMARY KEY,
+            meeting_id INTEGER NOT NULL,
+            seq INTEGER NOT NULL,
+            start REAL,
+            end REAL,
+            data BLOB NOT NULL,
+            FOREIGN KEY (meeting_id) REFERENCES meetings (id)
+        )
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_transcript_segments_meeting_seq
+        ON transcript_segments (meeting_id, seq)
+        """,
+        # Bestehende Transkripte als einen Block ohne Zeitangaben übernehmen
+        """
+        INSERT INTO transcript_segments (meeting_id, seq, data)
+        SELECT id, 0, compress_text(transcript) FROM meetings
+        WHERE transcript IS NOT NULL
+        """,
+        "UPDATE transcript_cache SET transcript = compress_text(transcript)",
+        # Suchindex ohne eigene Kopie des Texts (contentless): das Transkript
+        # liegt nur komprimiert in transcript_segments. Trigger können es nicht
+        # entpacken, deshalb pflegt Database._reindex_meeting den Index.
+        # remove_diacritics 2 lässt "uberprufung" auch "Überprüfung" finden.
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS meetings_fts USING fts5(
+            title, transcript,
+            content='',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='3'
+        )
+        """,
+        # Treffer im Titel zählen mehr als Treffer im Transkript
+        "INSERT INTO meetings_fts(meetings_fts, rank) VALUES ('rank', 'bm25(5.0, 1.0)')",
+        # Bestehende Transkripte ein letztes Mal im Klartext indizieren
+        """
+        INSERT INTO meetings_fts (rowid, title, transcript)
+        SELECT id, title, transcript FROM meetings
+        """,
+        "ALTER TABLE meetings DROP COLUMN transcript",
+    ],
+    # 8: Zeitstempel der Whisper-Segmente (spaltenweise gepackt) pro Block
+    [
+        "ALTER TABLE transcript_segments ADD COLUMN cues BLOB",
+        "ALTER TABLE transcript_cache ADD COLUMN segments BLOB",
+    ],
+    # 9: Queue, Einreicher und Priorität für faire Reihenfolge
+    [
+        "ALTER TABLE transcription_jobs ADD COLUMN queue TEXT",
+        "ALTER TABLE transcription_jobs ADD COLUMN submitter TEXT",
+        "ALTER TABLE transcription_jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE transcription_jobs ADD COLUMN audio_seconds REAL",
+        """
+        CREATE INDEX IF NOT EXISTS idx_transcription_jobs_submitter
+        ON transcription_jobs (submitter, status)
+        """,
+    ],
+    # 10: Höchstens ein offener Job pro Meeting und Audiodatei, Idempotency-Keys
+    [
+        "ALTER TABLE transcription_jobs ADD COLUMN audio_sha256 TEXT",
+        "ALTER TABLE transcription_jobs ADD COLUMN idempotency_key TEXT",
+        """
+        UPDATE transcription_jobs SET audio_sha256 = (
+            SELECT audio_sha256 FROM meetings WHERE id = transcription_jobs.meeting_id
+        )
+        WHERE status IN ('pending', 'processing')
+        """,
+        # Bereits doppelt eingereihte Jobs: nur den jüngsten offen lassen, sonst
+        # schlägt der UNIQUE-Index fehl
+        """
+        UPDATE transcription_jobs SET status = 'failed'
+        WHERE status IN ('pending', 'processing') AND id NOT IN (
+            SELECT MAX(id) FROM transcription_jobs
+            WHERE status IN ('pending', 'processing')
+            GROUP BY meeting_id, IFNULL(audio_sha256, '')
+        )
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_transcription_jobs_active_audio
+        ON transcription_jobs (meeting_id, IFNULL(audio_sha256, ''))
+        WHERE status IN ('pending', 'processing')
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_transcription_jobs_idempotency_key
+        ON transcription_jobs (idempotency_key)
+        WHERE idempotency_key IS NOT NULL AND status != 'failed'
+        """,
+    ],
+    # 11: Fortschritt laufender Jobs
+    [
+        "ALTER TABLE transcription_jobs ADD COLUMN started_at TEXT",
+        "ALTER TABLE transcription_jobs ADD COLUMN progress_seconds REAL",
+    ],
+    # 12: Änderungszähler pro Tabelle, Version der Listen im Antwort-Cache der API.
+    # Trigger statt Aufrufen in den Methoden, damit auch Worker und künftige
+    # Schreibpfade die Zähler erhöhen.
+    [
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            scope TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        INSERT OR IGNORE INTO data_versions (scope)
+        VALUES ('meetings'), ('transcription_jobs')
+        """,
+        *(
+            f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+        AFTER {event} ON {table} BEGIN
+            UPDATE data_versions SET version = version + 1 WHERE scope = '{table}';
+        END
+        """
+            for table in ("meetings", "transcription_jobs")
+            for event in ("INSERT", "UPDATE", "DELETE")
+        ),
+    ],
+    # 13: Inkrementeller Export nach updated_at
+    [
+        """
+        CREATE INDEX IF NOT EXISTS idx_meetings_updated_at
+        ON meetings (updated_at, id)
+        """,
+    ],
+]
+
+# Jobs in diesen Zuständen können noch vom Celery-Backend überholt werden
+ACTIVE_JOB_STATUSES = (TranscriptionStatus.PENDING, TranscriptionStatus.PROCESSING)
+
+# Niedrigste Broker-Priorität (Redis: 0 wird zuerst abgearbeitet)
+MAX_JOB_PRIORITY = 9
+
+# Standard- und Maximalgröße einer Seite bei Listenabfragen
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Transkripte werden zeilenweise zu Blöcken dieser Größe (in Zeichen) gebündelt
+TRANSCRIPT_BLOCK_CHARS = 32 * 1024
+# zlib-Level für Transkripte; geschrieben wird selten, gelesen oft
+TRANSCRIPT_COMPRESSION_LEVEL = 9
+# Blöcke pro Datenbankabfrage beim Streamen eines Transkripts
+TRANSCRIPT_FETCH_BATCH = 16
+# Meetings pro Datenbankabfrage beim Streamen eines Exports
+EXPORT_FETCH_BATCH = 200
+
+# Länge der Textausschnitte in Suchergebnissen (in Tokens)
+SEARCH_SNIPPET_TOKENS = 24
+# Markierungen, die snippet() um Treffer legt; werden nach dem Escapen zu <mark>
+_MATCH_START, _MATCH_END = "\x02", "\x03"
+
+
+def encode_cursor(*values: Any) -> str:
+    """Kodiert die Sortierschlüssel der letzten Zeile als opaken Cursor."""
+    raw = "|".join(str(value) for value in values)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Dekodiert einen Cursor in (Sortierwert, ID). Wirft ValueError bei Unsinn."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        value, row_id = raw.rsplit("|", 1)
+        return value, int(row_id)
+    except Exception as e:
+        raise ValueError(f"Ungültiger Cursor: {cursor}") from e
+
+
+def compress_text(text: Optional[str]) -> Optional[bytes]:
+    """Komprimiert Text (UTF-8, zlib). Auch als SQL-Funktion registriert."""
+    if text is None:
+        return None
+    return zlib.compress(text.encode("utf-8"), TRANSCRIPT_COMPRESSION_LEVEL)
+
+
+def decompress_text(data: Optional[bytes]) -> Optional[str]:
+    """Gegenstück zu compress_text."""
+    if data is None:
+        return None
+    return zlib.decompress(data).decode("utf-8")
+
+
+def encode_cues(cues: List[TranscriptCue]) -> Optional[bytes]:
+    """
+    Packt die Zeitstempel von Äußerungen spaltenweise und komprimiert sie.
+
+    Gespeichert werden Anzahl, alle Starts, alle Enden (je int32 Millisekunden)
+    und alle avg_logprob (float32, NaN für unbekannt). Die Texte stehen
+    zeilenweise im Text des Blocks.
+    """
+    if not cues:
+        return None
+    packed = struct.pack(
+        f"<I{len(cues)}i{len(cues)}i{len(cues)}f",
+        len(cues),
+        *(round(cue.start * 1000) for cue in cues),
+        *(round(cue.end * 1000) for cue in cues),
+        *(math.nan if cue.avg_logprob is None else cue.avg_logprob for cue in cues),
+    )
+    return zlib.compress(packed, TRANSCRIPT_COMPRESSION_LEVEL)
+
+
+def decode_cues(data: Optional[bytes], text: str) -> List[TranscriptCue]:
+    """Gegenstück zu encode_cues; text ist der Text des Blocks."""
+    if data is None:
+        return []
+    packed = zlib.decompress(data)
+    (count,) = struct.unpack_from("<I", packed)
+    values = struct.unpack_from(f"<{count}i{count}i{count}f", packed, 4)
+    starts, ends = values[:count], values[count : 2 * count]
+    logprobs = values[2 * count :]
+    return [
+        TranscriptCue(
+            start=starts[i] / 1000,
+            end=ends[i] / 1000,
+            text=line,
+            avg_logprob=None if math.isnan(logprobs[i]) else round(logprobs[i], 4),
+        )
+        for i, line in enumerate(text.split("\n"))
+    ]
+
+
+def split_transcript(text: str) -> List[TranscriptSegment]:
+    """
+    Teilt ein Transkript ohne Zeitangaben an Zeilenumbrüchen in Blöcke.
+
+    "\n".join() der Blocktexte ergibt wieder exakt den Ausgangstext.
+    """
+    blocks: List[TranscriptSegment] = []
+    lines: List[str] = []
+    size = 0
+    for line in text.split("\n"):
+        if lines and size + len(line) > TRANSCRIPT_BLOCK_CHARS:
+            blocks.append(TranscriptSegment(seq=len(blocks), text="\n".join(lines)))
+            lines, size = [], 0
+        lines.append(line)
+        size += len(line) + 1
+    blocks.append(TranscriptSegment(seq=len(blocks), text="\n".join(lines)))
+    return blocks
+
+
+def build_search_query(text: str) -> str:
+    """
+    Übersetzt eine Benutzereingabe in eine FTS5-Abfrage.
+
+    Jedes Wort wird als Literal gequotet, sodass Sonderzeichen und FTS5-Operatoren
+    keine Syntaxfehler auslösen. Alle Wörter müssen vorkommen; ein * am Wortende
+    sucht nach dem Präfix. Wirft ValueError, wenn kein Suchwort übrig bleibt.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if word:
+            quoted = '"' + word.replace('"', '""') + '"'
+            terms.append(quoted + "*" if prefix else quoted)
+    if not terms:
+        raise ValueError("Leere Suchanfrage")
+    return " ".join(terms)
+
+
+def _highlight(snippet: str) -> str:
+    """Escaped einen Ausschnitt für HTML und markiert die Treffer."""
+    return (
+        html.escape(snippet)
+        .replace(_MATCH_START, "<mark>")
+        .replace(_MATCH_END, "</mark>")
+    )
+
+
+class _PooledConnection(sqlite3.Connection):
+    # sqlite3.Connection selbst erlaubt keine schwachen Referenzen
+    pass
+
+
 class Database:
     def __init__(self, db_path: str = "data/meetings.db"):
         self.db_path = db_path
         # Stellen Sie sicher, dass das Verzeichnis existiert
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        # Initialisiere die Datenbank, aber speichere keine Verbindung
+        # Eine Verbindung pro Thread, wiederverwendet über alle Aufrufe hinweg.
+        # Nur threading.local hält sie fest: endet der Thread, wird sie mit der
+        # nächsten Garbage Collection geschlossen und verschwindet auch aus
+        # _connections.
+        self._local = threading.local()
+        self._connections: weakref.WeakValueDictionary[int, sqlite3.Connection] = (
+            weakref.WeakValueDictionary()
+        )
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
         self.initialize_db()
 
-    def get_connection(self):
-        # Erstelle für jeden Aufruf eine neue Verbindung
-        connection = sqlite3.connect(self.db_path)
+    def _open_connection(self) -> sqlite3.Connection:
+        # check_same_thread=False, damit close_all() aufräumen kann; genutzt
+        # wird jede Verbindung trotzdem nur von ihrem eigenen Thread
+        connection = sqlite3.connect(
+            self.db_path,
+            cached_statements=SQLITE_CACHED_STATEMENTS,
+            check_same_thread=False,
+            factory=_PooledConnection,
+        )
         connection.row_factory = sqlite3.Row
+        # Nur für Migrationen; Trigger und Views dürfen sie nicht verwenden,
+        # sonst scheitern Schreibzugriffe anderer SQLite-Clients
+        connection.create_function(
+            "compress_text", 1, compress_text, deterministic=True
+        )
+        for pragma, value in SQLITE_PRAGMAS.items():
+            connection.execute(f"PRAGMA {pragma} = {value}")
+        if metrics.METRICS_ENABLED:
+            metrics.inc("db_connections_opened_total")
+            connection.set_trace_callback(metrics.count_statement)
+        return connection
+
+    def get_connection(self) -> sqlite3.Connection:
+        # Verbindung des aktuellen Threads wiederverwenden. Nach einem fork
+        # (z.B. Celery prefork) darf die geerbte Verbindung nicht genutzt werden.
+        if self._pid != os.getpid():
+            self._local = threading.local()
+            self._connections = weakref.WeakValueDictionary()
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._open_connection()
+            self._local.connection = connection
+            with self._lock:
+                self._connections[threading.get_ident()] = connection
         return connection
 
     def close_connection(self, connection):
-        # Schließe die übergebene Verbindung
-        if connection:
+        # Verbindung bleibt im Pool, offene Transaktionen werden verworfen
+        if connection and connection.in_transaction:
+            connection.rollback()
+
+    def close_all(self):
+        """Schließt alle gepoolten Verbindungen dieses Prozesses."""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections = weakref.WeakValueDictionary()
+        for connection in connections:
             connection.close()
+        self._local = threading.local()
 
     def initialize_db(self):
         """Erstellt die Datenbanktabellen, falls sie nicht existieren."""
@@ -66,9 +539,28 @@ class Database:
             """)
 
             conn.commit()
+
+            self._migrate(conn)
         finally:
             self.close_connection(conn)
 
+    def _migrate(self, conn: sqlite3.Connection):
+        """Bringt das Schema bestehender Datenbankdateien auf den neuesten Stand."""
+        # IMMEDIATE, damit API und Worker nicht gleichzeitig migrieren
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, statements in enumerate(
+                MIGRATIONS[version:], start=version + 1
+            ):
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
     # Meeting CRUD Operationen
     def create_meeting(self, meeting: MeetingCreate) -> Meeting:
         """Erstellt ein neues Meeting in der Datenbank."""
@@ -82,6 +574,7 @@ class Database:
                 """
             INSERT INTO meetings (title, date, link, status, created_at, updated_at)
             VALUES (?, ?, ?, ?, ?, ?)
+            RETURNING *
             """,
                 (
                     meeting.title,
@@ -92,11 +585,12 @@ class Database:
                     now,
                 ),
             )
+            row = cursor.fetchone()
+            self._reindex_meeting(cursor, row["id"], None, (row["title"], None))
 
             conn.commit()
-            meeting_id = cursor.lastrowid
 
-            return self.get_meeting(meeting_id)
+            return self._row_to_meeting(row)
         finally:
             self.close_connection(conn)
 
@@ -112,55 +606,348 @@ class Database:
             if not row:
                 return None
 
-            return Meeting(
-                id=row["id"],
-                title=row["title"],
-                date=datetime.fromisoformat(row["date"]),
-                link=row["link"],
-                audio_file=row["audio_file"],
-                transcript=row["transcript"],
-                status=TranscriptionStatus(row["status"]),
-                created_at=datetime.fromisoformat(row["created_at"]),
-                updated_at=datetime.fromisoformat(row["updated_at"]),
+            return self._row_to_meeting(row)
+        finally:
+            self.close_connection(conn)
+
+    def get_meeting_version(self, meeting_id: int) -> Optional[str]:
+        """updated_at eines Meetings, ohne die Zeile zu laden; None, wenn es fehlt."""
+        conn = self.get_connection()
+        try:
+            row = conn.execute(
+                "SELECT updated_at FROM meetings WHERE id = ?", (meeting_id,)
+            ).fetchone()
+            return row["updated_at"] if row else None
+        finally:
+            self.close_connection(conn)
+
+    def get_data_versions(self) -> Dict[str, int]:
+        """Änderungszähler je Tabelle, bei jedem Schreibzugriff per Trigger erhöht."""
+        conn = self.get_connection()
+        try:
+            return {
+                row["scope"]: row["version"]
+                for row in conn.execute("SELECT scope, version FROM data_versions")
+            }
+        finally:
+            self.close_connection(conn)
+
+    def get_meeting_summary(self, meeting_id: int) -> Optional[MeetingSummary]:
+        """Holt ein Meeting ohne Transkript anhand seiner ID."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+
+            cursor.execute(
+                f"SELECT {MEETING_SUMMARY_COLUMNS} FROM meetings WHERE id = ?",
+                (meeting_id,),
             )
+            row = cursor.fetchone()
+
+            if not row:
+                return None
+
+            return self._row_to_summary(row)
         finally:
             self.close_connection(conn)
 
-    def get_all_meetings(self) -> List[Meeting]:
-        """Holt alle Meetings aus der Datenbank."""
+    def get_all_meetings(self) -> List[MeetingSummary]:
+        """Holt alle Meetings (ohne Transkript) aus der Datenbank."""
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
 
-            cursor.execute("SELECT * FROM meetings ORDER BY date DESC")
+            cursor.execute(
+                f"SELECT {MEETING_SUMMARY_COLUMNS} FROM meetings ORDER BY date DESC"
+            )
             rows = cursor.fetchall()
 
-            return [
-                Meeting(
-                    id=row["id"],
-                    title=row["title"],
-                    date=datetime.fromisoformat(row["date"]),
-                    link=row["link"],
-                    audio_file=row["audio_file"],
-                    transcript=row["transcript"],
-                    status=TranscriptionStatus(row["status"]),
-                    created_at=datetime.fromisoformat(row["created_at"]),
-                    updated_at=datetime.fromisoformat(row["updated_at"]),
-                )
-                for row in rows
-            ]
+            return [self._row_to_summary(row) for row in rows]
+        finally:
+            self.close_connection(conn)
+
+    def list_meetings(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        status: Optional[TranscriptionStatus] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> MeetingPage:
+        """Holt eine Seite Meetings (neueste zuerst) per Keyset-Pagination."""
+        where, params = self._range_filter("date", status, date_from, date_to)
+        if cursor:
+            where.append("(date, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = f"SELECT {MEETING_SUMMARY_COLUMNS} FROM meetings"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY date DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(query, params).fetchall()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1]["date"], rows[-1]["id"])
+
+            return MeetingPage(
+                items=[self._row_to_summary(row) for row in rows],
+                next_cursor=next_cursor,
+            )
+        finally:
+            self.close_connection(conn)
+
+    def search_meetings(
+        self,
+        query: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> SearchPage:
+        """
+        Durchsucht Titel und Transkripte, beste Treffer (BM25) zuerst.
+
+        Wirft ValueError bei leerer Anfrage oder ungültigem Cursor.
+        """
+        where = ["meetings_fts MATCH ?"]
+        params: List[Any] = [build_search_query(query)]
+        if cursor:
+            score, row_id = decode_cursor(cursor)
+            where.append("(rank, meetings_fts.rowid) > (?, ?)")
+            params.extend((float(score), row_id))
+
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        params.append(limit + 1)
+
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT m.id, m.title, m.date, m.status, hits.score
+                FROM (
+                    SELECT rowid AS id, rank AS score
+                    FROM meetings_fts
+                    WHERE {" AND ".join(where)}
+                    ORDER BY rank, rowid
+                    LIMIT ?
+                ) AS hits
+                JOIN meetings m ON m.id = hits.id
+                ORDER BY hits.score, hits.id
+                """,
+                params,
+            ).fetchall()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1]["score"], rows[-1]["id"])
+
+            snippets = self._search_snippets(conn, rows, params[0])
+            return SearchPage(
+                items=[
+                    self._row_to_search_result(row, snippets.get(row["id"]))
+                    for row in rows
+                ],
+                next_cursor=next_cursor,
+            )
+        finally:
+            self.close_connection(conn)
+
+    @staticmethod
+    def _search_snippets(
+        conn: sqlite3.Connection, rows: List[sqlite3.Row], match: str
+    ) -> Dict[int, str]:
+        """
+        Erzeugt die Textausschnitte für eine Seite Suchtreffer.
+
+        meetings_fts speichert keinen Text, snippet() braucht ihn aber. Die
+        Transkripte der Seite werden deshalb entpackt und in eine temporäre
+        FTS5-Tabelle mit demselben Tokenizer geladen, die danach wieder leer
+        ist.
+        """
+        if not rows:
+            return {}
+        ids = [row["id"] for row in rows]
+        transcripts: Dict[int, List[str]] = {}
+        for block in conn.execute(
+            f"""
+            SELECT meeting_id, data FROM transcript_segments
+            WHERE meeting_id IN ({", ".join("?" * len(ids))})
+            ORDER BY meeting_id, seq
+            """,
+            ids,
+        ):
+            transcripts.setdefault(block["meeting_id"], []).append(
+                decompress_text(block["data"])
+            )
+
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS temp.search_snippets USING fts5(
+                title, transcript,
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """
+        )
+        try:
+            conn.executemany(
+                """
+                INSERT INTO temp.search_snippets (rowid, title, transcript)
+                VALUES (?, ?, ?)
+                """,
+                [
+                    (
+                        row["id"],
+                        row["title"],
+                        "\n".join(transcripts[row["id"]])
+                        if row["id"] in transcripts
+                        else None,
+                    )
+                    for row in rows
+                ],
+            )
+            return dict(
+                conn.execute(
+                    """
+                    SELECT rowid, snippet(search_snippets, -1, ?, ?, '…', ?)
+                    FROM temp.search_snippets
+                    WHERE search_snippets MATCH ?
+                    """,
+                    (_MATCH_START, _MATCH_END, SEARCH_SNIPPET_TOKENS, match),
+                ).fetchall()
+            )
+        finally:
+            conn.execute("DELETE FROM temp.search_snippets")
+            conn.commit()
+
+    def get_meetings_watermark(self) -> Optional[str]:
+        """Größtes updated_at aller Meetings, Obergrenze eines Exports."""
+        conn = self.get_connection()
+        try:
+            return conn.execute("SELECT MAX(updated_at) FROM meetings").fetchone()[0]
+        finally:
+            self.close_connection(conn)
+
+    def iter_meetings_for_export(
+        self, since: Optional[str] = None, until: Optional[str] = None
+    ) -> Iterator[Meeting]:
+        """
+        Liefert Meetings nach updated_at sortiert, chargenweise gelesen.
+
+        Wie bei iter_transcript_segments holt jede Charge eine eigene Abfrage,
+        der Generator hält keine Verbindung und keine Lesetransaktion fest.
+
+        Args:
+            since: Nur Meetings mit updated_at danach (Wasserstand des letzten
+                Exports)
+            until: Nur Meetings mit updated_at bis einschließlich hier; später
+                geänderte kommen im nächsten Export
+        """
+        # Mit der größtmöglichen ID: Meetings genau auf dem Wasserstand waren
+        # schon im letzten Export
+        position = (since or "", 2**63 - 1)
+        while True:
+            conn = self.get_connection()
+            try:
+                rows = conn.execute(
+                    """
+                SELECT * FROM meetings
+                WHERE (updated_at, id) > (?, ?) AND updated_at <= ?
+                ORDER BY updated_at, id LIMIT ?
+                """,
+                    (*position, until or "9999", EXPORT_FETCH_BATCH),
+                ).fetchall()
+            finally:
+                self.close_connection(conn)
+
+            for row in rows:
+                yield self._row_to_meeting(row)
+            if len(rows) < EXPORT_FETCH_BATCH:
+                return
+            position = (rows[-1]["updated_at"], rows[-1]["id"])
+
+    def get_transcript(self, meeting_id: int) -> Optional[str]:
+        """Holt nur den Transkript-Text eines Meetings."""
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(
+                "SELECT data FROM transcript_segments WHERE meeting_id = ? ORDER BY seq",
+                (meeting_id,),
+            ).fetchall()
+
+            if not rows:
+                return None
+
+            return "\n".join(decompress_text(row["data"]) for row in rows)
         finally:
             self.close_connection(conn)
 
+    def iter_transcript_segments(
+        self,
+        meeting_id: int,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        seq: Optional[int] = None,
+    ) -> Iterator[TranscriptSegment]:
+        """
+        Liefert die Blöcke eines Transkripts der Reihe nach, entpackt.
+
+        Mit start/end nur Blöcke, die sich mit dem Zeitbereich (Sekunden)
+        überschneiden; Blöcke ohne Zeitangaben werden immer geliefert. Mit seq
+        nur dieser eine Block. Jede Charge wird mit einer eigenen Abfrage
+        geholt, damit der Generator auch über Threads hinweg (StreamingResponse)
+        keine Verbindung festhält.
+        """
+        where = ["meeting_id = ?", "seq > ?"]
+        params: List[Any] = [meeting_id]
+        if start is not None:
+            where.append("(end IS NULL OR end > ?)")
+            params.append(start)
+        if end is not None:
+            where.append("(start IS NULL OR start < ?)")
+            params.append(end)
+        if seq is not None:
+            where.append("seq = ?")
+            params.append(seq)
+        query = f"""
+            SELECT seq, start, end, data, cues FROM transcript_segments
+            WHERE {" AND ".join(where)}
+            ORDER BY seq LIMIT ?
+        """
+
+        last_seq = -1
+        while True:
+            conn = self.get_connection()
+            try:
+                rows = conn.execute(
+                    query,
+                    [meeting_id, last_seq, *params[1:], TRANSCRIPT_FETCH_BATCH],
+                ).fetchall()
+            finally:
+                self.close_connection(conn)
+
+            for row in rows:
+                text = decompress_text(row["data"])
+                yield TranscriptSegment(
+                    seq=row["seq"],
+                    start=row["start"],
+                    end=row["end"],
+                    text=text,
+                    cues=decode_cues(row["cues"], text),
+                )
+            if len(rows) < TRANSCRIPT_FETCH_BATCH:
+                return
+            last_seq = rows[-1]["seq"]
+
     def update_meeting(
         self, meeting_id: int, meeting_update: MeetingUpdate
     ) -> Optional[Meeting]:
         """Aktualisiert ein bestehendes Meeting."""
-        # Aktuelles Meeting holen
-        current_meeting = self.get_meeting(meeting_id)
-        if not current_meeting:
-            return None
-
         # Update-Werte vorbereiten
         update_data = {}
         update_fields = []
@@ -181,17 +968,17 @@ class Database:
             update_data["audio_file"] = meeting_update.audio_file
             update_fields.append("audio_file = :audio_file")
 
-        if meeting_update.transcript is not None:
-            update_data["transcript"] = meeting_update.transcript
-            update_fields.append("transcript = :transcript")
+        if meeting_update.audio_sha256 is not None:
+            update_data["audio_sha256"] = meeting_update.audio_sha256
+            update_fields.append("audio_sha256 = :audio_sha256")
 
         if meeting_update.status is not None:
             update_data["status"] = meeting_update.status.value
             update_fields.append("status = :status")
 
         # Wenn keine Änderungen, aktuelles Meeting zurückgeben
-        if not update_fields:
-            return current_meeting
+        if not update_fields and meeting_update.transcript is None:
+            return self.get_meeting(meeting_id)
 
         # Updated_at immer aktualisieren
         update_data["updated_at"] = datetime.now().isoformat()
@@ -202,172 +989,1319 @@ class Database:
         try:
             cursor = conn.cursor()
 
+            # Der Suchindex braucht zum Entfernen die bisher indizierten Werte.
+            # Schreibsperre schon vor dem Lesen, sonst können sie sich bis zum
+            # UPDATE noch ändern.
+            indexed = None
+            if (
+                meeting_update.title is not None
+                or meeting_update.transcript is not None
+            ):
+                conn.execute("BEGIN IMMEDIATE")
+                indexed = self._indexed_text(cursor, meeting_id)
+
             update_data["id"] = meeting_id
-            query = f"UPDATE meetings SET {', '.join(update_fields)} WHERE id = :id"
+            query = (
+                f"UPDATE meetings SET {', '.join(update_fields)} "
+                "WHERE id = :id RETURNING *"
+            )
 
             cursor.execute(query, update_data)
+            row = cursor.fetchone()
+            if row and meeting_update.transcript is not None:
+                self._store_transcript(
+                    cursor, meeting_id, meeting_update.transcript, indexed=indexed
+                )
+            elif row and indexed is not None and indexed[0] != row["title"]:
+                self._reindex_meeting(
+                    cursor, meeting_id, indexed, (row["title"], indexed[1])
+                )
             conn.commit()
 
-            return self.get_meeting(meeting_id)
+            if not row:
+                return None
+
+            return self._row_to_meeting(row)
         finally:
             self.close_connection(conn)
 
-    def delete_meeting(self, meeting_id: int) -> bool:
-        """Löscht ein Meeting aus der Datenbank."""
-        # Prüfen, ob Meeting existiert
-        if not self.get_meeting(meeting_id):
-            return False
+    def delete_meeting(self, meeting_id: int) -> Optional[List[UploadSession]]:
+        """
+        Löscht ein Meeting samt Jobs, Transkript und offenen Upload-Sitzungen.
 
+        Returns:
+            Die gelöschten Upload-Sitzungen (ihre Teildateien räumt der
+            Aufrufer weg), None wenn das Meeting nicht existiert
+        """
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
 
-            # Zuerst zugehörige Transcription Jobs löschen
+            # Zuerst zugehörige Transcription Jobs und Upload-Sitzungen löschen
             cursor.execute(
                 "DELETE FROM transcription_jobs WHERE meeting_id = ?", (meeting_id,)
             )
+            cursor.execute(
+                "DELETE FROM upload_sessions WHERE meeting_id = ? RETURNING *",
+                (meeting_id,),
+            )
+            sessions = [self._row_to_upload_session(row) for row in cursor.fetchall()]
+
+            # Aus dem Suchindex entfernen, solange Titel und Transkript noch da sind
+            self._reindex_meeting(
+                cursor, meeting_id, self._indexed_text(cursor, meeting_id), None
+            )
+
+            # Dann das Meeting löschen und die Audio-Referenz freigeben
+            cursor.execute(
+                "DELETE FROM meetings WHERE id = ? RETURNING audio_sha256",
+                (meeting_id,),
+            )
+            row = cursor.fetchone()
+            deleted = row is not None
+            if deleted and row["audio_sha256"]:
+                self._release_audio_blob(cursor, row["audio_sha256"])
 
-            # Dann das Meeting löschen
-            cursor.execute("DELETE FROM meetings WHERE id = ?", (meeting_id,))
+            # Transkriptblöcke
+            cursor.execute(
+                "DELETE FROM transcript_segments WHERE meeting_id = ?", (meeting_id,)
+            )
             conn.commit()
 
-            return True
+            return sessions if deleted else None
         finally:
             self.close_connection(conn)
 
-    # Transcription Job Operationen
-    def create_transcription_job(
-        self, meeting_id: int, job_id: str
-    ) -> TranscriptionJob:
-        """Erstellt einen neuen Transcription Job."""
+    # Audio-Speicher
+    def attach_audio(
+        self, meeting_id: int, audio_file: str, audio_sha256: str, size: int
+    ) -> Optional[Meeting]:
+        """Ordnet einem Meeting eine gespeicherte Audiodatei zu (mit Referenzzählung)."""
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
 
             now = datetime.now().isoformat()
+            cursor.execute(
+                "SELECT audio_sha256 FROM meetings WHERE id = ?", (meeting_id,)
+            )
+            current = cursor.fetchone()
+            if not current:
+                return None
+
+            # Referenzen nur ändern, wenn sich der Inhalt tatsächlich ändert
+            if current["audio_sha256"] != audio_sha256:
+                cursor.execute(
+                    """
+                INSERT INTO audio_blobs (sha256, path, size, ref_count, created_at, updated_at)
+                VALUES (?, ?, ?, 1, ?, ?)
+                ON CONFLICT (sha256) DO UPDATE SET
+                    ref_count = ref_count + 1, updated_at = excluded.updated_at
+                """,
+                    (audio_sha256, audio_file, size, now, now),
+                )
+                if current["audio_sha256"]:
+                    self._release_audio_blob(cursor, current["audio_sha256"])
 
             cursor.execute(
                 """
-            INSERT INTO transcription_jobs (meeting_id, job_id, status, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?)
+            UPDATE meetings SET audio_file = ?, audio_sha256 = ?, updated_at = ?
+            WHERE id = ?
+            RETURNING *
             """,
-                (meeting_id, job_id, TranscriptionStatus.PENDING.value, now, now),
+                (audio_file, audio_sha256, now, meeting_id),
             )
-
+            row = cursor.fetchone()
             conn.commit()
-            job_db_id = cursor.lastrowid
 
-            # Meeting-Status aktualisieren
-            self.update_meeting(
-                meeting_id, MeetingUpdate(status=TranscriptionStatus.PENDING)
-            )
+            return self._row_to_meeting(row)
+        finally:
+            self.close_connection(conn)
 
-            return TranscriptionJob(
-                id=job_db_id,
-                meeting_id=meeting_id,
-                job_id=job_id,
-                status=TranscriptionStatus.PENDING,
-                created_at=datetime.fromisoformat(now),
-                updated_at=datetime.fromisoformat(now),
+    def register_audio_blobs(self, blobs: List[Tuple[str, str, int]]):
+        """
+        Trägt Blobs (SHA-256, Pfad, Größe) ein, bevor sie gespeichert werden.
+
+        Noch ohne Referenz; ihr Alter zählt ab jetzt (updated_at), nicht ab der
+        mtime der Datei, die bei Hardlinks die des Originals ist. Übernimmt kein
+        Meeting den Blob, löscht cleanup_audio_files ihn nach Ablauf der Frist.
+        """
+        conn = self.get_connection()
+        try:
+            now = datetime.now().isoformat()
+            conn.executemany(
+                """
+            INSERT INTO audio_blobs (sha256, path, size, ref_count, created_at, updated_at)
+            VALUES (?, ?, ?, 0, ?, ?)
+            ON CONFLICT (sha256) DO UPDATE SET updated_at = excluded.updated_at
+            """,
+                [(sha256, path, size, now, now) for sha256, path, size in blobs],
             )
+            conn.commit()
         finally:
             self.close_connection(conn)
 
-    def get_transcription_job(self, job_id: str) -> Optional[TranscriptionJob]:
-        """Holt einen Transcription Job anhand seiner Job-ID."""
+    def delete_unreferenced_audio_blobs(self, older_than: datetime) -> List[str]:
+        """Löscht nicht mehr referenzierte Audio-Blobs und gibt deren Pfade zurück."""
         conn = self.get_connection()
         try:
-            cursor = conn.cursor()
+            rows = conn.execute(
+                """
+            DELETE FROM audio_blobs WHERE ref_count <= 0 AND updated_at < ?
+            RETURNING path
+            """,
+                (older_than.isoformat(),),
+            ).fetchall()
+            conn.commit()
 
-            cursor.execute(
-                "SELECT * FROM transcription_jobs WHERE job_id = ?", (job_id,)
-            )
-            row = cursor.fetchone()
+            return [row["path"] for row in rows]
+        finally:
+            self.close_connection(conn)
+
+    def get_referenced_audio_files(self) -> Set[str]:
+        """Holt die Pfade aller Audiodateien, die noch verwendet werden."""
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(
+                """
+            SELECT audio_file AS path FROM meetings WHERE audio_file IS NOT NULL
+            UNION
+            SELECT path FROM audio_blobs
+            """
+            ).fetchall()
+
+            return {row["path"] for row in rows}
+        finally:
+            self.close_connection(conn)
+
+    # Transkript-Cache
+    def get_cached_transcript(
+        self, audio_sha256: str, model: str, language: str
+    ) -> Optional[List[TranscriptSegment]]:
+        """
+        Holt ein bereits erstelltes Transkript für denselben Audio-Inhalt.
+
+        Returns:
+            Blöcke des Transkripts; ältere Einträge ohne Zeitangaben
+        """
+        conn = self.get_connection()
+        try:
+            row = conn.execute(
+                """
+            SELECT transcript, segments FROM transcript_cache
+            WHERE audio_sha256 = ? AND model = ? AND language = ?
+            """,
+                (audio_sha256, model, language),
+            ).fetchone()
 
             if not row:
                 return None
+            if row["segments"] is None:
+                return split_transcript(decompress_text(row["transcript"]))
+            return [
+                TranscriptSegment(**segment)
+                for segment in json.loads(decompress_text(row["segments"]))
+            ]
+        finally:
+            self.close_connection(conn)
 
-            return TranscriptionJob(
-                id=row["id"],
-                meeting_id=row["meeting_id"],
-                job_id=row["job_id"],
-                status=TranscriptionStatus(row["status"]),
-                created_at=datetime.fromisoformat(row["created_at"]),
-                updated_at=datetime.fromisoformat(row["updated_at"]),
+    def cache_transcript(
+        self,
+        audio_sha256: str,
+        model: str,
+        language: str,
+        segments: List[TranscriptSegment],
+    ):
+        """Merkt sich ein Transkript für spätere Uploads desselben Inhalts."""
+        conn = self.get_connection()
+        try:
+            conn.execute(
+                """
+            INSERT OR REPLACE INTO transcript_cache
+                (audio_sha256, model, language, transcript, segments, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    audio_sha256,
+                    model,
+                    language,
+                    compress_text("\n".join(segment.text for segment in segments)),
+                    compress_text(
+                        json.dumps([segment.model_dump() for segment in segments])
+                    ),
+                    datetime.now().isoformat(),
+                ),
             )
+            conn.commit()
         finally:
             self.close_connection(conn)
 
-    def update_transcription_job_status(
-        self, job_id: str, status: TranscriptionStatus
-    ) -> Optional[TranscriptionJob]:
-        """Aktualisiert den Status eines Transcription Jobs."""
+    # Transcription Job Operationen
+    def create_transcription_job(
+        self,
+        meeting_id: int,
+        job_id: str,
+        queue: Optional[str] = None,
+        submitter: Optional[str] = None,
+        audio_seconds: Optional[float] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> TranscriptionJob:
+        """
+        Erstellt einen neuen Transcription Job, sofern es noch keinen gibt.
+
+        Die Priorität ist die Zahl der noch offenen Jobs desselben Einreichers
+        (höchstens MAX_JOB_PRIORITY): Der erste Job jedes Einreichers kommt vor
+        dem zwanzigsten eines anderen.
+
+        Ist für die aktuelle Audiodatei des Meetings schon ein Job offen oder
+        wurde der Idempotency-Key schon für einen nicht fehlgeschlagenen Job
+        verwendet, wird stattdessen dieser Job zurückgegeben (erkennbar an der
+        abweichenden job_id). Die UNIQUE-Indizes machen das auch bei
+        gleichzeitigen Anfragen aus mehreren Prozessen eindeutig.
+        """
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
 
-            # Job holen
+            now = datetime.now().isoformat()
+            active = [status.value for status in ACTIVE_JOB_STATUSES]
+
+            # Prüfsumme im selben Statement lesen, damit ein paralleler Upload
+            # nicht dazwischen kommt
             cursor.execute(
-                "SELECT * FROM transcription_jobs WHERE job_id = ?", (job_id,)
+                """
+            INSERT INTO transcription_jobs (
+                meeting_id, job_id, status, queue, submitter, audio_seconds,
+                audio_sha256, idempotency_key, priority, created_at, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, (
+                SELECT audio_sha256 FROM meetings WHERE id = ?
+            ), ?, (
+                SELECT MIN(COUNT(*), ?) FROM transcription_jobs
+                WHERE submitter = ? AND status IN (?, ?)
+            ), ?, ?)
+            ON CONFLICT DO NOTHING
+            RETURNING *
+            """,
+                (
+                    meeting_id,
+                    job_id,
+                    TranscriptionStatus.PENDING.value,
+                    queue,
+                    submitter,
+                    audio_seconds,
+                    meeting_id,
+                    idempotency_key,
+                    MAX_JOB_PRIORITY,
+                    submitter,
+                    *active,
+                    now,
+                    now,
+                ),
             )
             row = cursor.fetchone()
 
-            if not row:
-                return None
+            if row:
+                # Meeting-Status in derselben Transaktion aktualisieren; wie
+                # bisher gilt das Meeting ab dem Einreichen als in Bearbeitung,
+                # die Seite bietet dann kein erneutes Starten mehr an
+                self._set_meeting_status(
+                    cursor, meeting_id, TranscriptionStatus.PROCESSING, now
+                )
+            else:
+                # Konflikt: den vorhandenen Job liefern, Treffer über den Key zuerst
+                cursor.execute(
+                    """
+                SELECT * FROM transcription_jobs
+                WHERE (idempotency_key = ? AND status != ?)
+                    OR (meeting_id = ? AND status IN (?, ?)
+                        AND IFNULL(audio_sha256, '') = IFNULL((
+                            SELECT audio_sha256 FROM meetings WHERE id = ?
+                        ), ''))
+                ORDER BY idempotency_key IS ? DESC
+                LIMIT 1
+                """,
+                    (
+                        idempotency_key,
+                        TranscriptionStatus.FAILED.value,
+                        meeting_id,
+                        *active,
+                        meeting_id,
+                        idempotency_key,
+                    ),
+                )
+                row = cursor.fetchone()
 
-            # Status aktualisieren
-            now = datetime.now().isoformat()
-            cursor.execute(
-                "UPDATE transcription_jobs SET status = ?, updated_at = ? WHERE job_id = ?",
-                (status.value, now, job_id),
-            )
             conn.commit()
 
-            # Meeting-Status auch aktualisieren
-            meeting_id = row["meeting_id"]
-            self.update_meeting(meeting_id, MeetingUpdate(status=status))
-
-            return TranscriptionJob(
-                id=row["id"],
-                meeting_id=meeting_id,
-                job_id=job_id,
-                status=status,
-                created_at=datetime.fromisoformat(row["created_at"]),
-                updated_at=datetime.fromisoformat(now),
-            )
+            return self._row_to_job(row)
         finally:
             self.close_connection(conn)
 
-    def get_all_transcription_jobs(self) -> List[TranscriptionJob]:
-        """Holt alle Transcription Jobs aus der Datenbank."""
+    def get_transcription_job(self, job_id: str) -> Optional[TranscriptionJob]:
+        """Holt einen Transcription Job anhand seiner Job-ID."""
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
 
-            cursor.execute("SELECT * FROM transcription_jobs ORDER BY created_at DESC")
-            rows = cursor.fetchall()
+            cursor.execute(
+                "SELECT * FROM transcription_jobs WHERE job_id = ?", (job_id,)
+            )
+            row = cursor.fetchone()
 
-            return [
-                TranscriptionJob(
-                    id=row["id"],
-                    meeting_id=row["meeting_id"],
-                    job_id=row["job_id"],
-                    status=TranscriptionStatus(row["status"]),
-                    created_at=datetime.fromisoformat(row["created_at"]),
-                    updated_at=datetime.fromisoformat(row["updated_at"]),
+            if not row:
+                return None
+
+            return self._row_to_job(row)
+        finally:
+            self.close_connection(conn)
+
+    def update_transcription_job_status(
+        self, job_id: str, status: TranscriptionStatus
+    ) -> Optional[TranscriptionJob]:
+        """
+        Aktualisiert den Status eines offenen Transcription Jobs.
+
+        Returns:
+            Den geänderten Job, None wenn der Job unbekannt oder schon
+            abgeschlossen ist (dann bleibt alles unverändert)
+        """
+        return self._finish_transcription_job(job_id, status)
+
+    def complete_transcription_job(
+        self,
+        job_id: str,
+        transcript: Optional[str],
+        asr_bytes: Optional[int] = None,
+        latency_seconds: Optional[float] = None,
+        segments: Optional[List[TranscriptSegment]] = None,
+    ) -> Optional[TranscriptionJob]:
+        """
+        Speichert das Transkript und schließt den Job in einer Transaktion ab.
+
+        Returns:
+            Den abgeschlossenen Job, None wenn der Job unbekannt oder schon
+            abgeschlossen ist (dann wird nichts gespeichert)
+        """
+        return self._finish_transcription_job(
+            job_id,
+            TranscriptionStatus.COMPLETED,
+            transcript,
+            asr_bytes,
+            latency_seconds,
+            segments,
+        )
+
+    def _finish_transcription_job(
+        self,
+        job_id: str,
+        status: TranscriptionStatus,
+        transcript: Optional[str] = None,
+        asr_bytes: Optional[int] = None,
+        latency_seconds: Optional[float] = None,
+        segments: Optional[List[TranscriptSegment]] = None,
+    ) -> Optional[TranscriptionJob]:
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+
+            # Nur offene Jobs ändern: abgeschlossene werden weder wieder geöffnet
+            # (sonst kollidieren sie mit einem neu eingereichten Job) noch von
+            # verspäteten oder doppelten Meldungen zwischen completed und failed
+            # umgeschaltet. Der erste Wechsel auf processing merkt sich den Start.
+            now = datetime.now().isoformat()
+            active = [status.value for status in ACTIVE_JOB_STATUSES]
+            cursor.execute(
+                """
+            UPDATE transcription_jobs SET status = ?, updated_at = ?,
+                asr_bytes = COALESCE(?, asr_bytes),
+                latency_seconds = COALESCE(?, latency_seconds),
+                started_at = COALESCE(started_at, CASE WHEN ? = ? THEN ? END)
+            WHERE job_id = ? AND status IN (?, ?)
+            RETURNING *
+            """,
+                (
+                    status.value,
+                    now,
+                    asr_bytes,
+                    latency_seconds,
+                    status.value,
+                    TranscriptionStatus.PROCESSING.value,
+                    now,
+                    job_id,
+                    *active,
+                ),
+            )
+            row = cursor.fetchone()
+
+            if not row:
+                return None
+
+            # Meeting-Status (und ggf. Transkript) atomar mitziehen
+            self._set_meeting_status(
+                cursor, row["meeting_id"], status, now, transcript, segments
+            )
+            conn.commit()
+
+            return self._row_to_job(row)
+        finally:
+            self.close_connection(conn)
+
+    def set_transcription_job_duration(
+        self, job_id: str, audio_seconds: float
+    ) -> Optional[TranscriptionJob]:
+        """Speichert die vom Worker gemessene Länge der zu transkribierenden Audiodatei."""
+        conn = self.get_connection()
+        try:
+            row = conn.execute(
+                """
+            UPDATE transcription_jobs SET audio_seconds = ?, updated_at = ?
+            WHERE job_id = ?
+            RETURNING *
+            """,
+                (audio_seconds, datetime.now().isoformat(), job_id),
+            ).fetchone()
+            conn.commit()
+
+            return self._row_to_job(row) if row else None
+        finally:
+            self.close_connection(conn)
+
+    def add_transcription_progress(
+        self, job_id: str, audio_seconds: float
+    ) -> Optional[TranscriptionJob]:
+        """
+        Zählt fertig transkribierte Audio-Sekunden eines laufenden Jobs hoch.
+
+        Das Inkrement geschieht in SQL, damit parallel fertig werdende Segmente
+        sich nicht gegenseitig überschreiben.
+        """
+        conn = self.get_connection()
+        try:
+            row = conn.execute(
+                """
+            UPDATE transcription_jobs
+            SET progress_seconds = COALESCE(progress_seconds, 0) + ?, updated_at = ?
+            WHERE job_id = ? AND status = ?
+            RETURNING *
+            """,
+                (
+                    audio_seconds,
+                    datetime.now().isoformat(),
+                    job_id,
+                    TranscriptionStatus.PROCESSING.value,
+                ),
+            ).fetchone()
+            conn.commit()
+
+            return self._row_to_job(row) if row else None
+        finally:
+            self.close_connection(conn)
+
+    def get_queue_backlog(self) -> Dict[str, Tuple[int, float]]:
+        """
+        Bestimmt für alle wartenden Jobs Position und Arbeit vor ihnen.
+
+        Die Reihenfolge innerhalb einer Queue entspricht der des Brokers
+        (Priorität, dann Einreihung). Der noch offene Teil laufender Jobs
+        derselben Queue zählt zur Arbeit davor.
+
+        Returns:
+            job_id -> (Position ab 1, Audio-Sekunden vor dem Job)
+        """
+        conn = self.get_connection()
+        try:
+            running = {
+                row["queue"]: row["seconds"]
+                for row in conn.execute(
+                    """
+                SELECT queue, COALESCE(SUM(
+                    MAX(audio_seconds - COALESCE(progress_seconds, 0), 0)
+                ), 0) AS seconds
+                FROM transcription_jobs WHERE status = ? GROUP BY queue
+                """,
+                    (TranscriptionStatus.PROCESSING.value,),
+                )
+            }
+            rows = conn.execute(
+                """
+            SELECT job_id, queue,
+                ROW_NUMBER() OVER queue_order AS position,
+                COALESCE(SUM(audio_seconds) OVER (
+                    queue_order ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                ), 0) AS seconds_ahead
+            FROM transcription_jobs
+            WHERE status = ?
+            WINDOW queue_order AS (
+                PARTITION BY queue ORDER BY priority, created_at, id
+            )
+            """,
+                (TranscriptionStatus.PENDING.value,),
+            ).fetchall()
+
+            return {
+                row["job_id"]: (
+                    row["position"],
+                    row["seconds_ahead"] + running.get(row["queue"], 0.0),
                 )
                 for row in rows
+            }
+        finally:
+            self.close_connection(conn)
+
+    def get_open_job_counts(self) -> Dict[Tuple[str, str], int]:
+        """Anzahl offener Jobs je (Queue, Status)."""
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(
+                """
+            SELECT IFNULL(queue, '') AS queue, status, COUNT(*) AS count
+            FROM transcription_jobs WHERE status IN (?, ?)
+            GROUP BY queue, status
+            """,
+                [status.value for status in ACTIVE_JOB_STATUSES],
+            ).fetchall()
+            return {(row["queue"], row["status"]): row["count"] for row in rows}
+        finally:
+            self.close_connection(conn)
+
+    def get_active_transcription_jobs(self) -> List[TranscriptionJob]:
+        """Holt alle Jobs, die noch nicht abgeschlossen sind."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.execute(
+                "SELECT * FROM transcription_jobs WHERE status IN (?, ?)",
+                [status.value for status in ACTIVE_JOB_STATUSES],
+            )
+            return [self._row_to_job(row) for row in cursor.fetchall()]
+        finally:
+            self.close_connection(conn)
+
+    def apply_transcription_job_statuses(
+        self, statuses: Dict[str, TranscriptionStatus]
+    ) -> List[TranscriptionJob]:
+        """
+        Übernimmt viele Statuswechsel von Jobs und ihren Meetings in einer Transaktion.
+
+        Nur noch offene Jobs werden geändert, damit veraltete Backend-Zustände ein
+        bereits abgeschlossenes Ergebnis nicht überschreiben.
+
+        Args:
+            statuses: Neuer Status je Job-ID
+
+        Returns:
+            Die tatsächlich geänderten Jobs
+        """
+        if not statuses:
+            return []
+
+        conn = self.get_connection()
+        try:
+            now = datetime.now().isoformat()
+            active = [status.value for status in ACTIVE_JOB_STATUSES]
+            params = [
+                (status.value, now, job_id, *active)
+                for job_id, status in statuses.items()
             ]
+
+            # Meetings zuerst, solange der alte Job-Status noch sichtbar ist
+            conn.executemany(
+                """
+            UPDATE meetings SET status = ?, updated_at = ?
+            WHERE id = (
+                SELECT meeting_id FROM transcription_jobs
+                WHERE job_id = ? AND status IN (?, ?)
+            )
+            """,
+                params,
+            )
+            # Wie beim direkten Statuswechsel merkt sich der erste Wechsel auf
+            # processing den Start, sonst fehlen Fortschritt und Schätzung
+            conn.executemany(
+                """
+            UPDATE transcription_jobs SET status = ?, updated_at = ?,
+                started_at = COALESCE(started_at, CASE WHEN ? = ? THEN ? END)
+            WHERE job_id = ? AND status IN (?, ?)
+            """,
+                [
+                    (
+                        status.value,
+                        now,
+                        status.value,
+                        TranscriptionStatus.PROCESSING.value,
+                        now,
+                        job_id,
+                        *active,
+                    )
+                    for job_id, status in statuses.items()
+                ],
+            )
+            cursor = conn.execute(
+                f"""
+            SELECT * FROM transcription_jobs
+            WHERE updated_at = ? AND job_id IN ({", ".join("?" * len(statuses))})
+            """,
+                (now, *statuses),
+            )
+            rows = cursor.fetchall()
+            conn.commit()
+
+            return [self._row_to_job(row) for row in rows]
+        finally:
+            self.close_connection(conn)
+
+    def get_all_transcription_jobs(self) -> List[TranscriptionJob]:
+        """Holt alle Transcription Jobs aus der Datenbank."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT * FROM transcription_jobs ORDER BY created_at DESC")
+            rows = cursor.fetchall()
+
+            return [self._row_to_job(row) for row in rows]
+        finally:
+            self.close_connection(conn)
+
+    def list_transcription_jobs(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        status: Optional[TranscriptionStatus] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> TranscriptionJobPage:
+        """Holt eine Seite Transcription Jobs (neueste zuerst) per Keyset-Pagination."""
+        where, params = self._range_filter("created_at", status, date_from, date_to)
+        if cursor:
+            where.append("(created_at, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = "SELECT * FROM transcription_jobs"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(query, params).fetchall()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+            return TranscriptionJobPage(
+                items=[self._row_to_job(row) for row in rows],
+                next_cursor=next_cursor,
+            )
         finally:
             self.close_connection(conn)
 
-    def save_transcript(self, meeting_id: int, transcript: str) -> Optional[Meeting]:
+    def save_transcript(
+        self,
+        meeting_id: int,
+        transcript: str,
+        segments: Optional[List[TranscriptSegment]] = None,
+    ) -> Optional[Meeting]:
         """Speichert ein Transkript für ein Meeting und aktualisiert den Status."""
-        return self.update_meeting(
-            meeting_id,
-            MeetingUpdate(transcript=transcript, status=TranscriptionStatus.COMPLETED),
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+
+            cursor.execute(
+                "UPDATE meetings SET status = ?, updated_at = ? WHERE id = ? RETURNING *",
+                (
+                    TranscriptionStatus.COMPLETED.value,
+                    datetime.now().isoformat(),
+                    meeting_id,
+                ),
+            )
+            row = cursor.fetchone()
+            if not row:
+                return None
+
+            self._store_transcript(cursor, meeting_id, transcript, segments)
+            conn.commit()
+
+            return self._row_to_meeting(row)
+        finally:
+            self.close_connection(conn)
+
+    # Archiv-Import
+    def _imported_audio(
+        self, conn: sqlite3.Connection, checksums: List[str]
+    ) -> Set[Tuple[str, str]]:
+        # (SHA-256, Datum) der Meetings mit einer dieser Audiodateien
+        checksums = sorted(set(checksums))
+        return {
+            (row["audio_sha256"], row["date"])
+            for row in conn.execute(
+                f"""
+            SELECT audio_sha256, date FROM meetings
+            WHERE audio_sha256 IN ({", ".join("?" * len(checksums))})
+            """,
+                checksums,
+            )
+        }
+
+    def get_imported_audio(self, checksums: List[str]) -> Set[Tuple[str, str]]:
+        """
+        Holt Audiodatei und Datum der Meetings mit einer dieser Prüfsummen.
+
+        Damit prüft der Import vor dem Speichern, welche Einträge import_meetings
+        ohnehin überspringen würde.
+
+        Returns:
+            Paare aus SHA-256 und Datum (ISO 8601)
+        """
+        if not checksums:
+            return set()
+
+        conn = self.get_connection()
+        try:
+            return self._imported_audio(conn, checksums)
+        finally:
+            self.close_connection(conn)
+
+    def import_meetings(
+        self,
+        meetings: List[MeetingImport],
+        transcribe: bool = True,
+        queue: Optional[str] = None,
+        submitter: Optional[str] = None,
+    ) -> Tuple[List[Optional[int]], List[TranscriptionJob]]:
+        """
+        Legt viele Meetings samt Audiodatei (und Jobs) in einer Transaktion an.
+
+        Meetings, deren Audiodatei mit demselben Datum schon existiert, werden
+        übersprungen, damit ein abgebrochener Import einfach wiederholt werden
+        kann. Die Jobs bekommen ihre Priorität wie bei create_transcription_job.
+
+        Args:
+            meetings: Zu importierende Meetings in Manifest-Reihenfolge
+            transcribe: Für jedes neue Meeting einen Transkriptionsjob anlegen
+            queue: Celery-Queue der Jobs
+            submitter: Einreicher der Jobs
+
+        Returns:
+            Tuple aus den IDs der neuen Meetings (None für übersprungene, in
+            Reihenfolge der Eingabe) und den angelegten Jobs
+        """
+        if not meetings:
+            return [], []
+
+        conn = self.get_connection()
+        try:
+            now = datetime.now().isoformat()
+            # Schreibsperre sofort nehmen: die IDs der Batch folgen dann
+            # lückenlos auf die bisher größte
+            conn.execute("BEGIN IMMEDIATE")
+
+            seen = self._imported_audio(
+                conn, [meeting.audio_sha256 for meeting in meetings]
+            )
+            new: List[MeetingImport] = []
+            is_new: List[bool] = []
+            for meeting in meetings:
+                key = (meeting.audio_sha256, meeting.date.isoformat())
+                is_new.append(key not in seen)
+                if key not in seen:
+                    seen.add(key)
+                    new.append(meeting)
+            if not new:
+                conn.commit()
+                return [None] * len(meetings), []
+
+            last_meeting_id = conn.execute(
+                "SELECT IFNULL(MAX(id), 0) FROM meetings"
+            ).fetchone()[0]
+            last_job_id = conn.execute(
+                "SELECT IFNULL(MAX(id), 0) FROM transcription_jobs"
+            ).fetchone()[0]
+
+            conn.executemany(
+                """
+            INSERT INTO audio_blobs (sha256, path, size, ref_count, created_at, updated_at)
+            VALUES (?, ?, ?, 1, ?, ?)
+            ON CONFLICT (sha256) DO UPDATE SET
+                ref_count = ref_count + 1, updated_at = excluded.updated_at
+            """,
+                [
+                    (
+                        meeting.audio_sha256,
+                        meeting.audio_file,
+                        meeting.audio_size,
+                        now,
+                        now,
+                    )
+                    for meeting in new
+                ],
+            )
+            conn.executemany(
+                """
+            INSERT INTO meetings (
+                title, date, link, audio_file, audio_sha256, status,
+                created_at, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                [
+                    (
+                        meeting.title,
+                        meeting.date.isoformat(),
+                        meeting.link,
+                        meeting.audio_file,
+                        meeting.audio_sha256,
+                        # Mit Job gleich in Bearbeitung, wie bei create_transcription_job
+                        (
+                            TranscriptionStatus.PROCESSING
+                            if transcribe
+                            else TranscriptionStatus.PENDING
+                        ).value,
+                        now,
+                        now,
+                    )
+                    for meeting in new
+                ],
+            )
+            inserted = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT id FROM meetings WHERE id > ? ORDER BY id",
+                    (last_meeting_id,),
+                ).fetchall()
+            ]
+            conn.executemany(
+                "INSERT INTO meetings_fts (rowid, title) VALUES (?, ?)",
+                [
+                    (meeting_id, meeting.title)
+                    for meeting_id, meeting in zip(inserted, new)
+                ],
+            )
+            new_ids = iter(inserted)
+            meeting_ids = [next(new_ids) if flag else None for flag in is_new]
+
+            jobs: List[TranscriptionJob] = []
+            if transcribe:
+                active = [status.value for status in ACTIVE_JOB_STATUSES]
+                conn.executemany(
+                    """
+                INSERT INTO transcription_jobs (
+                    meeting_id, job_id, status, queue, submitter, audio_sha256,
+                    priority, created_at, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, (
+                    SELECT MIN(COUNT(*), ?) FROM transcription_jobs
+                    WHERE submitter = ? AND status IN (?, ?)
+                ), ?, ?)
+                """,
+                    [
+                        (
+                            meeting_id,
+                            str(uuid.uuid4()),
+                            TranscriptionStatus.PENDING.value,
+                            queue,
+                            submitter,
+                            meeting.audio_sha256,
+                            MAX_JOB_PRIORITY,
+                            submitter,
+                            *active,
+                            now,
+                            now,
+                        )
+                        for meeting_id, meeting in zip(
+                            [i for i in meeting_ids if i is not None], new
+                        )
+                    ],
+                )
+                jobs = [
+                    self._row_to_job(row)
+                    for row in conn.execute(
+                        "SELECT * FROM transcription_jobs WHERE id > ? ORDER BY id",
+                        (last_job_id,),
+                    ).fetchall()
+                ]
+            conn.commit()
+
+            return meeting_ids, jobs
+        finally:
+            self.close_connection(conn)
+
+    # Upload-Sitzungen
+    def create_upload_session(
+        self, meeting_id: int, filename: str, total_size: int, ttl: timedelta
+    ) -> UploadSession:
+        """Legt eine neue Sitzung für einen resumierbaren Upload an."""
+        conn = self.get_connection()
+        try:
+            now = datetime.now()
+            cursor = conn.execute(
+                """
+            INSERT INTO upload_sessions
+                (id, meeting_id, filename, total_size, created_at, updated_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            RETURNING *
+            """,
+                (
+                    uuid.uuid4().hex,
+                    meeting_id,
+                    filename,
+                    total_size,
+                    now.isoformat(),
+                    now.isoformat(),
+                    (now + ttl).isoformat(),
+                ),
+            )
+            row = cursor.fetchone()
+            conn.commit()
+
+            return self._row_to_upload_session(row)
+        finally:
+            self.close_connection(conn)
+
+    def get_upload_session(self, upload_id: str) -> Optional[UploadSession]:
+        """Holt eine Upload-Sitzung anhand ihrer ID."""
+        conn = self.get_connection()
+        try:
+            row = conn.execute(
+                "SELECT * FROM upload_sessions WHERE id = ?", (upload_id,)
+            ).fetchone()
+
+            if not row:
+                return None
+
+            return self._row_to_upload_session(row)
+        finally:
+            self.close_connection(conn)
+
+    def advance_upload_session(
+        self, upload_id: str, expected_offset: int, new_offset: int, ttl: timedelta
+    ) -> Optional[UploadSession]:
+        """
+        Setzt den bestätigten Offset einer Upload-Sitzung weiter.
+
+        Gibt None zurück, wenn die Sitzung nicht existiert oder inzwischen ein
+        anderer Request den Offset verändert hat.
+        """
+        conn = self.get_connection()
+        try:
+            now = datetime.now()
+            cursor = conn.execute(
+                """
+            UPDATE upload_sessions SET received = ?, updated_at = ?, expires_at = ?
+            WHERE id = ? AND received = ?
+            RETURNING *
+            """,
+                (
+                    new_offset,
+                    now.isoformat(),
+                    (now + ttl).isoformat(),
+                    upload_id,
+                    expected_offset,
+                ),
+            )
+            row = cursor.fetchone()
+            conn.commit()
+
+            if not row:
+                return None
+
+            return self._row_to_upload_session(row)
+        finally:
+            self.close_connection(conn)
+
+    def delete_upload_session(self, upload_id: str) -> bool:
+        """Löscht eine Upload-Sitzung."""
+        conn = self.get_connection()
+        try:
+            cursor = conn.execute(
+                "DELETE FROM upload_sessions WHERE id = ?", (upload_id,)
+            )
+            deleted = cursor.rowcount > 0
+            conn.commit()
+
+            return deleted
+        finally:
+            self.close_connection(conn)
+
+    def delete_expired_upload_sessions(self) -> List[UploadSession]:
+        """Löscht abgelaufene Upload-Sitzungen und gibt sie zurück."""
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(
+                "DELETE FROM upload_sessions WHERE expires_at < ? RETURNING *",
+                (datetime.now().isoformat(),),
+            ).fetchall()
+            conn.commit()
+
+            return [self._row_to_upload_session(row) for row in rows]
+        finally:
+            self.close_connection(conn)
+
+    # Hilfsfunktionen
+    @staticmethod
+    def _release_audio_blob(cursor: sqlite3.Cursor, audio_sha256: str):
+        cursor.execute(
+            """
+        UPDATE audio_blobs SET ref_count = ref_count - 1, updated_at = ?
+        WHERE sha256 = ?
+        """,
+            (datetime.now().isoformat(), audio_sha256),
+        )
+
+    @staticmethod
+    def _range_filter(
+        date_column: str,
+        status: Optional[TranscriptionStatus],
+        date_from: Optional[datetime],
+        date_to: Optional[datetime],
+    ) -> Tuple[List[str], List[Any]]:
+        where: List[str] = []
+        params: List[Any] = []
+        if status is not None:
+            where.append("status = ?")
+            params.append(status.value)
+        if date_from is not None:
+            where.append(f"{date_column} >= ?")
+            params.append(date_from.isoformat())
+        if date_to is not None:
+            where.append(f"{date_column} < ?")
+            params.append(date_to.isoformat())
+        return where, params
+
+    @staticmethod
+    def _set_meeting_status(
+        cursor: sqlite3.Cursor,
+        meeting_id: int,
+        status: TranscriptionStatus,
+        now: str,
+        transcript: Optional[str] = None,
+        segments: Optional[List[TranscriptSegment]] = None,
+    ):
+        cursor.execute(
+            "UPDATE meetings SET status = ?, updated_at = ? WHERE id = ?",
+            (status.value, now, meeting_id),
+        )
+        if transcript is not None:
+            Database._store_transcript(cursor, meeting_id, transcript, segments)
+
+    @staticmethod
+    def _store_transcript(
+        cursor: sqlite3.Cursor,
+        meeting_id: int,
+        transcript: str,
+        segments: Optional[List[TranscriptSegment]] = None,
+        indexed: Optional[Tuple[str, Optional[str]]] = None,
+    ):
+        # indexed: Werte im Suchindex vor der Änderung, falls der Aufrufer
+        # den Titel in derselben Transaktion schon geändert hat
+        if indexed is None:
+            indexed = Database._indexed_text(cursor, meeting_id)
+
+        # Ohne Zeitangaben das Transkript an Zeilenumbrüchen in Blöcke teilen
+        if segments is None:
+            segments = split_transcript(transcript)
+
+        # Mit Äußerungen ist der Text eines Blocks genau deren Texte, eine pro Zeile
+        texts = [
+            "\n".join(cue.text.replace("\n", " ") for cue in segment.cues)
+            if segment.cues
+            else segment.text
+            for segment in segments
+        ]
+        cursor.execute(
+            "DELETE FROM transcript_segments WHERE meeting_id = ?", (meeting_id,)
+        )
+        cursor.executemany(
+            """
+            INSERT INTO transcript_segments (meeting_id, seq, start, end, data, cues)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    meeting_id,
+                    seq,
+                    segment.start,
+                    segment.end,
+                    compress_text(text),
+                    encode_cues(segment.cues),
+                )
+                for seq, (segment, text) in enumerate(zip(segments, texts))
+            ],
+        )
+        # Suchindex mit dem Klartext, so wie get_transcript ihn zusammensetzt
+        title = cursor.execute(
+            "SELECT title FROM meetings WHERE id = ?", (meeting_id,)
+        ).fetchone()[0]
+        Database._reindex_meeting(
+            cursor, meeting_id, indexed, (title, "\n".join(texts) if texts else None)
+        )
+
+    @staticmethod
+    def _indexed_text(
+        cursor: sqlite3.Cursor, meeting_id: int
+    ) -> Optional[Tuple[str, Optional[str]]]:
+        """Titel und Transkript eines Meetings, wie sie im Suchindex stehen."""
+        row = cursor.execute(
+            "SELECT title FROM meetings WHERE id = ?", (meeting_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        blocks = cursor.execute(
+            "SELECT data FROM transcript_segments WHERE meeting_id = ? ORDER BY seq",
+            (meeting_id,),
+        ).fetchall()
+        transcript = (
+            "\n".join(decompress_text(block["data"]) for block in blocks)
+            if blocks
+            else None
+        )
+        return row["title"], transcript
+
+    @staticmethod
+    def _reindex_meeting(
+        cursor: sqlite3.Cursor,
+        meeting_id: int,
+        old: Optional[Tuple[str, Optional[str]]],
+        new: Optional[Tuple[str, Optional[str]]],
+    ):
+        """
+        Ersetzt die Einträge eines Meetings im Suchindex.
+
+        Der Index speichert keinen Text (contentless); zum Entfernen braucht
+        FTS5 genau die bisher indizierten Werte, sonst stimmen die Statistiken
+        nicht mehr. old und new sind (Titel, Transkript), None für "nicht
+        indiziert" bzw. "aus dem Index nehmen".
+        """
+        if old is not None:
+            cursor.execute(
+                """
+                INSERT INTO meetings_fts (meetings_fts, rowid, title, transcript)
+                VALUES ('delete', ?, ?, ?)
+                """,
+                (meeting_id, *old),
+            )
+        if new is not None:
+            cursor.execute(
+                "INSERT INTO meetings_fts (rowid, title, transcript) VALUES (?, ?, ?)",
+                (meeting_id, *new),
+            )
+
+    @staticmethod
+    def _row_to_meeting(row: sqlite3.Row) -> Meeting:
+        return Meeting(
+            id=row["id"],
+            title=row["title"],
+            date=datetime.fromisoformat(row["date"]),
+            link=row["link"],
+            audio_file=row["audio_file"],
+            audio_sha256=row["audio_sha256"],
+            status=TranscriptionStatus(row["status"]),
+            created_at=datetime.fromisoformat(row["created_at"]),
+            updated_at=datetime.fromisoformat(row["updated_at"]),
+        )
+
+    @staticmethod
+    def _row_to_summary(row: sqlite3.Row) -> MeetingSummary:
+        return MeetingSummary(
+            id=row["id"],
+            title=row["title"],
+            date=datetime.fromisoformat(row["date"]),
+            link=row["link"],
+            audio_file=row["audio_file"],
+            has_transcript=bool(row["has_transcript"]),
+            status=TranscriptionStatus(row["status"]),
+            created_at=datetime.fromisoformat(row["created_at"]),
+            updated_at=datetime.fromisoformat(row["updated_at"]),
         )
 
+    @staticmethod
+    def _row_to_search_result(
+        row: sqlite3.Row, snippet: Optional[str] = None
+    ) -> SearchResult:
+        return SearchResult(
+            id=row["id"],
+            title=row["title"],
+            date=datetime.fromisoformat(row["date"]),
+            status=TranscriptionStatus(row["status"]),
+            snippet=_highlight(snippet or ""),
+            score=row["score"],
+        )
+
+    @staticmethod
+    def _row_to_upload_session(row: sqlite3.Row) -> UploadSession:
+        return UploadSession(
+            id=row["id"],
+            meeting_id=row["meeting_id"],
+            filename=row["filename"],
+            total_size=row["total_size"],
+            received=row["received"],
+            created_at=datetime.fromisoformat(row["created_at"]),
+            updated_at=datetime.fromisoformat(row["updated_at"]),
+            expires_at=datetime.fromisoformat(row["expires_at"]),
+        )
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> TranscriptionJob:
+        return TranscriptionJob(
+            id=row["id"],
+            meeting_id=row["meeting_id"],
+            job_id=row["job_id"],
+            status=TranscriptionStatus(row["status"]),
+            asr_bytes=row["asr_bytes"],
+            latency_seconds=row["latency_seconds"],
+            queue=row["queue"],
+            submitter=row["submitter"],
+            priority=row["priority"],
+            audio_seconds=row["audio_seconds"],
+            audio_sha256=row["audio_sha256"],
+            idempotency_key=row["idempotency_key"],
+            started_at=(
+                datetime.fromisoformat(row["started_at"]) if row["started_at"] else None
+            ),
+            progress_seconds=row["progress_seconds"],
+            created_at=datetime.fromisoformat(row["created_at"]),
+            updated_at=datetime.fromisoformat(row["updated_at"]),
+        )
+
+
+# Dauer und Statements je Methode messen (nur mit METRICS_ENABLED)
+metrics.instrument_methods(
+    Database, exclude=("get_connection", "close_connection", "close_all")
+)
+
+
+class AsyncDatabase:
+    """
+    Asynchrone Fassade der Database für die FastAPI-Handler.
+
+    Jede Methode der Database ist hier als Coroutine verfügbar und läuft in
+    einem eigenen, begrenzten Thread-Pool. Warten auf SQLite-Sperren blockiert
+    so weder die Event-Loop noch den Threadpool, den Starlette für Uploads und
+    synchrone Handler braucht. Jeder Thread behält seine gepoolte Verbindung.
+    """
+
+    def __init__(self, database: Database, max_workers: int = DB_EXECUTOR_THREADS):
+        self._database = database
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="db"
+        )
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        method = getattr(self._database, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, functools.partial(method, *args, **kwargs)
+            )
+
+        return call
+
 
 # Singleton-Instanz für die Datenbank
 db = Database()
+# Dieselbe Datenbank für async-Handler
+adb = AsyncDatabase(db)
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+import redis
+import redis.asyncio
+
+from models import TranscriptionJob
+
+# Konfiguration
+redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+# Kanal, über den Worker und API Statusänderungen von Jobs verteilen
+QUEUE_UPDATES_CHANNEL = "queue-updates"
+# Nachrichten, die ein langsamer Client höchstens zurückliegen darf
+CLIENT_BUFFER_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+# Filter einer Live-Verbindung: bekommt die Nachricht, True = weitergeben
+UpdateFilter = Callable[[Dict[str, Any]], bool]
+
+_publisher: Optional[redis.Redis] = None
+
+
+def _redis() -> redis.Redis:
+    global _publisher
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(
+            redis_url, socket_timeout=1, socket_connect_timeout=1
+        )
+    return _publisher
+
+
+def _publish(message: Dict[str, Any]):
+    try:
+        _redis().publish(QUEUE_UPDATES_CHANNEL, json.dumps(message))
+    except redis.RedisError as e:
+        # Live-Updates sind optional; der Job-Status steht in der Datenbank
+        logger.warning(f"Could not publish queue update: {e}")
+
+
+def publish_job_update(job: Optional[TranscriptionJob], event: str = "updated"):
+    """Verteilt den aktuellen Stand eines Jobs ("created" oder "updated")."""
+    if job is not None:
+        _publish({"event": event, "job": job.model_dump(mode="json")})
+
+
+def publish_job_updates(jobs: List[TranscriptionJob], event: str = "updated"):
+    """Verteilt den Stand vieler Jobs in einem einzigen Redis-Roundtrip."""
+    if not jobs:
+        return
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        for job in jobs:
+            message = {"event": event, "job": job.model_dump(mode="json")}
+            pipe.publish(QUEUE_UPDATES_CHANNEL, json.dumps(message))
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish queue updates: {e}")
+
+
+class QueueUpdateHub:
+    """
+    Verteilt Nachrichten des Redis-Kanals an alle Live-Verbindungen eines Prozesses.
+
+    Pro Prozess gibt es genau ein Redis-Abonnement, und jede Nachricht wird nur
+    einmal gerendert, egal wie viele Dashboards verbunden sind.
+    """
+
+    def __init__(self, render: Callable[[Dict[str, Any]], str]):
+        self._render = render
+        # Warteschlange je Verbindung mit ihrem Filter (None: alle Nachrichten)
+        self._clients: Dict[asyncio.Queue, Optional[UpdateFilter]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, accepts: Optional[UpdateFilter] = None) -> asyncio.Queue:
+        """
+        Meldet eine Verbindung an.
+
+        Args:
+            accepts: Entscheidet je Nachricht, ob die Verbindung sie bekommt,
+                z.B. nach den Filtern der Ansicht
+        """
+        updates: asyncio.Queue = asyncio.Queue(maxsize=CLIENT_BUFFER_SIZE)
+        self._clients[updates] = accepts
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        return updates
+
+    def unsubscribe(self, updates: asyncio.Queue):
+        self._clients.pop(updates, None)
+
+    def _broadcast(self, update: Dict[str, Any], fragment: str):
+        for updates, accepts in list(self._clients.items()):
+            if accepts is not None and not accepts(update):
+                continue
+            try:
+                updates.put_nowait(fragment)
+            except asyncio.QueueFull:
+                # Client kommt nicht hinterher; er lädt die Seite beim
+                # Wiederverbinden ohnehin neu
+                logger.warning("Dropping slow queue update client")
+                self._clients.pop(updates, None)
+                updates.get_nowait()
+                updates.put_nowait(None)
+
+    async def _listen(self):
+        while True:
+            client = redis.asyncio.Redis.from_url(redis_url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(QUEUE_UPDATES_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        try:
+                            update = json.loads(message["data"])
+                            fragment = self._render(update)
+                        except (KeyError, ValueError) as e:
+                            logger.warning(f"Ignoring malformed queue update: {e}")
+                            continue
+                        self._broadcast(update, fragment)
+            except (redis.RedisError, OSError) as e:
+                logger.warning(f"Queue update subscription lost, reconnecting: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
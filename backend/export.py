@@ -0,0 +1,145 @@
+import csv
+import io
+import itertools
+import json
+import logging
+import os
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from database import db
+from models import Meeting
+from storage import UPLOAD_CHUNK_SIZE, data_dir
+from subtitles import iter_text
+
+# Content-Types der Exportformate
+EXPORT_MEDIA_TYPES = {
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "zip": "application/zip",
+}
+# Spalten des CSV-Exports, in dieser Reihenfolge
+EXPORT_FIELDS = (
+    "id",
+    "title",
+    "date",
+    "link",
+    "status",
+    "audio_file",
+    "audio_sha256",
+    "created_at",
+    "updated_at",
+    "transcript",
+)
+
+logger = logging.getLogger(__name__)
+
+
+def export_record(meeting: Meeting, transcript: Optional[str] = None) -> Dict[str, Any]:
+    """Felder eines Meetings für den Export, Zeitangaben als ISO 8601."""
+    record = meeting.model_dump(mode="json", include=set(EXPORT_FIELDS))
+    record["transcript"] = transcript
+    return record
+
+
+def iter_jsonl(meetings: Iterable[Meeting]) -> Iterator[str]:
+    """Ein JSON-Objekt pro Zeile und Meeting, mit Transkript."""
+    for meeting in meetings:
+        record = export_record(meeting, db.get_transcript(meeting.id))
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def iter_csv(meetings: Iterable[Meeting]) -> Iterator[str]:
+    """CSV mit Kopfzeile, eine Zeile pro Meeting, mit Transkript."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for meeting in meetings:
+        writer.writerow(export_record(meeting, db.get_transcript(meeting.id)))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+class _StreamBuffer(io.RawIOBase):
+    # Nimmt geschriebene Bytes nur bis zum nächsten take() auf. Nicht
+    # seekbar, daher schreibt zipfile die Größen in Data Descriptors.
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(
+    meetings: Iterable[Meeting], include_audio: bool = False
+) -> Iterator[bytes]:
+    """
+    Zip-Archiv mit einem Verzeichnis pro Meeting.
+
+    meeting-<id>/meeting.json enthält die Felder des Meetings,
+    meeting-<id>/transcript.txt das Transkript und auf Wunsch
+    meeting-<id>/audio<ext> die Aufnahme. Transkripte werden blockweise,
+    Aufnahmen in UPLOAD_CHUNK_SIZE-Stücken geschrieben und sofort
+    weitergegeben, der Speicherbedarf hängt also nicht von der Größe ab.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for meeting in meetings:
+            folder = f"meeting-{meeting.id}"
+            archive.writestr(
+                f"{folder}/meeting.json",
+                json.dumps(export_record(meeting), ensure_ascii=False, indent=2),
+            )
+            yield buffer.take()
+
+            segments = db.iter_transcript_segments(meeting.id)
+            first = next(segments, None)
+            if first is not None:
+                with archive.open(f"{folder}/transcript.txt", "w") as f:
+                    for text in iter_text(itertools.chain([first], segments)):
+                        f.write(text.encode())
+                        yield buffer.take()
+                yield buffer.take()
+
+            if include_audio and meeting.audio_file:
+                yield from _write_audio(archive, buffer, folder, meeting.audio_file)
+    yield buffer.take()
+
+
+def _write_audio(
+    archive: zipfile.ZipFile, buffer: _StreamBuffer, folder: str, audio_file: str
+) -> Iterator[bytes]:
+    path = os.path.join(data_dir, audio_file)
+    try:
+        source = open(path, "rb")
+    except OSError as e:
+        logger.warning(f"Skipping missing audio file in export: {path} ({e})")
+        return
+
+    with source:
+        # Aufnahmen sind schon komprimiert. from_file übernimmt die Größe,
+        # damit zipfile bei großen Dateien gleich ZIP64 verwendet.
+        info = zipfile.ZipInfo.from_file(
+            path, f"{folder}/audio{os.path.splitext(audio_file)[1]}"
+        )
+        info.compress_type = zipfile.ZIP_STORED
+        with archive.open(info, "w") as f:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                yield buffer.take()
+    yield buffer.take()
+
+
+# Generatoren der zeilenweisen Exportformate; Zip siehe iter_zip
+EXPORTERS = {"jsonl": iter_jsonl, "csv": iter_csv}
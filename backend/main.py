@@ -1,36 +1,328 @@
+import asyncio
+import contextlib
+import itertools
 import os
-from datetime import datetime
-from typing import List
+import tarfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
 
+from audio import probe_duration
+from bulk_import import (
+    ManifestError,
+    import_dir,
+    import_manifest,
+    is_jsonl,
+    read_manifest,
+)
+from cache import CachedResponse, estimate_bucket, fragment_cache
 from celery.result import AsyncResult
-from database import db
-from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from database import ACTIVE_JOB_STATUSES, DEFAULT_PAGE_SIZE, adb, db
+from events import QueueUpdateHub, publish_job_update
+from export import EXPORT_MEDIA_TYPES, EXPORTERS, iter_zip
+from fastapi import (
+    FastAPI,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+    WebSocket,
+)
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+import metrics
 from models import (
-    Meeting,
+    ImportReport,
     MeetingCreate,
+    MeetingSummary,
     MeetingUpdate,
+    TranscriptionJob,
     TranscriptionStatus,
+    UploadSession,
 )
 from pydantic import BaseModel
-from task import app as celery_app
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from storage import (
+    MAX_UPLOAD_SIZE,
+    UPLOAD_SESSION_TTL,
+    UploadLockedError,
+    UploadTooLargeError,
+    append_stream,
+    data_dir,
+    file_sha256,
+    move_into_store,
+    open_upload_part,
+    save_upload,
+    store_audio_upload,
+    upload_dir,
+    upload_part_path,
+)
+from subtitles import FORMATTERS, MEDIA_TYPES, has_timings
 from task import (
+    BULK_QUEUE,
+    TRANSCRIPTION_QUEUES,
+    annotate_job_estimates,
+    choose_queue,
     dummy_task,
-    submit_transcription,
+    get_broker_queue_lengths,
+    get_task_metas,
+    normalize_audio,
+    reconcile_job_states_async,
 )
 
-app = FastAPI()
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Füllstände dieses Prozesses nicht weiter mitsummieren
+    metrics.mark_process_dead(os.getpid())
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Templates und statische Dateien einrichten
 templates = Jinja2Templates(directory="templates")
+# Frischer Idempotency-Key pro gerenderter Seite, damit Doppelklicks nur
+# einen Job erzeugen
+templates.env.globals["new_idempotency_key"] = lambda: uuid.uuid4().hex
+# Gecachte Seiten enthalten statt des Keys diesen Platzhalter, den _cached in
+# jeder Antwort durch einen frischen Key ersetzt; sonst teilten sich alle
+# Betrachter einer Datenversion denselben Key
+IDEMPOTENCY_KEY_PLACEHOLDER = "idempotency-key-placeholder"
 
+# Maximale Länge des Idempotency-Key-Headers
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+# Maximale Größe eines Import-Manifests
+MAX_MANIFEST_SIZE = 16 * 1024 * 1024
 
-@app.get("/")
-async def read_root(request: Request):
-    meetings = db.get_all_meetings()
-    return templates.TemplateResponse(
-        "index.html", {"request": request, "meetings": meetings}
+
+def _render_queue_update(update: Dict[str, Any]) -> str:
+    if "job" in update:
+        update = {**update, "job": TranscriptionJob(**update["job"])}
+    return templates.get_template("job_update.html").render(update)
+
+
+# Live-Updates der Queue, ein Redis-Abonnement pro Prozess
+queue_updates = QueueUpdateHub(_render_queue_update)
+
+
+class UploadSizeLimit:
+    """
+    Begrenzt den Request-Body auf max_size Bytes.
+
+    Mit Content-Length wird vor dem Lesen abgewiesen. Ohne (chunked) zählt die
+    Middleware beim Empfangen mit und bricht ab, sobald die Grenze
+    überschritten ist, bevor FastAPI den Rest in ein UploadFile spoolt.
+    """
+
+    def __init__(self, app, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and not content_length.isdigit():
+            response = JSONResponse(
+                status_code=400, content={"detail": "Ungültiger Content-Length-Header"}
+            )
+            return await response(scope, receive, send)
+        if content_length and int(content_length) > self.max_size:
+            response = JSONResponse(
+                status_code=413, content={"detail": "Datei zu groß"}
+            )
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    raise HTTPException(status_code=413, detail="Datei zu groß")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+app.add_middleware(UploadSizeLimit, max_size=MAX_UPLOAD_SIZE)
+
+
+async def record_request_metrics(request: Request, call_next):
+    # Dauer bis zum Beginn der Antwort, je Route-Template statt je URL
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    metrics.observe(
+        "http_request_duration_seconds",
+        time.perf_counter() - started,
+        method=request.method,
+        route=route,
     )
+    metrics.inc(
+        "http_requests_total",
+        method=request.method,
+        route=route,
+        status=response.status_code,
+    )
+    return response
+
+
+# Ohne METRICS_ENABLED kostet die Messung nicht einmal einen Middleware-Aufruf
+if metrics.METRICS_ENABLED:
+    app.middleware("http")(record_request_metrics)
+
+
+def _parse_date_param(value: Optional[str], end_of_day: bool = False):
+    # Leere Formularfelder (HTMX schickt sie mit) ignorieren
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Ungültiges Datum: {value}")
+    # Reines Datum als Obergrenze schließt den ganzen Tag ein
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+async def _fetch_page(
+    list_fn: Callable,
+    cursor: Optional[str],
+    status: Optional[str],
+    date_from: Optional[str],
+    date_to: Optional[str],
+    limit: int,
+):
+    try:
+        return await list_fn(
+            limit=limit,
+            cursor=cursor or None,
+            status=TranscriptionStatus(status) if status else None,
+            date_from=_parse_date_param(date_from),
+            date_to=_parse_date_param(date_to, end_of_day=True),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _next_page_url(path: str, next_cursor: Optional[str], **filters) -> Optional[str]:
+    if not next_cursor:
+        return None
+    params = {key: value for key, value in filters.items() if value}
+    params["cursor"] = next_cursor
+    return f"{path}?{urlencode(params)}"
+
+
+async def _cached(
+    request: Request,
+    key: Tuple[Any, ...],
+    render: Callable[[], Awaitable[Response]],
+    idempotency_key: bool = False,
+) -> Response:
+    # Der Schlüssel enthält die Datenversion; passt der ETag des Browsers,
+    # wird weder gelesen noch gerendert
+    etag = fragment_cache.etag(key)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "HX-Request"}
+    if etag in request.headers.get("If-None-Match", ""):
+        fragment_cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+
+    cached = fragment_cache.get(etag)
+    if cached is None:
+        response = await render()
+        if response.status_code != 200:
+            return response
+        cached = CachedResponse(
+            response.body,
+            response.media_type,
+            {
+                name: value
+                for name, value in response.headers.items()
+                if name not in ("content-length", "content-type")
+            },
+        )
+        fragment_cache.put(etag, cached)
+    body = cached.body
+    if idempotency_key:
+        body = body.replace(
+            IDEMPOTENCY_KEY_PLACEHOLDER.encode(), uuid.uuid4().hex.encode()
+        )
+    return Response(
+        body,
+        media_type=cached.media_type,
+        headers={**cached.headers, **headers},
+    )
+
+
+@app.get("/")
+async def read_root(
+    request: Request,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    versions = await adb.get_data_versions()
+
+    async def render():
+        page = await _fetch_page(
+            adb.list_meetings, cursor, status, date_from, date_to, limit
+        )
+        filters = {"status": status, "date_from": date_from, "date_to": date_to}
+        return templates.TemplateResponse(
+            "index.html",
+            {
+                "request": request,
+                "meetings": page.items,
+                "filters": filters,
+                "next_page_url": _next_page_url(
+                    "/", page.next_cursor, limit=limit, **filters
+                ),
+            },
+        )
+
+    key = ("index", cursor, status, date_from, date_to, limit, versions["meetings"])
+    return await _cached(request, key, render)
+
+
+@app.get("/search")
+async def search_meetings(
+    request: Request,
+    q: str = "",
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    results, next_page_url = [], None
+    if q.strip():
+        try:
+            page = await adb.search_meetings(q, limit=limit, cursor=cursor or None)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        results = page.items
+        next_page_url = _next_page_url("/search", page.next_cursor, q=q, limit=limit)
+    context = {
+        "request": request,
+        "query": q,
+        "results": results,
+        "next_page_url": next_page_url,
+    }
+    if request.headers.get("HX-Request"):
+        # Wenn es ein HTMX-Request ist, nur die Trefferliste zurückgeben
+        return templates.TemplateResponse("search_results.html", context)
+    return templates.TemplateResponse("search.html", context)
 
 
 class TaskOut(BaseModel):
@@ -45,9 +337,10 @@ def start() -> TaskOut:
 
 
 @app.get("/status")
-def status(task_id: str) -> TaskOut:
-    r = celery_app.AsyncResult(task_id)
-    return _to_task_out(r)
+async def status(task_id: str) -> TaskOut:
+    # Direkt aus dem Result-Backend lesen, ohne die Event-Loop zu blockieren
+    (meta,) = await get_task_metas([task_id])
+    return TaskOut(id=task_id, status=meta["status"] if meta else "PENDING")
 
 
 def _to_task_out(r: AsyncResult) -> TaskOut:
@@ -55,18 +348,53 @@ def _to_task_out(r: AsyncResult) -> TaskOut:
 
 
 # Meeting Endpoints
-@app.get("/meetings", response_model=List[Meeting])
-def get_meetings():
-    return db.get_all_meetings()
+@app.get("/meetings", response_model=List[MeetingSummary])
+async def get_meetings(
+    request: Request,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    versions = await adb.get_data_versions()
+
+    async def render():
+        page = await _fetch_page(
+            adb.list_meetings, cursor, status, date_from, date_to, limit
+        )
+        # Cursor für die nächste Seite im Header, die Antwort bleibt eine Liste
+        headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+        return JSONResponse(jsonable_encoder(page.items), headers=headers)
+
+    key = ("meetings", cursor, status, date_from, date_to, limit, versions["meetings"])
+    return await _cached(request, key, render)
 
 
 @app.get("/meetings/{meeting_id}", response_model=None)
 async def get_meeting_detail(request: Request, meeting_id: int):
-    meeting = db.get_meeting(meeting_id)
-    if not meeting:
+    # updated_at ändert sich mit jedem Schreiben am Meeting, auch am Transkript
+    version = await adb.get_meeting_version(meeting_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Meeting nicht gefunden")
-    return templates.TemplateResponse(
-        "meeting_detail.html", {"request": request, "meeting": meeting}
+
+    async def render():
+        meeting = await adb.get_meeting(meeting_id)
+        if not meeting:
+            raise HTTPException(status_code=404, detail="Meeting nicht gefunden")
+        # Das Transkript liegt nicht in der meetings-Zeile und wird extra geladen
+        meeting.transcript = await adb.get_transcript(meeting_id)
+        return templates.TemplateResponse(
+            "meeting_detail.html",
+            {
+                "request": request,
+                "meeting": meeting,
+                "submit_key": IDEMPOTENCY_KEY_PLACEHOLDER,
+            },
+        )
+
+    return await _cached(
+        request, ("meeting", meeting_id, version), render, idempotency_key=True
     )
 
 
@@ -84,7 +412,7 @@ async def create_meeting(
     meeting_create = MeetingCreate(title=title, date=meeting_date, link=link)
 
     # Meeting in der Datenbank erstellen
-    meeting = db.create_meeting(meeting_create)
+    meeting = await adb.create_meeting(meeting_create)
 
     # Wenn es ein HTMX-Request ist, nur die Meeting-Karte zurückgeben
     if request.headers.get("HX-Request"):
@@ -95,9 +423,7 @@ async def create_meeting(
         )
 
     # Ansonsten zur Hauptseite umleiten
-    return templates.TemplateResponse(
-        "index.html", {"request": request, "meetings": db.get_all_meetings()}
-    )
+    return await read_root(request)
 
 
 @app.put("/meetings/{meeting_id}", response_model=None)
@@ -115,9 +441,10 @@ async def update_meeting(
     meeting_update = MeetingUpdate(title=title, date=meeting_date, link=link)
 
     # Meeting in der Datenbank aktualisieren
-    updated_meeting = db.update_meeting(meeting_id, meeting_update)
+    updated_meeting = await adb.update_meeting(meeting_id, meeting_update)
     if not updated_meeting:
         raise HTTPException(status_code=404, detail="Meeting nicht gefunden")
+    updated_meeting.transcript = await adb.get_transcript(meeting_id)
 
     # Zur Meeting-Detailseite zurückkehren
     return templates.TemplateResponse(
@@ -125,27 +452,59 @@ async def update_meeting(
     )
 
 
+def _remove_upload_parts(sessions: List[UploadSession]):
+    for session in sessions:
+        part_path = upload_part_path(session.id)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+
 @app.delete("/meetings/{meeting_id}")
 async def delete_meeting(request: Request, meeting_id: int):
-    success = db.delete_meeting(meeting_id)
-    if not success:
+    sessions = await adb.delete_meeting(meeting_id)
+    if sessions is None:
         raise HTTPException(status_code=404, detail="Meeting nicht gefunden")
+    # Teildateien abgebrochener Uploads nicht erst nach Ablauf entfernen
+    await run_in_threadpool(_remove_upload_parts, sessions)
 
     if request.headers.get("HX-Request"):
         # Wenn es ein HTMX-Request ist, leere Antwort zurückgeben (Element wird entfernt)
         return ""
 
     # Ansonsten zur Hauptseite umleiten
-    return templates.TemplateResponse(
-        "index.html", {"request": request, "meetings": db.get_all_meetings()}
-    )
+    return await read_root(request)
+
+
+def _submitter(request: Request) -> str:
+    # Vom vorgeschalteten Auth-Proxy gesetzter Benutzer, sonst die Client-Adresse
+    user = request.headers.get("X-Forwarded-User")
+    if user:
+        return user
+    return request.client.host if request.client else "anonymous"
+
+
+def _probe_audio_seconds(audio_file: str) -> Optional[float]:
+    try:
+        return probe_duration(os.path.join(data_dir, audio_file))
+    except Exception:
+        # Ohne Länge wird interaktiv eingereiht; der Worker meldet echte Fehler
+        return None
 
 
 # Transcription Endpoints
 @app.post("/meetings/{meeting_id}/transcribe")
-async def transcribe_meeting(request: Request, meeting_id: int):
+async def transcribe_meeting(
+    request: Request, meeting_id: int, priority: Optional[str] = None
+):
+    if priority and priority not in TRANSCRIPTION_QUEUES:
+        raise HTTPException(status_code=400, detail=f"Unbekannte Priorität: {priority}")
+
+    idempotency_key = request.headers.get("Idempotency-Key") or None
+    if idempotency_key and len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key zu lang")
+
     # Hole das Meeting aus der Datenbank
-    meeting = db.get_meeting(meeting_id)
+    meeting = await adb.get_meeting(meeting_id)
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting nicht gefunden")
 
@@ -154,20 +513,63 @@ async def transcribe_meeting(request: Request, meeting_id: int):
             status_code=400, detail="Keine Audio-Datei für dieses Meeting vorhanden"
         )
 
-    # Aktualisiere den Meeting-Status auf "processing"
-    db.update_meeting(meeting_id, MeetingUpdate(status=TranscriptionStatus.PROCESSING))
+    # Lange Aufnahmen in die Bulk-Queue, kurze in die interaktive
+    audio_seconds = await run_in_threadpool(_probe_audio_seconds, meeting.audio_file)
 
-    # Starte den Transkriptionstask
-    r = submit_transcription.delay(meeting_id, meeting.audio_file)
+    # Job zuerst anlegen, damit der Worker ihn beim Abschließen immer vorfindet;
+    # setzt auch den Meeting-Status in derselben Transaktion
+    job_id = str(uuid.uuid4())
+    job = await adb.create_transcription_job(
+        meeting_id,
+        job_id,
+        queue=choose_queue(audio_seconds, priority),
+        submitter=_submitter(request),
+        audio_seconds=audio_seconds,
+        idempotency_key=idempotency_key,
+    )
+
+    if job.job_id != job_id:
+        # Wiederholte Einreichung: vorhandenen Job liefern, nichts einreihen
+        if job.meeting_id != meeting_id:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key wurde für ein anderes Meeting verwendet",
+            )
+    else:
+        await run_in_threadpool(publish_job_update, job, "created")
 
-    # Erstelle einen Transkriptionsjob in der Datenbank
-    job = db.create_transcription_job(meeting_id, r.task_id)
+        # Starte den Transkriptionstask; die Audiodatei wird vorher normalisiert.
+        # Die Priorität verteilt die Queue fair auf die Einreicher.
+        try:
+            await run_in_threadpool(
+                normalize_audio.apply_async,
+                (meeting_id, meeting.audio_file, meeting.audio_sha256),
+                {"queued_at": time.time(), "job_id": job_id},
+                task_id=job_id,
+                queue=job.queue,
+                priority=job.priority,
+            )
+        except Exception:
+            failed = await adb.update_transcription_job_status(
+                job_id, TranscriptionStatus.FAILED
+            )
+            await run_in_threadpool(publish_job_update, failed)
+            raise HTTPException(
+                status_code=503, detail="Transkriptions-Queue nicht erreichbar"
+            )
 
-    # Aktualisiere das Meeting-Objekt
-    meeting = db.get_meeting(meeting_id)
+    # Meeting-Objekt lokal nachziehen statt erneut zu lesen; mit wartendem Job
+    # ist das Meeting schon in Bearbeitung
+    meeting.status = (
+        TranscriptionStatus.PROCESSING
+        if job.status == TranscriptionStatus.PENDING
+        else job.status
+    )
+    meeting.updated_at = job.updated_at
 
     if request.headers.get("HX-Request"):
         # Wenn es ein HTMX-Request ist, zur Meeting-Detailseite zurückkehren
+        meeting.transcript = await adb.get_transcript(meeting_id)
         return templates.TemplateResponse(
             "meeting_detail.html", {"request": request, "meeting": meeting}
         )
@@ -176,55 +578,181 @@ async def transcribe_meeting(request: Request, meeting_id: int):
 
 
 @app.get("/queue")
-async def get_queue_status(request: Request):
-    jobs = db.get_all_transcription_jobs()
-    if request.headers.get("HX-Request"):
-        # Wenn es ein HTMX-Request ist, nur die Tabelle zurückgeben
-        return templates.TemplateResponse(
-            "job_row.html", {"request": request, "jobs": jobs}
+async def get_queue_status(
+    request: Request,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    versions = await adb.get_data_versions()
+    if not request.headers.get("HX-Request"):
+        template = "queue.html"
+    elif request.headers.get("HX-Target") == "jobs-table":
+        # Filterformular: ganzer Tabellenkörper, damit die Live-Verbindung mit
+        # den neuen Filtern neu aufgebaut wird
+        template = "job_table_body.html"
+    else:
+        # Weitere Seiten: nur die Zeilen
+        template = "job_rows.html"
+
+    async def render():
+        page = await _fetch_page(
+            adb.list_transcription_jobs, cursor, status, date_from, date_to, limit
         )
-    return templates.TemplateResponse("queue.html", {"request": request, "jobs": jobs})
+        # Offene Jobs der Seite mit einem einzigen MGET gegen Celery abgleichen
+        changed = {
+            job.job_id: job for job in await reconcile_job_states_async(page.items)
+        }
+        jobs = [changed.get(job.job_id, job) for job in page.items]
+        jobs = await run_in_threadpool(annotate_job_estimates, jobs)
+        filters = {"status": status, "date_from": date_from, "date_to": date_to}
+        active_filters = {key: value for key, value in filters.items() if value}
+        context = {
+            "request": request,
+            "jobs": jobs,
+            "filters": filters,
+            "next_page_url": _next_page_url(
+                "/queue", page.next_cursor, limit=limit, **filters
+            ),
+            # Neue Jobs kommen nur, wenn die Filter der Ansicht sie zeigen
+            "updates_url": "/ws/queue-updates"
+            + (f"?{urlencode(active_filters)}" if active_filters else ""),
+        }
+        return templates.TemplateResponse(template, context)
+
+    # Die Seite enthält Zeitschätzungen und veraltet daher auch ohne Änderung
+    key = (
+        "queue",
+        template,
+        cursor,
+        status,
+        date_from,
+        date_to,
+        limit,
+        versions["transcription_jobs"],
+        estimate_bucket(),
+    )
+    return await _cached(request, key, render)
+
+
+async def _forward_queue_updates(websocket: WebSocket, updates: asyncio.Queue):
+    # None signalisiert, dass der Client zu weit zurückliegt
+    while (fragment := await updates.get()) is not None:
+        await websocket.send_text(fragment)
+    await websocket.close()
+
+
+def _job_update_filter(
+    status: Optional[TranscriptionStatus],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+) -> Callable[[Dict[str, Any]], bool]:
+    # Wie list_transcription_jobs: Status und Erstellungszeit. Nur neue Zeilen
+    # werden gefiltert; Updates ersetzen ohnehin nur Zeilen auf der Seite.
+    def accepts(update: Dict[str, Any]) -> bool:
+        if update.get("event") != "created":
+            return True
+        job = update["job"]
+        if status is not None and job["status"] != status.value:
+            return False
+        created_at = datetime.fromisoformat(job["created_at"])
+        return (date_from is None or created_at >= date_from) and (
+            date_to is None or created_at < date_to
+        )
+
+    return accepts
+
+
+@app.websocket("/ws/queue-updates")
+async def queue_updates_socket(
+    websocket: WebSocket,
+    status: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+):
+    # Filter wie bei GET /queue
+    try:
+        accepts = _job_update_filter(
+            TranscriptionStatus(status) if status else None,
+            _parse_date_param(date_from),
+            _parse_date_param(date_to, end_of_day=True),
+        )
+    except (ValueError, HTTPException):
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    updates = queue_updates.subscribe(accepts)
+    sender = asyncio.create_task(_forward_queue_updates(websocket, updates))
+    # htmx sendet nichts; receive() kehrt erst beim Verbindungsabbruch zurück
+    receiver = asyncio.create_task(websocket.receive())
+    try:
+        await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        queue_updates.unsubscribe(updates)
 
 
 @app.get("/queue/{job_id}")
 async def get_job_status(request: Request, job_id: str):
-    job = db.get_transcription_job(job_id)
+    # Der Worker schreibt Status und Ergebnis selbst in die Datenbank
+    job = await adb.get_transcription_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job nicht gefunden")
+    fragment = bool(request.headers.get("HX-Request"))
 
-    # Celery-Status prüfen
-    celery_result = celery_app.AsyncResult(job_id)
-    celery_status = celery_result.status
-
-    # Wenn der Celery-Status sich geändert hat, aktualisieren wir den Job-Status
-    if celery_status == "SUCCESS" and job.status != TranscriptionStatus.COMPLETED:
-        # Ergebnis des Tasks abrufen
-        task_result = celery_result.result
-
-        # Wenn das Ergebnis ein Transkript enthält, speichern wir es
-        if isinstance(task_result, dict):
-            if task_result.get("status") == "completed":
-                # Prüfen, ob ein Transkript-Datei-Pfad vorhanden ist
-                transcript_file = task_result.get("transcript_file")
-                if transcript_file and os.path.exists(transcript_file):
-                    with open(transcript_file, "r", encoding="utf-8") as f:
-                        transcript_text = f.read()
-                    # Transkript in der Datenbank speichern
-                    db.save_transcript(job.meeting_id, transcript_text)
-
-        job = db.update_transcription_job_status(job_id, TranscriptionStatus.COMPLETED)
-
-    elif celery_status == "FAILURE" and job.status != TranscriptionStatus.FAILED:
-        job = db.update_transcription_job_status(job_id, TranscriptionStatus.FAILED)
-    elif celery_status == "STARTED" and job.status == TranscriptionStatus.PENDING:
-        job = db.update_transcription_job_status(job_id, TranscriptionStatus.PROCESSING)
+    async def render():
+        await run_in_threadpool(annotate_job_estimates, [job])
+        if fragment:
+            # Wenn es ein HTMX-Request ist, nur die Zeile zurückgeben
+            return templates.TemplateResponse(
+                "job_row.html", {"request": request, "job": job}
+            )
+        return JSONResponse(jsonable_encoder(job))
 
-    if request.headers.get("HX-Request"):
-        # Wenn es ein HTMX-Request ist, nur die Zeile zurückgeben
-        return templates.TemplateResponse(
-            "job_row.html", {"request": request, "job": job}
-        )
-    return job
+    # Offene Jobs zeigen Zeitschätzungen, die auch ohne Änderung veralten
+    estimates = estimate_bucket() if job.status in ACTIVE_JOB_STATUSES else None
+    key = ("job", job_id, fragment, job.updated_at, estimates)
+    return await _cached(request, key, render)
+
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    # Zähler des Antwort-Caches dieses API-Prozesses
+    return fragment_cache.stats()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    # Prometheus-Endpunkt: Summen aller API- und Worker-Prozesse aus
+    # PROMETHEUS_MULTIPROC_DIR und beim Abruf gelesene Füllstände
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metriken sind deaktiviert")
+
+    queue_lengths, job_counts = await asyncio.gather(
+        get_broker_queue_lengths(),
+        adb.get_open_job_counts(),
+    )
+    gauges = {
+        "celery_queue_length": {
+            (queue,): length for queue, length in queue_lengths.items()
+        },
+        # Leere Queues mit 0 statt ohne Zeitreihe
+        "transcription_jobs": {
+            **{
+                (queue, status.value): 0
+                for queue in TRANSCRIPTION_QUEUES
+                for status in ACTIVE_JOB_STATUSES
+            },
+            **job_counts,
+        },
+    }
+    # Liest die Dateien aller Prozesse
+    text = await run_in_threadpool(metrics.render, gauges)
+    return Response(content=text, media_type=metrics.CONTENT_TYPE)
 
 
 @app.post("/meetings/{meeting_id}/upload")
@@ -232,37 +760,26 @@ async def upload_audio_file(
     request: Request, meeting_id: int, file: UploadFile = File(...)
 ):
     # Prüfe, ob das Meeting existiert
-    meeting = db.get_meeting(meeting_id)
+    meeting = await adb.get_meeting_summary(meeting_id)
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting nicht gefunden")
 
-    # Stelle sicher, dass das Upload-Verzeichnis existiert
-    upload_dir = os.path.join("data", "audio")
-    os.makedirs(upload_dir, exist_ok=True)
-
-    # Generiere einen eindeutigen Dateinamen
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"meeting_{meeting_id}_{timestamp}{os.path.splitext(file.filename)[1]}"
-    file_path = os.path.join(upload_dir, filename)
-    relative_path = os.path.join("audio", filename)
-
-    # Speichere die hochgeladene Datei
+    # Speichere die hochgeladene Datei blockweise im inhaltsadressierten Speicher
     try:
-        contents = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(contents)
+        relative_path, checksum, size = await store_audio_upload(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Fehler beim Speichern der Datei: {str(e)}"
         )
 
-    # Aktualisiere den Dateipfad im Meeting
-    updated_meeting = db.update_meeting(
-        meeting_id, MeetingUpdate(audio_file=relative_path)
-    )
+    # Datei dem Meeting zuordnen (inkl. Referenzzählung)
+    updated_meeting = await adb.attach_audio(meeting_id, relative_path, checksum, size)
 
     if request.headers.get("HX-Request"):
         # Wenn es ein HTMX-Request ist, zur Meeting-Detailseite zurückkehren
+        updated_meeting.transcript = await adb.get_transcript(meeting_id)
         return templates.TemplateResponse(
             "meeting_detail.html", {"request": request, "meeting": updated_meeting}
         )
@@ -273,15 +790,298 @@ async def upload_audio_file(
     }
 
 
-@app.get("/meetings/{meeting_id}/transcript")
-def get_transcript(meeting_id: int):
-    meeting = db.get_meeting(meeting_id)
-    if not meeting:
+# Archiv-Import
+def _import_source(source: str) -> str:
+    # Der Pfad kommt vom Client: nur Verzeichnisse unterhalb von IMPORT_DIR
+    root = os.path.realpath(import_dir)
+    path = os.path.realpath(os.path.join(root, source))
+    if os.path.commonpath([root, path]) != root or not os.path.isdir(path):
+        raise HTTPException(status_code=400, detail="Unbekanntes Import-Verzeichnis")
+    return path
+
+
+def _check_archive(path: str):
+    # Nur den ersten Header lesen; entpackt wird erst im Worker
+    with tarfile.open(path, "r|*") as archive:
+        archive.next()
+
+
+class ImportTaskOut(TaskOut):
+    # Bericht, sobald der Import abgeschlossen ist
+    report: Optional[ImportReport] = None
+
+
+@app.post("/imports", status_code=202)
+async def create_import(
+    request: Request,
+    manifest: UploadFile = File(...),
+    archive: Optional[UploadFile] = File(None),
+    source: Optional[str] = Form(None),
+    transcribe: bool = Form(True),
+) -> TaskOut:
+    if (archive is None) == (not source):
+        raise HTTPException(
+            status_code=400, detail="Entweder archive oder source angeben"
+        )
+
+    content = await manifest.read(MAX_MANIFEST_SIZE + 1)
+    if len(content) > MAX_MANIFEST_SIZE:
+        raise HTTPException(status_code=413, detail="Manifest zu groß")
+    jsonl = is_jsonl(manifest.filename or "")
+    try:
+        read_manifest(content.decode("utf-8-sig"), jsonl)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Manifest ist kein UTF-8")
+    except ManifestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    submitter = _submitter(request)
+    if archive is None:
+        source_path = _import_source(source)
+
+    # Manifest und Archiv liegen auf dem Datenvolume, das auch der Bulk-Worker
+    # sieht; der Task löscht sie nach dem Import
+    os.makedirs(upload_dir, exist_ok=True)
+    name = f"import-{uuid.uuid4().hex}"
+    manifest_path = os.path.join(upload_dir, f"{name}{'.jsonl' if jsonl else '.csv'}")
+    archive_path = os.path.join(upload_dir, f"{name}.tar")
+    dispatched = False
+    try:
+        with open(manifest_path, "wb") as f:
+            f.write(content)
+        if archive is not None:
+            # Archiv blockweise zwischenspeichern, der Worker entpackt es in
+            # einem Durchgang
+            await save_upload(archive, archive_path)
+            await run_in_threadpool(_check_archive, archive_path)
+            source_path = archive_path
+
+        # Der Import läuft im Bulk-Worker, nicht im Threadpool der API
+        try:
+            result = await run_in_threadpool(
+                import_manifest.apply_async,
+                (
+                    manifest_path,
+                    source_path,
+                    transcribe,
+                    submitter,
+                    archive is not None,
+                ),
+                queue=BULK_QUEUE,
+            )
+        except Exception:
+            raise HTTPException(status_code=503, detail="Import-Queue nicht erreichbar")
+        dispatched = True
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except tarfile.TarError:
+        raise HTTPException(status_code=400, detail="Kein gültiges Tar-Archiv")
+    finally:
+        if not dispatched:
+            for path in (manifest_path, archive_path):
+                if os.path.exists(path):
+                    await run_in_threadpool(os.remove, path)
+    return _to_task_out(result)
+
+
+@app.get("/imports/{task_id}")
+async def get_import(task_id: str) -> ImportTaskOut:
+    # Wie /status direkt aus dem Result-Backend, mit dem Bericht des Imports
+    (meta,) = await get_task_metas([task_id])
+    if not meta:
+        return ImportTaskOut(id=task_id, status="PENDING")
+    report = ImportReport(**meta["result"]) if meta["status"] == "SUCCESS" else None
+    return ImportTaskOut(id=task_id, status=meta["status"], report=report)
+
+
+# Resumierbare Uploads (angelehnt an das tus-Protokoll)
+def _upload_session_headers(session: UploadSession) -> dict:
+    return {
+        "Upload-Offset": str(session.received),
+        "Upload-Length": str(session.total_size),
+        "Upload-Expires": session.expires_at.isoformat(),
+    }
+
+
+@app.post("/meetings/{meeting_id}/uploads", status_code=201)
+def create_upload_session(
+    response: Response,
+    meeting_id: int,
+    filename: str = Form(...),
+    size: int = Form(...),
+):
+    if not db.get_meeting_summary(meeting_id):
         raise HTTPException(status_code=404, detail="Meeting nicht gefunden")
+    if size <= 0 or size > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail="Ungültige Dateigröße")
+
+    session = db.create_upload_session(meeting_id, filename, size, UPLOAD_SESSION_TTL)
+    response.headers["Location"] = f"/uploads/{session.id}"
+    response.headers.update(_upload_session_headers(session))
+    return session
+
+
+@app.head("/uploads/{upload_id}")
+@app.get("/uploads/{upload_id}")
+def get_upload_session(response: Response, upload_id: str):
+    session = db.get_upload_session(upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload nicht gefunden")
+    response.headers.update(_upload_session_headers(session))
+    return session
+
+
+def _check_upload_offset(session: UploadSession, offset: int):
+    if offset != session.received:
+        raise HTTPException(
+            status_code=409,
+            detail="Offset stimmt nicht überein",
+            headers=_upload_session_headers(session),
+        )
+
+
+@app.patch("/uploads/{upload_id}")
+async def append_upload_chunk(request: Request, upload_id: str):
+    session = await adb.get_upload_session(upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload nicht gefunden")
+
+    # Der Client muss den Offset angeben, an dem er weitermachen will
+    try:
+        offset = int(request.headers["Upload-Offset"])
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail="Upload-Offset fehlt")
+    _check_upload_offset(session, offset)
 
-    if not meeting.transcript:
+    # Nur ein Request zur Zeit schreibt in die Teildatei
+    part_path = upload_part_path(upload_id)
+    try:
+        part = await run_in_threadpool(open_upload_part, part_path)
+    except UploadLockedError as e:
+        raise HTTPException(
+            status_code=409, detail=str(e), headers=_upload_session_headers(session)
+        )
+    try:
+        # Unter der Sperre neu lesen: ein paralleler Request kann den Offset
+        # gerade weitergesetzt haben
+        session = await adb.get_upload_session(upload_id)
+        if not session:
+            raise HTTPException(status_code=404, detail="Upload nicht gefunden")
+        _check_upload_offset(session, offset)
+
+        try:
+            written, _ = await append_stream(
+                part, offset, request.stream(), session.total_size - offset
+            )
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+
+        session = await adb.advance_upload_session(
+            upload_id, offset, offset + written, UPLOAD_SESSION_TTL
+        )
+        if not session:
+            raise HTTPException(
+                status_code=409, detail="Upload wurde parallel geändert"
+            )
+
+        headers = _upload_session_headers(session)
+        if session.received < session.total_size:
+            return Response(status_code=204, headers=headers)
+
+        # Upload vollständig: Datei an ihren Platz verschieben und Meeting
+        # aktualisieren, noch unter der Sperre
+        checksum = await run_in_threadpool(file_sha256, part_path)
+        relative_path = await run_in_threadpool(
+            move_into_store, part_path, checksum, os.path.splitext(session.filename)[1]
+        )
+        await adb.delete_upload_session(upload_id)
+    finally:
+        await run_in_threadpool(part.close)
+
+    updated_meeting = await adb.attach_audio(
+        session.meeting_id, relative_path, checksum, session.total_size
+    )
+
+    return JSONResponse(
+        status_code=200,
+        headers=headers,
+        content={
+            "message": "Audio-Datei erfolgreich hochgeladen",
+            "meeting": jsonable_encoder(updated_meeting),
+        },
+    )
+
+
+@app.get("/meetings/{meeting_id}/transcript", response_model=None)
+def get_transcript(
+    meeting_id: int,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    segment: Optional[int] = None,
+    format: str = "json",
+):
+    if format != "json" and format not in FORMATTERS:
+        raise HTTPException(status_code=400, detail=f"Unbekanntes Format: {format}")
+    meeting = db.get_meeting_summary(meeting_id)
+    if not meeting:
+        raise HTTPException(status_code=404, detail="Meeting nicht gefunden")
+    if not meeting.has_transcript:
         raise HTTPException(
             status_code=404, detail="Kein Transkript für dieses Meeting vorhanden"
         )
 
-    return {"meeting_id": meeting_id, "transcript": meeting.transcript}
+    # Blöcke werden beim Senden nacheinander entpackt, nie alle auf einmal
+    segments = db.iter_transcript_segments(meeting_id, start, end, segment)
+    if format in ("srt", "vtt"):
+        # Vor dem ersten Byte prüfen, ob es Zeitstempel gibt (ältere
+        # Transkripte haben keine)
+        first = next(segments, None)
+        if first is None or not has_timings(first):
+            raise HTTPException(
+                status_code=409, detail="Das Transkript hat keine Zeitstempel"
+            )
+        segments = itertools.chain([first], segments)
+    if format != "json":
+        headers = {}
+        if format != "txt":
+            # Untertitel als Datei herunterladen
+            filename = f"meeting-{meeting_id}.{format}"
+            headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return StreamingResponse(
+            FORMATTERS[format](segments),
+            media_type=MEDIA_TYPES[format],
+            headers=headers,
+        )
+    if start is None and end is None and segment is None:
+        return {"meeting_id": meeting_id, "transcript": db.get_transcript(meeting_id)}
+    return {"meeting_id": meeting_id, "segments": list(segments)}
+
+
+@app.get("/export", response_model=None)
+def export_meetings(
+    format: str = "jsonl", since: Optional[str] = None, audio: bool = False
+):
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unbekanntes Format: {format}")
+    if audio and format != "zip":
+        raise HTTPException(
+            status_code=400, detail="Audiodateien gibt es nur im zip-Export"
+        )
+    since_date = _parse_date_param(since)
+    since = since_date.isoformat() if since_date else None
+
+    # Später geänderte Meetings kommen erst mit dem nächsten Export; der
+    # Wasserstand ist dessen since
+    watermark = db.get_meetings_watermark()
+    meetings = db.iter_meetings_for_export(since, watermark)
+    if format == "zip":
+        content = iter_zip(meetings, include_audio=audio)
+    else:
+        content = EXPORTERS[format](meetings)
+
+    filename = f"meetings-{datetime.now():%Y%m%dT%H%M%S}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if watermark or since:
+        headers["X-Export-Watermark"] = max(watermark or "", since or "")
+    return StreamingResponse(
+        content, media_type=EXPORT_MEDIA_TYPES[format], headers=headers
+    )
@@ -0,0 +1,273 @@
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Tuple, Union
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# Konfiguration
+# Ohne METRICS_ENABLED werden keine Wrapper installiert und alle Aufrufe
+# kehren sofort zurück
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+# Gemeinsames Verzeichnis aller Prozesse (uvicorn und Celery), in das
+# prometheus_client die Werte schreibt; GET /metrics summiert sie. Ohne
+# Verzeichnis liefert /metrics nur die Werte des abgefragten Prozesses.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# Content-Type des Prometheus-Textformats
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# Bucket-Grenzen (Sekunden) für Requests/Statements und für ganze Jobs
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+JOB_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)
+
+# Metriken ohne Labels legen ihre Datei schon beim Definieren an
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+registry = CollectorRegistry()
+METRICS: Dict[str, Union[Counter, Gauge, Histogram]] = {}
+
+
+def _define(kind: type, name: str, documentation: str, *labelnames: str, **kwargs):
+    METRICS[name] = kind(name, documentation, labelnames, registry=registry, **kwargs)
+
+
+# API
+_define(
+    Counter,
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    "method",
+    "route",
+    "status",
+)
+_define(
+    Histogram,
+    "http_request_duration_seconds",
+    "Time until the response starts, by route template",
+    "method",
+    "route",
+    buckets=LATENCY_BUCKETS,
+)
+_define(Counter, "upload_bytes_total", "Bytes received by audio uploads", "kind")
+_define(
+    Counter,
+    "upload_seconds_total",
+    "Time spent receiving audio uploads (bytes/sec = ratio of rates)",
+    "kind",
+)
+_define(
+    Counter,
+    "fragment_cache_requests_total",
+    "Response cache lookups by result (hits, misses, not_modified)",
+    "result",
+)
+_define(
+    Gauge,
+    "fragment_cache_bytes",
+    "Size of the cached response bodies",
+    multiprocess_mode="livesum",
+)
+# Datenbank (API und Worker)
+_define(
+    Histogram,
+    "db_method_duration_seconds",
+    "Duration of Database methods",
+    "method",
+    buckets=LATENCY_BUCKETS,
+)
+_define(
+    Counter,
+    "db_statements_total",
+    "SQL statements (including trigger statements) by Database method",
+    "method",
+)
+_define(Counter, "db_connections_opened_total", "SQLite connections opened")
+# Worker
+_define(
+    Histogram,
+    "celery_task_duration_seconds",
+    "Celery task run time by task and final state",
+    "task",
+    "state",
+    buckets=JOB_BUCKETS,
+)
+_define(
+    Histogram,
+    "transcription_wait_seconds",
+    "Time from queueing a job to the start of its processing",
+    "queue",
+    buckets=JOB_BUCKETS,
+)
+_define(
+    Histogram,
+    "transcription_run_seconds",
+    "Time from the start of processing to the stored transcript",
+    "queue",
+    buckets=JOB_BUCKETS,
+)
+_define(
+    Counter,
+    "transcription_audio_seconds_total",
+    "Audio seconds of completed transcriptions by queue",
+    "queue",
+)
+_define(
+    Histogram,
+    "asr_request_duration_seconds",
+    "Whisper /asr request latency by backend and outcome",
+    "backend",
+    "outcome",
+    buckets=JOB_BUCKETS,
+)
+_define(
+    Counter,
+    "asr_audio_seconds_total",
+    "Audio seconds sent successfully to each ASR backend",
+    "backend",
+)
+
+# Beim Abruf gelesene Füllstände: Name -> (Beschreibung, Labels)
+SCRAPE_GAUGES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "celery_queue_length": ("Messages waiting in the broker by queue", ("queue",)),
+    "transcription_jobs": (
+        "Open transcription jobs by queue and status",
+        ("queue", "status"),
+    ),
+}
+
+_local = threading.local()
+
+
+def _child(name: str, labels: Dict[str, Any]):
+    metric = METRICS[name]
+    return metric.labels(**labels) if labels else metric
+
+
+def inc(name: str, value: float = 1.0, **labels: Any):
+    """Erhöht einen Zähler; ohne METRICS_ENABLED wirkungslos."""
+    if METRICS_ENABLED:
+        _child(name, labels).inc(value)
+
+
+def observe(name: str, value: float, **labels: Any):
+    """Trägt einen Messwert in ein Histogramm ein; ohne METRICS_ENABLED wirkungslos."""
+    if METRICS_ENABLED:
+        _child(name, labels).observe(value)
+
+
+def set_gauge(name: str, value: float, **labels: Any):
+    """Setzt einen Füllstand dieses Prozesses; ohne METRICS_ENABLED wirkungslos."""
+    if METRICS_ENABLED:
+        _child(name, labels).set(value)
+
+
+def count_statement(statement: str):
+    # Trace-Callback der SQLite-Verbindungen, zählt pro Thread
+    _local.statements = getattr(_local, "statements", 0) + 1
+
+
+def _timed_method(name: str, method: Callable) -> Callable:
+    duration = METRICS["db_method_duration_seconds"].labels(method=name)
+    statements_total = METRICS["db_statements_total"].labels(method=name)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        statements = getattr(_local, "statements", 0)
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            duration.observe(time.perf_counter() - started)
+            statements_total.inc(getattr(_local, "statements", 0) - statements)
+
+    return wrapper
+
+
+def instrument_methods(cls: type, exclude: Iterable[str] = ()):
+    """
+    Misst Dauer und Statements aller öffentlichen Methoden einer Klasse.
+
+    Generatoren werden ausgelassen, ihre Laufzeit hängt vom Verbraucher ab.
+    Ohne METRICS_ENABLED bleibt die Klasse unverändert.
+    """
+    if not METRICS_ENABLED:
+        return
+    for name, member in list(vars(cls).items()):
+        if (
+            name.startswith("_")
+            or name in exclude
+            or not inspect.isfunction(member)
+            or inspect.isgeneratorfunction(member)
+        ):
+            continue
+        setattr(cls, name, _timed_method(name, member))
+
+
+def mark_process_dead(pid: int):
+    """Entfernt die Füllstände (livesum) eines beendeten Prozesses."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
+
+
+class _ScrapeGauges:
+    """Collector für die beim Abruf gelesenen Füllstände."""
+
+    def __init__(self, values: Dict[str, Dict[Tuple[Any, ...], float]]):
+        self.values = values
+
+    def collect(self):
+        for name, values in self.values.items():
+            documentation, labelnames = SCRAPE_GAUGES[name]
+            family = GaugeMetricFamily(name, documentation, labels=labelnames)
+            for labels, value in values.items():
+                family.add_metric([str(label) for label in labels], value)
+            yield family
+
+
+def render(gauges: Dict[str, Dict[Tuple[Any, ...], float]]) -> bytes:
+    """
+    Gibt alle Metriken im Prometheus-Textformat aus.
+
+    Mit PROMETHEUS_MULTIPROC_DIR die Summen aller Prozesse, sonst die Werte
+    dieses Prozesses.
+
+    Args:
+        gauges: Beim Abruf gelesene Füllstände je Name aus SCRAPE_GAUGES,
+            Labelwerte in der dort angegebenen Reihenfolge
+
+    Returns:
+        Text für /metrics
+    """
+    scrape = CollectorRegistry()
+    if MULTIPROC_DIR:
+        multiprocess.MultiProcessCollector(scrape, MULTIPROC_DIR)
+    else:
+        scrape.register(registry)
+    scrape.register(_ScrapeGauges(gauges))
+    return generate_latest(scrape)
@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -18,6 +18,8 @@ class Meeting(BaseModel):
     date: datetime
     link: Optional[str] = None
     audio_file: Optional[str] = None
+    audio_sha256: Optional[str] = None
+    # Wird nicht mit dem Meeting geladen, siehe Database.get_transcript
     transcript: Optional[str] = None
     status: TranscriptionStatus = TranscriptionStatus.PENDING
     created_at: Optional[datetime] = None
@@ -27,17 +29,56 @@ class Meeting(BaseModel):
         from_attributes = True
 
 
+class MeetingSummary(BaseModel):
+    """Meeting ohne Transkript-Text, für Listenansichten."""
+
+    id: int
+    title: str
+    date: datetime
+    link: Optional[str] = None
+    audio_file: Optional[str] = None
+    has_transcript: bool = False
+    status: TranscriptionStatus = TranscriptionStatus.PENDING
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class MeetingCreate(BaseModel):
     title: str
     date: datetime
     link: Optional[str] = None
 
 
+class MeetingImport(BaseModel):
+    """Meeting aus einem Archiv-Import, Audiodatei bereits im Speicher."""
+
+    title: str
+    date: datetime
+    link: Optional[str] = None
+    audio_file: str
+    audio_sha256: str
+    audio_size: int
+
+
+class ImportReport(BaseModel):
+    # Angelegte Meetings, bereits vorhandene (gleiche Audiodatei und Datum)
+    # und eingereihte Transkriptionen
+    meetings: int = 0
+    skipped: int = 0
+    jobs: int = 0
+    # Fehler je Manifest-Zeile; betroffene Zeilen werden übersprungen
+    errors: List[str] = []
+
+
 class MeetingUpdate(BaseModel):
     title: Optional[str] = None
     date: Optional[datetime] = None
     link: Optional[str] = None
     audio_file: Optional[str] = None
+    audio_sha256: Optional[str] = None
     transcript: Optional[str] = None
     status: Optional[TranscriptionStatus] = None
 
@@ -47,8 +88,86 @@ class TranscriptionJob(BaseModel):
     meeting_id: int
     job_id: str
     status: TranscriptionStatus = TranscriptionStatus.PENDING
+    asr_bytes: Optional[int] = None
+    latency_seconds: Optional[float] = None
+    # Celery-Queue (interactive/bulk), Einreicher und Broker-Priorität (0 zuerst)
+    queue: Optional[str] = None
+    submitter: Optional[str] = None
+    priority: int = 0
+    audio_seconds: Optional[float] = None
+    # Eingereichte Audiodatei und vom Client gesetzter Idempotency-Key
+    audio_sha256: Optional[str] = None
+    idempotency_key: Optional[str] = None
+    # Beginn der Bearbeitung und fertig transkribierte Audio-Sekunden
+    started_at: Optional[datetime] = None
+    progress_seconds: Optional[float] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    # Beim Lesen berechnet und nicht gespeichert: Position und Start wartender,
+    # Fortschritt (0 bis 1) und Ende laufender Jobs
+    queue_position: Optional[int] = None
+    estimated_start: Optional[datetime] = None
+    progress: Optional[float] = None
+    estimated_finish: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class MeetingPage(BaseModel):
+    items: List[MeetingSummary]
+    next_cursor: Optional[str] = None
+
+
+class TranscriptCue(BaseModel):
+    # Zeitbereich einer Äußerung laut Whisper (Sekunden in der Aufnahme)
+    start: float
+    end: float
+    text: str
+    # Mittlere Token-Log-Wahrscheinlichkeit, Maß für die Sicherheit von Whisper
+    avg_logprob: Optional[float] = None
+
+
+class TranscriptSegment(BaseModel):
+    seq: int = 0
+    # Zeitbereich in der Aufnahme (Sekunden), falls bekannt
+    start: Optional[float] = None
+    end: Optional[float] = None
+    text: str
+    # Äußerungen des Blocks; text ist dann ihre Texte, zeilenweise
+    cues: List[TranscriptCue] = []
+
+
+class SearchResult(BaseModel):
+    id: int
+    title: str
+    date: datetime
+    status: TranscriptionStatus
+    # HTML-escaped, Treffer in <mark>
+    snippet: str
+    # BM25-Score, kleiner ist besser
+    score: float
+
+
+class SearchPage(BaseModel):
+    items: List[SearchResult]
+    next_cursor: Optional[str] = None
+
+
+class TranscriptionJobPage(BaseModel):
+    items: List[TranscriptionJob]
+    next_cursor: Optional[str] = None
+
+
+class UploadSession(BaseModel):
+    id: str
+    meeting_id: int
+    filename: str
+    total_size: int
+    received: int = 0
+    created_at: datetime
+    updated_at: datetime
+    expires_at: datetime
 
     class Config:
         from_attributes = True
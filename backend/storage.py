@@ -0,0 +1,330 @@
+import fcntl
+import glob
+import hashlib
+import os
+import shutil
+import time
+import uuid
+from datetime import timedelta
+from typing import AsyncIterator, BinaryIO, Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+import metrics
+
+# Konfiguration
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(4 * 1024 * 1024 * 1024)))
+# Inhaltsadressierter Audio-Speicher: audio/<sha[:2]>/<sha><ext>
+data_dir = os.getenv("DATA_DIR", "data")
+audio_dir = os.path.join(data_dir, "audio")
+# Teilweise hochgeladene Dateien resumierbarer Uploads
+upload_dir = os.getenv("UPLOAD_FOLDER", os.path.join("data", "uploads"))
+UPLOAD_SESSION_TTL = timedelta(hours=int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")))
+
+
+class UploadTooLargeError(Exception):
+    """Upload überschreitet MAX_UPLOAD_SIZE."""
+
+
+class UploadLockedError(Exception):
+    """Ein anderer Request schreibt gerade in dieselbe Teildatei."""
+
+
+def _write_chunk(f: BinaryIO, hasher, chunk: bytes):
+    hasher.update(chunk)
+    f.write(chunk)
+
+
+def _finish_file(f: BinaryIO, temp_path: str, destination: str):
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+    os.replace(temp_path, destination)
+
+
+def _count_upload(kind: str, size: int, started: float):
+    # Empfangene Bytes und Dauer; Quotient der Raten = Bytes pro Sekunde
+    metrics.inc("upload_bytes_total", size, kind=kind)
+    metrics.inc("upload_seconds_total", time.perf_counter() - started, kind=kind)
+
+
+def _discard_file(f: BinaryIO, temp_path: str):
+    f.close()
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+async def save_upload(
+    file: UploadFile, destination: str, max_size: int = MAX_UPLOAD_SIZE
+) -> Tuple[int, str]:
+    """
+    Schreibt einen Upload blockweise auf die Platte, ohne den Event-Loop zu blockieren.
+
+    Die Datei wird zunächst in eine temporäre Datei neben dem Ziel geschrieben und
+    erst nach vollständigem Upload per rename an ihren Platz verschoben.
+
+    Args:
+        file: Hochgeladene Datei
+        destination: Zielpfad
+        max_size: Maximale Größe in Bytes
+
+    Returns:
+        Tuple aus Größe in Bytes und SHA-256 (hex)
+    """
+    temp_path = f"{destination}.{uuid.uuid4().hex}.part"
+    hasher = hashlib.sha256()
+    size = 0
+    started = time.perf_counter()
+
+    f = await run_in_threadpool(open, temp_path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLargeError(
+                    f"Datei größer als {max_size // (1024 * 1024)} MB"
+                )
+            await run_in_threadpool(_write_chunk, f, hasher, chunk)
+
+        await run_in_threadpool(_finish_file, f, temp_path, destination)
+    except BaseException:
+        await run_in_threadpool(_discard_file, f, temp_path)
+        raise
+    finally:
+        _count_upload("multipart", size, started)
+
+    return size, hasher.hexdigest()
+
+
+def upload_part_path(upload_id: str) -> str:
+    """Pfad der Teildatei eines resumierbaren Uploads."""
+    return os.path.join(upload_dir, f"{upload_id}.part")
+
+
+def open_upload_part(path: str) -> BinaryIO:
+    """
+    Öffnet die Teildatei eines resumierbaren Uploads und sperrt sie exklusiv.
+
+    Die Sperre (flock) gilt auch gegenüber anderen Prozessen und endet mit dem
+    Schließen der Datei. Der Aufrufer hält sie vom erneuten Prüfen des Offsets
+    bis nach dem Weitersetzen in der Datenbank, sonst könnten zwei Requests mit
+    demselben Offset nacheinander in die Datei schreiben.
+
+    Raises:
+        UploadLockedError: Die Datei ist bereits gesperrt
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Ohne O_TRUNC, die bestätigten Bytes bleiben erhalten
+    f = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), "r+b")
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        raise UploadLockedError("Für diesen Upload läuft bereits ein Request")
+    return f
+
+
+def _sync_and_truncate(f: BinaryIO):
+    # Reste eines früher abgebrochenen Chunks hinter dem neuen Ende entfernen
+    f.truncate()
+    f.flush()
+    os.fsync(f.fileno())
+
+
+async def append_stream(
+    f: BinaryIO, offset: int, stream: AsyncIterator[bytes], max_bytes: int
+) -> Tuple[int, bool]:
+    """
+    Schreibt einen Request-Body ab einem Offset in eine Teildatei.
+
+    Bricht der Client die Verbindung ab, bleiben die bis dahin empfangenen Bytes
+    erhalten, damit der Upload an dieser Stelle fortgesetzt werden kann.
+
+    Args:
+        f: Mit open_upload_part geöffnete Teildatei
+        offset: Bereits bestätigte Anzahl Bytes
+        stream: Body-Stream des Requests
+        max_bytes: Maximal erlaubte Anzahl neuer Bytes
+
+    Returns:
+        Tuple aus Anzahl geschriebener Bytes und ob der Body vollständig war
+    """
+    await run_in_threadpool(f.seek, offset)
+    written = 0
+    complete = True
+    started = time.perf_counter()
+    try:
+        async for chunk in stream:
+            if written + len(chunk) > max_bytes:
+                raise UploadTooLargeError("Chunk überschreitet die angekündigte Größe")
+            await run_in_threadpool(f.write, chunk)
+            written += len(chunk)
+    except ClientDisconnect:
+        complete = False
+    finally:
+        await run_in_threadpool(_sync_and_truncate, f)
+        _count_upload("resumable", written, started)
+
+    return written, complete
+
+
+def file_sha256(path: str) -> str:
+    """Berechnet den SHA-256 einer Datei blockweise."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _find_blob(shard_dir: str, sha256: str) -> Optional[str]:
+    """Fertiger Blob mit diesem Inhalt, gleich mit welcher Endung."""
+    for path in glob.glob(os.path.join(shard_dir, f"{sha256}*")):
+        # Temporäre Dateien (<blob>.<uuid>.part) haben eine Endung mehr
+        if os.path.splitext(os.path.basename(path))[0] == sha256:
+            return path
+    return None
+
+
+def move_into_store(path: str, sha256: str, extension: str) -> str:
+    """
+    Verschiebt eine fertige Datei in den inhaltsadressierten Audio-Speicher.
+
+    Existiert der Inhalt bereits, wird die neue Kopie verworfen und die vorhandene
+    Datei verwendet.
+
+    Args:
+        path: Pfad der fertigen Datei
+        sha256: SHA-256 des Inhalts
+        extension: Dateiendung des Originals (z.B. ".m4a")
+
+    Returns:
+        Pfad relativ zum Datenverzeichnis
+    """
+    shard_dir = os.path.join(audio_dir, sha256[:2])
+    os.makedirs(shard_dir, exist_ok=True)
+
+    blob_path = _find_blob(shard_dir, sha256)
+    if blob_path:
+        os.remove(path)
+    else:
+        blob_path = os.path.join(shard_dir, f"{sha256}{extension.lower()}")
+        os.replace(path, blob_path)
+
+    return os.path.relpath(blob_path, data_dir)
+
+
+def blob_path(sha256: str, extension: str) -> str:
+    """
+    Pfad, unter dem ein Inhalt im Audio-Speicher liegt oder liegen wird.
+
+    Returns:
+        Pfad relativ zum Datenverzeichnis, wie ihn move_into_store und
+        link_into_store zurückgeben
+    """
+    shard_dir = os.path.join(audio_dir, sha256[:2])
+    path = _find_blob(shard_dir, sha256) or os.path.join(
+        shard_dir, f"{sha256}{extension.lower()}"
+    )
+    return os.path.relpath(path, data_dir)
+
+
+def _incoming_path() -> str:
+    # Temporäre Dateien nie im Shard-Verzeichnis, dort liegen nur fertige Blobs
+    incoming_dir = os.path.join(audio_dir, "incoming")
+    os.makedirs(incoming_dir, exist_ok=True)
+    return os.path.join(incoming_dir, uuid.uuid4().hex)
+
+
+def link_into_store(path: str, sha256: str, extension: str) -> str:
+    """
+    Übernimmt eine vorhandene Datei in den Audio-Speicher, ohne sie zu kopieren.
+
+    Die Datei wird per Hardlink eingetragen und bleibt an ihrem Ort erhalten.
+    Nur wenn das nicht geht (anderes Dateisystem), wird kopiert. Ein Hardlink
+    behält die mtime des Originals; damit cleanup_audio_files ihn nicht als
+    alte verwaiste Datei löscht, muss der Blob vorher in der Datenbank stehen
+    (Database.register_audio_blobs).
+
+    Args:
+        path: Pfad der Datei, z.B. im Archivverzeichnis
+        sha256: SHA-256 des Inhalts
+        extension: Dateiendung des Originals (z.B. ".m4a")
+
+    Returns:
+        Pfad relativ zum Datenverzeichnis
+    """
+    shard_dir = os.path.join(audio_dir, sha256[:2])
+    os.makedirs(shard_dir, exist_ok=True)
+
+    blob_path = _find_blob(shard_dir, sha256)
+    if not blob_path:
+        blob_path = os.path.join(shard_dir, f"{sha256}{extension.lower()}")
+        try:
+            # Ein Hardlink entsteht atomar, eine Kopie erst unter temporärem Namen
+            os.link(path, blob_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            temp_path = _incoming_path()
+            try:
+                shutil.copyfile(path, temp_path)
+                os.replace(temp_path, blob_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+    return os.path.relpath(blob_path, data_dir)
+
+
+def receive_stream(stream: BinaryIO) -> Tuple[str, str, int]:
+    """
+    Schreibt einen Datenstrom (z.B. ein Mitglied eines Tar-Archivs) blockweise
+    in eine temporäre Datei neben dem Audio-Speicher und berechnet dabei die
+    Prüfsumme.
+
+    Die Datei kommt erst mit link_into_store oder move_into_store in den
+    Speicher; bis dahin muss der Aufrufer sie selbst wieder entfernen.
+
+    Returns:
+        Tuple aus Pfad der temporären Datei, SHA-256 und Größe in Bytes
+    """
+    temp_path = _incoming_path()
+
+    hasher = hashlib.sha256()
+    size = 0
+    f = open(temp_path, "wb")
+    try:
+        while chunk := stream.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            _write_chunk(f, hasher, chunk)
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+    except BaseException:
+        _discard_file(f, temp_path)
+        raise
+
+    return temp_path, hasher.hexdigest(), size
+
+
+async def store_audio_upload(
+    file: UploadFile, max_size: int = MAX_UPLOAD_SIZE
+) -> Tuple[str, str, int]:
+    """
+    Speichert einen Audio-Upload im inhaltsadressierten Speicher.
+
+    Returns:
+        Tuple aus relativem Pfad, SHA-256 und Größe in Bytes
+    """
+    temp_path = _incoming_path()
+
+    size, sha256 = await save_upload(file, temp_path, max_size)
+    extension = os.path.splitext(file.filename or "")[1]
+    relative_path = await run_in_threadpool(
+        move_into_store, temp_path, sha256, extension
+    )
+    return relative_path, sha256, size
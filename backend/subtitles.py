@@ -0,0 +1,76 @@
+from typing import Iterable, Iterator
+
+from models import TranscriptCue, TranscriptSegment
+
+# Content-Types der Exportformate
+MEDIA_TYPES = {
+    "txt": "text/plain; charset=utf-8",
+    "srt": "application/x-subrip; charset=utf-8",
+    "vtt": "text/vtt; charset=utf-8",
+}
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    milliseconds = round(seconds * 1000)
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
+
+
+def has_timings(segment: TranscriptSegment) -> bool:
+    """Prüft, ob ein Block Zeitangaben für Untertitel liefern kann."""
+    return bool(segment.cues) or (segment.start is not None and segment.end is not None)
+
+
+def iter_cues(segments: Iterable[TranscriptSegment]) -> Iterator[TranscriptCue]:
+    """
+    Liefert die Äußerungen aller Blöcke der Reihe nach.
+
+    Blöcke ohne Äußerungen (ältere Transkripte) werden als eine Äußerung über
+    ihren ganzen Zeitbereich ausgegeben, Blöcke ganz ohne Zeitangaben übersprungen.
+    """
+    for segment in segments:
+        if segment.cues:
+            cues = segment.cues
+        elif has_timings(segment):
+            cues = [
+                TranscriptCue(start=segment.start, end=segment.end, text=segment.text)
+            ]
+        else:
+            continue
+        for cue in cues:
+            if cue.text.strip():
+                yield cue
+
+
+def iter_text(segments: Iterable[TranscriptSegment]) -> Iterator[str]:
+    """Transkript als reiner Text, Blöcke wie in Database.get_transcript verbunden."""
+    for index, segment in enumerate(segments):
+        yield segment.text if index == 0 else "\n" + segment.text
+
+
+def iter_srt(segments: Iterable[TranscriptSegment]) -> Iterator[str]:
+    """Transkript als SubRip-Untertitel, eine Äußerung pro Eintrag."""
+    for number, cue in enumerate(iter_cues(segments), start=1):
+        start, end = _timestamp(cue.start, ","), _timestamp(cue.end, ",")
+        yield f"{number}\n{start} --> {end}\n{cue.text.strip()}\n\n"
+
+
+def iter_vtt(segments: Iterable[TranscriptSegment]) -> Iterator[str]:
+    """Transkript als WebVTT-Untertitel, eine Äußerung pro Eintrag."""
+    yield "WEBVTT\n\n"
+    for cue in iter_cues(segments):
+        start, end = _timestamp(cue.start, "."), _timestamp(cue.end, ".")
+        # In WebVTT-Text sind &, < und > reserviert ("-->" beendet sonst die Zeile)
+        text = (
+            cue.text.strip()
+            .replace("&", "&amp;")
+            .replace("<", "&lt;")
+            .replace(">", "&gt;")
+        )
+        yield f"{start} --> {end}\n{text}\n\n"
+
+
+# Generatoren pro Exportformat
+FORMATTERS = {"txt": iter_text, "srt": iter_srt, "vtt": iter_vtt}
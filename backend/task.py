@@ -1,23 +1,80 @@
 # in file task.py
+from celery import Signature, Task, chord, group
 from celery.app import Celery
 from celery.schedules import crontab
+from celery.signals import task_postrun, task_prerun
 from datetime import datetime, timedelta
+import asyncio
 import os
-import requests
+import json
 import logging
-from typing import Dict, Any
+import math
+import shutil
+import subprocess
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+import redis.asyncio
+
+from asr_client import RETRYABLE_ERRORS, ASRPool
+from audio import (
+    detect_silences,
+    extract_segment,
+    normalize_for_asr,
+    plan_segments,
+    probe_duration,
+    speech_bounds,
+)
+from database import ACTIVE_JOB_STATUSES, MAX_JOB_PRIORITY, adb, db
+from events import publish_job_update, publish_job_updates
+import metrics
+from models import TranscriptionJob, TranscriptionStatus, TranscriptSegment
+from storage import file_sha256, upload_part_path
 
 # Konfiguration
 redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-whisper_service_url = os.getenv(
-    "TRANSCRIPTION_SERVICE_URL", "http://transcription:9000"
-)
+# Mehrere Whisper-Backends kommagetrennt in TRANSCRIPTION_SERVICE_URLS
+whisper_service_urls = [
+    url.strip()
+    for url in os.getenv(
+        "TRANSCRIPTION_SERVICE_URLS",
+        os.getenv("TRANSCRIPTION_SERVICE_URL", "http://transcription:9000"),
+    ).split(",")
+    if url.strip()
+]
+# Modell und Sprache bestimmen den Schlüssel des Transkript-Caches
+asr_model = os.getenv("ASR_MODEL", "small")
+asr_language = os.getenv("ASR_LANGUAGE", "de")
+# Aufnahmen ab dieser Länge werden in Segmente geteilt und parallel transkribiert
+chunk_threshold_seconds = float(os.getenv("CHUNK_THRESHOLD_SECONDS", str(20 * 60)))
+segment_target_seconds = float(os.getenv("SEGMENT_TARGET_SECONDS", str(10 * 60)))
+segment_max_seconds = float(os.getenv("SEGMENT_MAX_SECONDS", str(12 * 60)))
+# Kurze Aufnahmen laufen in einer eigenen Queue, getrennt von Archiv-Importen
+INTERACTIVE_QUEUE = "interactive"
+BULK_QUEUE = "bulk"
+TRANSCRIPTION_QUEUES = (INTERACTIVE_QUEUE, BULK_QUEUE)
+interactive_max_seconds = float(os.getenv("INTERACTIVE_MAX_SECONDS", str(15 * 60)))
+# Whisper meldet keinen Zwischenstand; nach Zeit geschätzter Fortschritt bleibt
+# darunter, bis der Job wirklich fertig ist
+MAX_ESTIMATED_PROGRESS = 0.99
+# Wiederholungen bei Ausfällen des ASR-Service (exponentielles Backoff)
+asr_max_retries = int(os.getenv("ASR_MAX_RETRIES", "5"))
+ASR_RETRY_POLICY = {
+    "autoretry_for": RETRYABLE_ERRORS,
+    "retry_backoff": 10,
+    "retry_backoff_max": 600,
+    "retry_jitter": True,
+    "max_retries": asr_max_retries,
+}
 data_dir = os.getenv("DATA_DIR", "/app/data")
 audio_dir = os.path.join(data_dir, "audio")
 celery_dir = os.path.join(data_dir, "celery")
+segments_dir = os.path.join(data_dir, "segments")
+normalized_dir = os.path.join(data_dir, "normalized")
 
 # Stellen Sie sicher, dass die Verzeichnisse existieren
-for directory in [audio_dir, celery_dir]:
+for directory in [audio_dir, celery_dir, segments_dir, normalized_dir]:
     os.makedirs(directory, exist_ok=True)
 
 # Logger konfigurieren
@@ -26,8 +83,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Celery-App initialisieren
-app = Celery(__name__, broker=redis_url, backend=redis_url)
+# Celery-App initialisieren; bulk_import importiert dieses Modul und
+# registriert den Import-Task erst beim Laden durch den Worker
+app = Celery(__name__, broker=redis_url, backend=redis_url, include=["bulk_import"])
+
+# ASR-Backends mit Connection-Pool, Circuit Breaker und Lastverteilung
+asr = ASRPool(whisper_service_urls, redis_url)
 
 # Celery Beat Zeitplan für periodische Aufgaben
 app.conf.beat_schedule = {
@@ -38,12 +99,52 @@ app.conf.beat_schedule = {
         ),  # Jeden Sonntag um 2 Uhr morgens
         "args": (7,),  # Dateien älter als 7 Tage löschen
     },
-    "health-check-every-hour": {
+    "cleanup-upload-sessions-hourly": {
+        "task": "task.cleanup_upload_sessions",
+        "schedule": crontab(minute=30),  # Jede Stunde
+    },
+    "reconcile-transcription-jobs": {
+        "task": "task.reconcile_transcription_jobs",
+        "schedule": crontab(minute="*/5"),  # Alle 5 Minuten
+    },
+    "health-check-every-minute": {
         "task": "task.health_check_transcription_service",
-        "schedule": crontab(minute=0),  # Jede Stunde
+        "schedule": crontab(),  # Jede Minute, speist den Circuit Breaker
     },
 }
 app.conf.timezone = "UTC"
+# Prioritäten 0 (zuerst) bis MAX_JOB_PRIORITY als eigene Redis-Listen pro Queue.
+# Jeder Worker-Prozess reserviert nur einen Task, damit später eingereihte,
+# wichtigere Jobs nicht hinter bereits reservierten warten.
+app.conf.broker_transport_options = {
+    "priority_steps": list(range(MAX_JOB_PRIORITY + 1)),
+    "sep": ":",
+    "queue_order_strategy": "priority",
+}
+app.conf.worker_prefetch_multiplier = 1
+
+# Startzeiten laufender Tasks dieses Prozesses, für celery_task_duration_seconds
+_task_started: Dict[str, float] = {}
+
+
+def _task_prerun(task_id: str, **kwargs):
+    _task_started[task_id] = time.monotonic()
+
+
+def _task_postrun(task_id: str, task: Task, state: Optional[str] = None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        metrics.observe(
+            "celery_task_duration_seconds",
+            time.monotonic() - started,
+            task=task.name,
+            state=state or "UNKNOWN",
+        )
+
+
+if metrics.METRICS_ENABLED:
+    task_prerun.connect(_task_prerun, weak=False)
+    task_postrun.connect(_task_postrun, weak=False)
 
 
 @app.task
@@ -57,14 +158,281 @@ def dummy_task():
     return "Task completed"
 
 
-@app.task
-def submit_transcription(meeting_id: int, audio_path: str) -> Dict[str, Any]:
+def _finish_transcription(
+    meeting_id: int,
+    transcript_text: str,
+    job_id: Optional[str],
+    asr_bytes: int,
+    queued_at: Optional[float],
+    transcript_segments: Optional[List[Dict[str, Any]]] = None,
+    **extra: Any,
+) -> Dict[str, Any]:
+    latency_seconds = round(time.time() - queued_at, 3) if queued_at else None
+    logger.info(
+        f"Transcription finished for job {job_id} "
+        f"({asr_bytes} bytes sent to ASR, end-to-end {latency_seconds}s)"
+    )
+
+    # Ergebnis direkt aus dem Worker in die Datenbank schreiben
+    result = process_completed_transcript(
+        meeting_id,
+        transcript_text,
+        job_id=job_id,
+        asr_bytes=asr_bytes,
+        latency_seconds=latency_seconds,
+        transcript_segments=transcript_segments,
+    )
+    return {**result, **extra}
+
+
+def choose_queue(audio_seconds: Optional[float], priority: Optional[str] = None) -> str:
+    """
+    Wählt die Celery-Queue für eine Transkription.
+
+    Args:
+        audio_seconds: Länge der Aufnahme, falls bekannt
+        priority: Explizit gewünschte Queue (interactive oder bulk)
+
+    Returns:
+        Name der Queue; ohne Angabe entscheidet die Länge der Aufnahme
+    """
+    if priority in TRANSCRIPTION_QUEUES:
+        return priority
+    if audio_seconds is not None and audio_seconds > interactive_max_seconds:
+        return BULK_QUEUE
+    return INTERACTIVE_QUEUE
+
+
+def annotate_job_estimates(jobs: List[TranscriptionJob]) -> List[TranscriptionJob]:
+    """
+    Ergänzt offene Jobs um Zeitschätzungen aus dem gelernten ASR-Durchsatz.
+
+    Wartende Jobs bekommen ihre Position in der Queue und den geschätzten Start
+    (Audio-Sekunden vor dem Job geteilt durch den Durchsatz aller Backends),
+    laufende ihren Fortschritt und das geschätzte Ende.
+    """
+    statuses = {job.status for job in jobs}
+    if not statuses & set(ACTIVE_JOB_STATUSES):
+        return jobs
+    rates = list(asr.throughput().values())
+    total_rate = sum(rates) * asr.concurrency
+    if total_rate <= 0:
+        # Ohne Durchsatz (z.B. ASR_REALTIME_FACTOR=0) keine Schätzung
+        return jobs
+    slot_rate = sum(rates) / len(rates)
+    backlog = db.get_queue_backlog() if TranscriptionStatus.PENDING in statuses else {}
+    now = datetime.now()
+    for job in jobs:
+        if job.job_id in backlog:
+            job.queue_position, seconds_ahead = backlog[job.job_id]
+            job.estimated_start = now + timedelta(seconds=seconds_ahead / total_rate)
+        elif job.status == TranscriptionStatus.PROCESSING and job.audio_seconds:
+            _estimate_progress(job, slot_rate, total_rate, now)
+    return jobs
+
+
+def _estimate_progress(
+    job: TranscriptionJob, slot_rate: float, total_rate: float, now: datetime
+):
+    # Lange Aufnahmen laufen in Segmenten parallel auf mehreren Backends
+    rate = slot_rate
+    if job.audio_seconds > chunk_threshold_seconds:
+        segments = math.ceil(job.audio_seconds / segment_target_seconds)
+        rate = min(slot_rate * segments, total_rate)
+    expected = job.audio_seconds / rate
+
+    # Fertige Segmente zählen sicher, dazwischen wird nach Laufzeit geschätzt
+    progress = (job.progress_seconds or 0.0) / job.audio_seconds
+    if job.started_at:
+        elapsed = (now - job.started_at).total_seconds()
+        progress = max(progress, min(elapsed / expected, MAX_ESTIMATED_PROGRESS))
+    job.progress = min(progress, 1.0)
+    job.estimated_finish = now + timedelta(seconds=expected * (1 - job.progress))
+
+
+def _follow_up(task: Task, signature: Signature) -> Signature:
+    # Folge-Tasks mit Queue und Priorität des laufenden Tasks einreihen,
+    # sonst landen sie in der Default-Queue
+    info = task.request.delivery_info or {}
+    options = {"queue": info.get("routing_key"), "priority": info.get("priority")}
+    return signature.set(
+        **{key: value for key, value in options.items() if value is not None}
+    )
+
+
+def _publish_job(job: Optional[TranscriptionJob]):
+    # Laufende Jobs mit Fortschritt und geschätztem Ende verteilen
+    if job is not None:
+        annotate_job_estimates([job])
+    publish_job_update(job)
+
+
+def _set_job_status(job_id: str, status: TranscriptionStatus):
+    # Statuswechsel speichern und an offene Queue-Ansichten verteilen
+    _publish_job(db.update_transcription_job_status(job_id, status))
+
+
+def _fail_transcription(job_id: Optional[str], error_msg: str, **extra: Any):
+    logger.error(error_msg)
+    if job_id:
+        _set_job_status(job_id, TranscriptionStatus.FAILED)
+    return {"error": error_msg, "status": "failed", **extra}
+
+
+class TranscriptionTask(Task):
+    """
+    Basisklasse für Tasks einer Transkription.
+
+    Scheitert ein Task endgültig (nach allen Retries), wird der Job, dessen
+    job_id als Keyword-Argument übergeben wurde, als fehlgeschlagen markiert.
+    """
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        job_id = kwargs.get("job_id")
+        if job_id:
+            _set_job_status(job_id, TranscriptionStatus.FAILED)
+
+
+@app.task(bind=True, base=TranscriptionTask)
+def normalize_audio(
+    self,
+    meeting_id: int,
+    audio_path: str,
+    audio_sha256: Optional[str] = None,
+    queued_at: Optional[float] = None,
+    job_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Bereitet eine Audiodatei für den Whisper-Service vor und ersetzt sich dann
+    durch submit_transcription.
+
+    Die Aufnahme wird auf 16 kHz Mono-Opus heruntergerechnet und Stille am Anfang
+    und Ende abgeschnitten. Das Ergebnis wird unter dem SHA-256 des Originals
+    zwischengespeichert. Schlägt die Vorverarbeitung fehl, wird das Original
+    übertragen.
+
+    Args:
+        meeting_id: ID des Meetings
+        audio_path: Pfad zur Audiodatei
+        audio_sha256: SHA-256 der Audiodatei (wird sonst berechnet)
+        queued_at: Zeitpunkt (Unix-Zeit) der Einreihung, für die Latenzmessung
+        job_id: ID des Transkriptionsjobs (Standard: ID dieses Tasks)
+
+    Returns:
+        Ergebnis von submit_transcription
+    """
+    if queued_at and not self.request.retries:
+        metrics.observe(
+            "transcription_wait_seconds",
+            time.time() - queued_at,
+            queue=(self.request.delivery_info or {}).get("routing_key") or "",
+        )
+    queued_at = queued_at or time.time()
+    job_id = job_id or self.request.id
+    _set_job_status(job_id, TranscriptionStatus.PROCESSING)
+    full_audio_path = os.path.join(data_dir, audio_path)
+    normalized_path, time_offset = audio_path, 0.0
+
+    try:
+        if not audio_sha256:
+            audio_sha256 = file_sha256(full_audio_path)
+
+        artifact = os.path.join(normalized_dir, f"{audio_sha256}.ogg")
+        metadata_file = os.path.join(normalized_dir, f"{audio_sha256}.json")
+        if not os.path.exists(metadata_file):
+            duration = probe_duration(full_audio_path)
+            start, end = speech_bounds(duration, detect_silences(full_audio_path))
+
+            # Erst vollständig schreiben, dann umbenennen, damit parallele Jobs
+            # nie ein halbes Artefakt sehen
+            temp_artifact = f"{artifact}.{uuid.uuid4().hex}.ogg"
+            normalize_for_asr(full_audio_path, start, end, temp_artifact)
+            os.replace(temp_artifact, artifact)
+            with open(metadata_file, "w") as f:
+                json.dump({"offset": start, "duration": end - start}, f)
+        else:
+            # Zeitstempel auffrischen, damit cleanup_audio_files es behält
+            os.utime(metadata_file)
+            os.utime(artifact)
+
+        with open(metadata_file) as f:
+            time_offset = json.load(f)["offset"]
+        normalized_path = os.path.relpath(artifact, data_dir)
+
+        logger.info(
+            f"Normalized {audio_path}: {os.path.getsize(full_audio_path)} -> "
+            f"{os.path.getsize(artifact)} bytes, trimmed {time_offset:.2f}s at start"
+        )
+    except Exception as e:
+        logger.warning(f"Audio normalization failed, sending original: {e}")
+
+    return self.replace(
+        _follow_up(
+            self,
+            submit_transcription.s(
+                meeting_id,
+                normalized_path,
+                audio_sha256,
+                time_offset=time_offset,
+                queued_at=queued_at,
+                job_id=job_id,
+            ),
+        )
+    )
+
+
+def enqueue_transcriptions(jobs: List[TranscriptionJob], audio_files: Dict[int, str]):
+    """
+    Reiht viele bereits angelegte Jobs als eine Celery-Gruppe ein.
+
+    Alle Nachrichten gehen über eine Broker-Verbindung; Queue und Priorität
+    stammen aus dem jeweiligen Job.
+
+    Args:
+        jobs: Angelegte Jobs (Status pending)
+        audio_files: Pfad der Audiodatei je Meeting-ID
+    """
+    if not jobs:
+        return
+    queued_at = time.time()
+    group(
+        normalize_audio.signature(
+            (job.meeting_id, audio_files[job.meeting_id], job.audio_sha256),
+            {"queued_at": queued_at, "job_id": job.job_id},
+            task_id=job.job_id,
+            queue=job.queue,
+            priority=job.priority,
+        )
+        for job in jobs
+    ).apply_async()
+
+
+@app.task(bind=True, base=TranscriptionTask, **ASR_RETRY_POLICY)
+def submit_transcription(
+    self,
+    meeting_id: int,
+    audio_path: str,
+    audio_sha256: Optional[str] = None,
+    time_offset: float = 0.0,
+    queued_at: Optional[float] = None,
+    job_id: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Sendet eine Audiodatei an den Whisper-Transkriptionsservice.
 
+    Wurde derselbe Audio-Inhalt mit demselben Modell und derselben Sprache
+    bereits transkribiert, wird das gecachte Transkript ohne ASR-Aufruf verwendet.
+    Lange Aufnahmen werden an Stillen in Segmente geteilt, die parallel als
+    Celery-Chord transkribiert und danach wieder zusammengesetzt werden.
+    Ist der Service nicht erreichbar, wird der Task mit Backoff wiederholt.
+
     Args:
         meeting_id: ID des Meetings
         audio_path: Pfad zur Audiodatei
+        audio_sha256: SHA-256 der Audiodatei (wird sonst berechnet)
+        time_offset: Abgeschnittene Sekunden am Anfang der Originalaufnahme
+        queued_at: Zeitpunkt (Unix-Zeit) der Einreihung, für die Latenzmessung
+        job_id: ID des Transkriptionsjobs, der mit dem Ergebnis abgeschlossen wird
 
     Returns:
         Dictionary mit job_id und Status
@@ -77,62 +445,258 @@ def submit_transcription(meeting_id: int, audio_path: str) -> Dict[str, Any]:
     full_audio_path = os.path.join(data_dir, audio_path)
 
     if not os.path.exists(full_audio_path):
-        error_msg = f"Audio file not found: {full_audio_path}"
-        logger.error(error_msg)
-        return {"error": error_msg, "status": "failed"}
+        return _fail_transcription(job_id, f"Audio file not found: {full_audio_path}")
 
     try:
-        # Datei an den Whisper-Service senden
-        with open(full_audio_path, "rb") as audio_file:
-            files = {"audio_file": audio_file}
-            response = requests.post(
-                f"{whisper_service_url}/asr",
-                files=files,
-                data={"task": "transcribe", "language": "de", "output": "txt"},
+        # Bereits vorhandenes Transkript für denselben Inhalt wiederverwenden
+        if not audio_sha256:
+            audio_sha256 = file_sha256(full_audio_path)
+        cached = db.get_cached_transcript(audio_sha256, asr_model, asr_language)
+        if cached is not None:
+            logger.info(f"Reusing cached transcript {audio_sha256}")
+            return _finish_transcription(
+                meeting_id,
+                "\n".join(segment.text for segment in cached),
+                job_id,
+                asr_bytes=0,
+                queued_at=queued_at,
+                transcript_segments=[segment.model_dump() for segment in cached],
+                cached=True,
             )
 
-        if response.status_code == 200:
-            # Generiere eine eindeutige Job-ID, da der Service keine zurückgibt
-            import uuid
+        # Lange Aufnahmen in Segmente aufteilen; die gemessene Länge der
+        # (gekürzten) Datei ist die Basis der Fortschrittsanzeige
+        duration, segments = _plan_chunked_transcription(full_audio_path)
+        if job_id:
+            _publish_job(db.set_transcription_job_duration(job_id, duration))
+        if segments is None:
+            # Datei an das am wenigsten ausgelastete Whisper-Backend senden
+            with (
+                asr.backend(duration) as backend,
+                open(full_audio_path, "rb") as audio_file,
+            ):
+                response = backend.transcribe(audio_file, asr_language, output="json")
 
-            job_id = f"job_{uuid.uuid4()}"
-
-            # Speichere die Antwort als Transkript
-            transcript_text = response.text
-
-            # Transkript in Datei speichern
-            transcript_dir = os.path.join(data_dir, "transcripts")
-            os.makedirs(transcript_dir, exist_ok=True)
-
-            transcript_file = os.path.join(
-                transcript_dir, f"meeting_{meeting_id}_transcript.txt"
+            # Speichere die Antwort als Transkript und merke sie für denselben Inhalt
+            block = _transcript_block(
+                response.json(), time_offset, time_offset + duration
+            )
+            return _store_transcript_blocks(
+                meeting_id,
+                audio_sha256,
+                [block],
+                job_id,
+                asr_bytes=os.path.getsize(full_audio_path),
+                queued_at=queued_at,
             )
-            with open(transcript_file, "w", encoding="utf-8") as f:
-                f.write(transcript_text)
-
-            logger.info(f"Transcript saved to {transcript_file} for job {job_id}")
 
-            # Verarbeite das Transkript direkt, da es bereits vollständig ist
-            process_completed_transcript.delay(meeting_id, transcript_text)
+        segment_dir = os.path.join(segments_dir, self.request.id or uuid.uuid4().hex)
+        os.makedirs(segment_dir, exist_ok=True)
+        # Normalisierte Dateien nicht erneut (und größer) kodieren
+        normalized = os.path.dirname(full_audio_path) == normalized_dir
+        extension = ".ogg" if normalized else ".flac"
 
-            return {
-                "job_id": job_id,
-                "status": "completed",
-                "meeting_id": meeting_id,
-                "transcript_file": transcript_file,
-            }
-        else:
-            error_msg = f"Error submitting transcription: {response.text}"
-            logger.error(error_msg)
-            return {"error": error_msg, "status": "failed"}
+        header = []
+        for index, (start, end) in enumerate(segments):
+            segment_path = os.path.join(segment_dir, f"{index:04d}{extension}")
+            extract_segment(full_audio_path, start, end, segment_path, normalized)
+            header.append(
+                _follow_up(
+                    self,
+                    transcribe_segment.s(
+                        segment_path,
+                        index,
+                        start + time_offset,
+                        duration=end - start,
+                        job_id=job_id,
+                    ),
+                )
+            )
 
+    except RETRYABLE_ERRORS:
+        # Celery wiederholt den Task (autoretry_for)
+        raise
     except Exception as e:
         import traceback
 
         stack_trace = traceback.format_exc()
-        error_msg = f"Exception during transcription submission: {str(e)}"
-        logger.error(f"{error_msg}\n{stack_trace}")
-        return {"error": error_msg, "stack_trace": stack_trace, "status": "failed"}
+        return _fail_transcription(
+            job_id,
+            f"Exception during transcription submission: {str(e)}\n{stack_trace}",
+            stack_trace=stack_trace,
+        )
+
+    # Task durch den Chord ersetzen; das Ergebnis von stitch_transcript_segments
+    # wird unter der ID dieses Tasks abgelegt. replace() muss außerhalb des
+    # try-Blocks stehen, da es intern eine Exception wirft.
+    logger.info(
+        f"Splitting meeting {meeting_id} into {len(header)} segments for parallel ASR"
+    )
+    return self.replace(
+        chord(
+            header,
+            _follow_up(
+                self,
+                stitch_transcript_segments.s(
+                    meeting_id,
+                    audio_sha256,
+                    segment_dir,
+                    queued_at=queued_at,
+                    job_id=job_id,
+                ),
+            ),
+        )
+    )
+
+
+def _transcript_block(
+    result: Dict[str, Any], start: float, end: float
+) -> Dict[str, Any]:
+    """
+    Wandelt eine JSON-Antwort von Whisper in einen Transkript-Block.
+
+    Die Zeitstempel der Whisper-Segmente werden um start auf die
+    Originalaufnahme verschoben. Der Text des Blocks ist eine Zeile pro Segment.
+    """
+    cues = [
+        {
+            "start": segment["start"] + start,
+            "end": segment["end"] + start,
+            # Zeilenumbrüche trennen im gespeicherten Block die Segmente
+            "text": " ".join(segment["text"].split()),
+            "avg_logprob": segment.get("avg_logprob"),
+        }
+        for segment in result.get("segments", [])
+    ]
+    return {
+        "start": start,
+        "end": end,
+        "text": "\n".join(cue["text"] for cue in cues),
+        "cues": cues,
+    }
+
+
+def _store_transcript_blocks(
+    meeting_id: int,
+    audio_sha256: str,
+    blocks: List[Dict[str, Any]],
+    job_id: Optional[str],
+    asr_bytes: int,
+    queued_at: Optional[float],
+    **extra: Any,
+) -> Dict[str, Any]:
+    # Blöcke ohne Sprache weglassen; ganz ohne bleibt ein leeres Transkript
+    blocks = [block for block in blocks if block["cues"]] or [{"text": ""}]
+    db.cache_transcript(
+        audio_sha256,
+        asr_model,
+        asr_language,
+        [TranscriptSegment(**block) for block in blocks],
+    )
+    return _finish_transcription(
+        meeting_id,
+        "\n".join(block["text"] for block in blocks),
+        job_id,
+        asr_bytes=asr_bytes,
+        queued_at=queued_at,
+        transcript_segments=blocks,
+        **extra,
+    )
+
+
+def _plan_chunked_transcription(full_audio_path: str):
+    # Nur lange Aufnahmen lohnen das Aufteilen; ohne ffmpeg wird am Stück übertragen
+    try:
+        duration = probe_duration(full_audio_path)
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        logger.warning(f"Could not probe {full_audio_path}, not splitting: {e}")
+        # Dauer für die Lastverteilung grob schätzen (128 kbit/s)
+        return os.path.getsize(full_audio_path) / 16000, None
+
+    if duration <= chunk_threshold_seconds:
+        return duration, None
+
+    segments = plan_segments(
+        duration,
+        detect_silences(full_audio_path),
+        segment_target_seconds,
+        segment_max_seconds,
+    )
+    return duration, (segments if len(segments) > 1 else None)
+
+
+@app.task(base=TranscriptionTask, **ASR_RETRY_POLICY)
+def transcribe_segment(
+    segment_path: str,
+    index: int,
+    offset: float,
+    duration: float = 0.0,
+    job_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Transkribiert ein einzelnes Segment einer langen Aufnahme.
+
+    Args:
+        segment_path: Pfad zur Segmentdatei
+        index: Position des Segments in der Aufnahme
+        offset: Startzeit des Segments in der Originalaufnahme (Sekunden)
+        duration: Länge des Segments (Sekunden), für die Lastverteilung
+        job_id: ID des Transkriptionsjobs, der bei einem Fehler scheitert
+
+    Returns:
+        Dictionary mit Index, übertragenen Bytes und dem Transkript-Block mit
+        absoluten Zeitstempeln
+    """
+    logger.info(f"Transcribing segment {index} ({segment_path})")
+
+    with asr.backend(duration) as backend, open(segment_path, "rb") as audio_file:
+        result = backend.transcribe(audio_file, asr_language, output="json").json()
+    if job_id:
+        _publish_job(db.add_transcription_progress(job_id, duration))
+
+    return {
+        "index": index,
+        "bytes": os.path.getsize(segment_path),
+        "block": _transcript_block(result, offset, offset + duration),
+    }
+
+
+@app.task(base=TranscriptionTask)
+def stitch_transcript_segments(
+    results: List[Dict[str, Any]],
+    meeting_id: int,
+    audio_sha256: str,
+    segment_dir: str,
+    queued_at: Optional[float] = None,
+    job_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Setzt die Teiltranskripte eines Chords in der richtigen Reihenfolge zusammen.
+
+    Args:
+        results: Ergebnisse von transcribe_segment
+        meeting_id: ID des Meetings
+        audio_sha256: SHA-256 der Originalaufnahme (für den Transkript-Cache)
+        segment_dir: Verzeichnis mit den temporären Segmentdateien
+        queued_at: Zeitpunkt (Unix-Zeit) der Einreihung, für die Latenzmessung
+        job_id: ID des Transkriptionsjobs, der mit dem Ergebnis abgeschlossen wird
+
+    Returns:
+        Dictionary mit job_id und Status wie bei submit_transcription
+    """
+    results = sorted(results, key=lambda result: result["index"])
+    shutil.rmtree(segment_dir, ignore_errors=True)
+
+    # Ein gespeicherter Block pro Segment, mit dessen Zeitbereich
+    return _store_transcript_blocks(
+        meeting_id,
+        audio_sha256,
+        [result["block"] for result in results],
+        job_id,
+        asr_bytes=sum(result["bytes"] for result in results),
+        queued_at=queued_at,
+        chunks=len(results),
+    )
 
 
 @app.task
@@ -161,56 +725,86 @@ def poll_transcription_status(
 
 @app.task
 def process_completed_transcript(
-    meeting_id: int, transcript_text: str
+    meeting_id: int,
+    transcript_text: str,
+    job_id: Optional[str] = None,
+    asr_bytes: Optional[int] = None,
+    latency_seconds: Optional[float] = None,
+    transcript_segments: Optional[List[Dict[str, Any]]] = None,
 ) -> Dict[str, Any]:
     """
-    Verarbeitet ein fertiges Transkript und speichert es in der Datenbank.
+    Speichert ein fertiges Transkript in der Datenbank.
+
+    Mit job_id werden Transkript, Meeting- und Job-Status in einer Transaktion
+    abgeschlossen; ohne wird nur das Meeting aktualisiert.
 
     Args:
         meeting_id: ID des Meetings
         transcript_text: Der Transkriptionstext
+        job_id: ID des Transkriptionsjobs
+        asr_bytes: An den ASR-Service übertragene Bytes
+        latency_seconds: Dauer von der Einreihung bis zum Ergebnis
+        transcript_segments: Blöcke (start, end, text, cues); ohne
+            wird das Transkript ohne Zeitangaben in Blöcke geteilt
 
     Returns:
         Status-Dictionary
     """
     logger.info(f"Processing completed transcript for meeting {meeting_id}")
 
-    try:
-        # Hier würden wir normalerweise die Datenbank direkt aktualisieren
-        # Da wir aber die Datenbankverbindung nicht direkt in den Tasks haben,
-        # speichern wir das Transkript in einer Datei und aktualisieren die DB über die API
-
-        # Transkript in Datei speichern
-        transcript_dir = os.path.join(data_dir, "transcripts")
-        os.makedirs(transcript_dir, exist_ok=True)
+    segments = None
+    if transcript_segments is not None:
+        segments = [TranscriptSegment(**segment) for segment in transcript_segments]
 
-        transcript_file = os.path.join(
-            transcript_dir, f"meeting_{meeting_id}_transcript.txt"
+    if job_id:
+        job = db.complete_transcription_job(
+            job_id, transcript_text, asr_bytes, latency_seconds, segments
         )
-        with open(transcript_file, "w", encoding="utf-8") as f:
-            f.write(transcript_text)
+        publish_job_update(job)
+        if job is not None:
+            _observe_completed_job(job)
+        elif (finished := db.get_transcription_job(job_id)) is not None:
+            # Verspätete oder doppelte Meldung, das Ergebnis steht schon fest
+            logger.info(
+                f"Job {job_id} is already {finished.status.value}, ignoring transcript"
+            )
+            return {
+                "job_id": job_id,
+                "status": finished.status.value,
+                "meeting_id": meeting_id,
+            }
+        else:
+            logger.warning(f"Job {job_id} not found, saving transcript on meeting")
+            db.save_transcript(meeting_id, transcript_text, segments)
+    else:
+        db.save_transcript(meeting_id, transcript_text, segments)
 
-        # API-Endpunkt aufrufen, um das Meeting zu aktualisieren
-        # In einer realen Implementierung würden wir hier die Datenbank direkt aktualisieren
-        # oder einen API-Aufruf machen
+    return {
+        "job_id": job_id,
+        "status": "completed",
+        "meeting_id": meeting_id,
+        "asr_bytes": asr_bytes,
+        "latency_seconds": latency_seconds,
+    }
 
-        logger.info(f"Transcript saved to {transcript_file}")
-        return {
-            "status": "completed",
-            "meeting_id": meeting_id,
-            "transcript_file": transcript_file,
-        }
 
-    except Exception as e:
-        error_msg = f"Error processing transcript: {str(e)}"
-        logger.error(error_msg)
-        return {"error": error_msg, "status": "failed"}
+def _observe_completed_job(job: TranscriptionJob):
+    queue = job.queue or ""
+    if job.started_at and job.updated_at:
+        metrics.observe(
+            "transcription_run_seconds",
+            (job.updated_at - job.started_at).total_seconds(),
+            queue=queue,
+        )
+    if job.audio_seconds:
+        metrics.inc("transcription_audio_seconds_total", job.audio_seconds, queue=queue)
 
 
 @app.task
 def cleanup_audio_files(days: int = 7) -> Dict[str, Any]:
     """
-    Entfernt alte Audiodateien, die älter als die angegebene Anzahl von Tagen sind.
+    Entfernt Audiodateien, die von keinem Meeting mehr referenziert werden und
+    älter als die angegebene Anzahl von Tagen sind.
 
     Args:
         days: Dateien älter als diese Anzahl von Tagen werden gelöscht
@@ -218,21 +812,42 @@ def cleanup_audio_files(days: int = 7) -> Dict[str, Any]:
     Returns:
         Status-Dictionary mit Anzahl der gelöschten Dateien
     """
-    logger.info(f"Cleaning up audio files older than {days} days")
+    logger.info(f"Cleaning up unreferenced audio files older than {days} days")
 
     deleted_count = 0
     cutoff_date = datetime.now() - timedelta(days=days)
 
     try:
+        # Blobs ohne Referenzen aus dem Speicher entfernen
+        for relative_path in db.delete_unreferenced_audio_blobs(cutoff_date):
+            file_path = os.path.join(data_dir, relative_path)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+                deleted_count += 1
+                logger.info(f"Deleted unreferenced blob: {file_path}")
+
+        # Verwaiste Dateien (z.B. abgebrochene Uploads) ohne Datenbankeintrag
+        referenced = db.get_referenced_audio_files()
         for root, _, files in os.walk(audio_dir):
             for filename in files:
                 file_path = os.path.join(root, filename)
-                file_mod_time = datetime.fromtimestamp(os.path.getmtime(file_path))
+                if os.path.relpath(file_path, data_dir) in referenced:
+                    continue
 
+                file_mod_time = datetime.fromtimestamp(os.path.getmtime(file_path))
                 if file_mod_time < cutoff_date:
                     os.remove(file_path)
                     deleted_count += 1
-                    logger.info(f"Deleted old file: {file_path}")
+                    logger.info(f"Deleted orphaned file: {file_path}")
+
+        # Normalisierte Artefakte sind nur ein Cache und werden bei Bedarf neu erzeugt
+        for filename in os.listdir(normalized_dir):
+            file_path = os.path.join(normalized_dir, filename)
+            file_mod_time = datetime.fromtimestamp(os.path.getmtime(file_path))
+            if file_mod_time < cutoff_date:
+                os.remove(file_path)
+                deleted_count += 1
+                logger.info(f"Deleted normalized artifact: {file_path}")
 
         return {
             "status": "completed",
@@ -246,41 +861,223 @@ def cleanup_audio_files(days: int = 7) -> Dict[str, Any]:
         return {"error": error_msg, "status": "failed"}
 
 
+def _backend_status(meta: Dict[str, Any]) -> Optional[TranscriptionStatus]:
+    # Celery-Zustand auf den Job-Status abbilden; None heißt "nichts Neues"
+    state = meta.get("status")
+    if state == "SUCCESS":
+        result = meta.get("result")
+        if isinstance(result, dict) and result.get("status") == "failed":
+            return TranscriptionStatus.FAILED
+        return TranscriptionStatus.COMPLETED
+    if state in ("FAILURE", "REVOKED"):
+        return TranscriptionStatus.FAILED
+    if state in ("STARTED", "RETRY"):
+        return TranscriptionStatus.PROCESSING
+    return None
+
+
+def reconcile_job_states(jobs: List[TranscriptionJob]) -> List[TranscriptionJob]:
+    """
+    Gleicht offene Jobs mit dem Celery-Result-Backend ab.
+
+    Fängt Jobs auf, deren Worker abgestürzt ist, bevor er den Status selbst
+    schreiben konnte. Die Zustände aller Jobs werden mit einem einzigen MGET
+    gelesen und alle Statuswechsel in einer Transaktion gespeichert.
+
+    Args:
+        jobs: Zu prüfende Jobs; abgeschlossene werden übersprungen
+
+    Returns:
+        Die geänderten Jobs
+    """
+    active = [job for job in jobs if job.status in ACTIVE_JOB_STATUSES]
+    if not active:
+        return []
+
+    try:
+        values = app.backend.mget(
+            [app.backend.get_key_for_task(job.job_id) for job in active]
+        )
+    except Exception as e:
+        logger.warning(f"Could not read task states from result backend: {e}")
+        return []
+
+    changed = db.apply_transcription_job_statuses(
+        _changed_job_statuses(active, _decode_task_metas(values))
+    )
+    publish_job_updates(changed)
+    return changed
+
+
+async def reconcile_job_states_async(
+    jobs: List[TranscriptionJob],
+) -> List[TranscriptionJob]:
+    """
+    Wie reconcile_job_states, aber ohne die Event-Loop zu blockieren.
+
+    Für die FastAPI-Handler: das MGET läuft über redis.asyncio, die
+    Datenbank-Transaktion im Thread-Pool der Datenbank.
+    """
+    active = [job for job in jobs if job.status in ACTIVE_JOB_STATUSES]
+    if not active:
+        return []
+
+    try:
+        metas = await get_task_metas([job.job_id for job in active])
+    except Exception as e:
+        logger.warning(f"Could not read task states from result backend: {e}")
+        return []
+
+    statuses = _changed_job_statuses(active, metas)
+    if not statuses:
+        return []
+    changed = await adb.apply_transcription_job_statuses(statuses)
+    await asyncio.to_thread(publish_job_updates, changed)
+    return changed
+
+
+_async_results: Optional[redis.asyncio.Redis] = None
+
+
+async def get_task_metas(task_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Liest die Ergebnisse mehrerer Celery-Tasks mit einem asynchronen MGET.
+
+    Returns:
+        Metadaten (status, result, ...) je Task, None für unbekannte Tasks
+    """
+    if not task_ids:
+        return []
+    values = await _async_redis().mget(
+        [app.backend.get_key_for_task(task_id) for task_id in task_ids]
+    )
+    return _decode_task_metas(values)
+
+
+def _async_redis() -> redis.asyncio.Redis:
+    global _async_results
+    if _async_results is None:
+        _async_results = redis.asyncio.Redis.from_url(
+            redis_url, socket_timeout=1, socket_connect_timeout=1
+        )
+    return _async_results
+
+
+async def get_broker_queue_lengths() -> Dict[str, int]:
+    """
+    Wartende Nachrichten je Celery-Queue, über alle Prioritäten.
+
+    Kombu legt pro Priorität eine eigene Liste an (<queue>:<priorität>,
+    Priorität 0 ohne Suffix); alle werden mit einer Pipeline gelesen.
+    """
+    queues = (*TRANSCRIPTION_QUEUES, app.conf.task_default_queue)
+    async with _async_redis().pipeline(transaction=False) as pipe:
+        for queue in queues:
+            pipe.llen(queue)
+            for priority in range(1, MAX_JOB_PRIORITY + 1):
+                pipe.llen(f"{queue}:{priority}")
+        lengths = await pipe.execute()
+    steps = MAX_JOB_PRIORITY + 1
+    return {
+        queue: sum(lengths[index * steps : (index + 1) * steps])
+        for index, queue in enumerate(queues)
+    }
+
+
+def _decode_task_metas(values: List[Optional[bytes]]) -> List[Optional[Dict[str, Any]]]:
+    return [
+        None if value is None else app.backend.decode_result(value) for value in values
+    ]
+
+
+def _changed_job_statuses(
+    jobs: List[TranscriptionJob], metas: List[Optional[Dict[str, Any]]]
+) -> Dict[str, TranscriptionStatus]:
+    statuses = {}
+    for job, meta in zip(jobs, metas):
+        if meta is None:
+            continue
+        status = _backend_status(meta)
+        if status is not None and status != job.status:
+            statuses[job.job_id] = status
+    return statuses
+
+
 @app.task
-def health_check_transcription_service() -> Dict[str, Any]:
+def reconcile_transcription_jobs(batch_size: int = 500) -> Dict[str, Any]:
     """
-    Überprüft die Verfügbarkeit des Whisper-Transkriptionsdienstes.
+    Gleicht regelmäßig alle offenen Jobs mit dem Celery-Result-Backend ab.
+
+    Args:
+        batch_size: Anzahl Jobs pro MGET
 
     Returns:
-        Status-Dictionary
+        Status-Dictionary mit Anzahl geprüfter und geänderter Jobs
+    """
+    jobs = db.get_active_transcription_jobs()
+    changed = 0
+    for start in range(0, len(jobs), batch_size):
+        changed += len(reconcile_job_states(jobs[start : start + batch_size]))
+
+    logger.info(f"Reconciled {len(jobs)} open jobs, {changed} changed")
+    return {"status": "completed", "checked": len(jobs), "changed": changed}
+
+
+@app.task
+def cleanup_upload_sessions() -> Dict[str, Any]:
     """
-    logger.info("Performing health check on transcription service")
+    Entfernt abgelaufene resumierbare Uploads samt ihrer Teildateien.
+
+    Returns:
+        Status-Dictionary mit Anzahl der gelöschten Sitzungen
+    """
+    logger.info("Cleaning up expired upload sessions")
 
     try:
-        response = requests.get(f"{whisper_service_url}/health")
+        sessions = db.delete_expired_upload_sessions()
+        for session in sessions:
+            part_path = upload_part_path(session.id)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            logger.info(f"Deleted expired upload session {session.id}")
 
-        if response.status_code == 200:
-            return {
-                "status": "healthy",
-                "service": "whisper",
-                "timestamp": datetime.now().isoformat(),
-            }
-        else:
-            error_msg = f"Health check failed with status code {response.status_code}: {response.text}"
-            logger.error(error_msg)
-            return {
-                "status": "unhealthy",
-                "service": "whisper",
-                "error": error_msg,
-                "timestamp": datetime.now().isoformat(),
-            }
+        return {"status": "completed", "deleted_count": len(sessions)}
 
     except Exception as e:
-        error_msg = f"Health check exception: {str(e)}"
+        error_msg = f"Error during upload session cleanup: {str(e)}"
         logger.error(error_msg)
-        return {
-            "status": "error",
-            "service": "whisper",
-            "error": error_msg,
-            "timestamp": datetime.now().isoformat(),
-        }
+        return {"error": error_msg, "status": "failed"}
+
+
+@app.task
+def health_check_transcription_service() -> Dict[str, Any]:
+    """
+    Überprüft die Verfügbarkeit aller Whisper-Backends.
+
+    Backends, die mehrmals in Folge nicht erreichbar sind, werden über ihren
+    Circuit Breaker gesperrt und bekommen keine neuen Transkriptionen, bis sie
+    wieder gesund sind oder die Sperre abläuft.
+
+    Returns:
+        Status-Dictionary mit dem Zustand jedes Backends
+    """
+    logger.info("Performing health check on transcription services")
+
+    backends = asr.health()
+    healthy = [backend for backend in backends if backend["status"] == "healthy"]
+    for backend in backends:
+        if backend["status"] != "healthy":
+            logger.error(f"{backend['backend']}: {backend['error']}")
+
+    if len(healthy) == len(backends):
+        status = "healthy"
+    elif healthy:
+        status = "degraded"
+    else:
+        status = "unhealthy"
+    return {
+        "status": status,
+        "service": "whisper",
+        "backends": backends,
+        "timestamp": datetime.now().isoformat(),
+    }
@@ -0,0 +1,100 @@
+"""Nachbildung des Whisper-ASR-Webservice (/asr und /health) für Tests."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+
+class StubASR:
+    """
+    Whisper-Backend auf einem freien lokalen Port.
+
+    Das Verhalten lässt sich über die Attribute steuern: delay verzögert jede
+    Antwort, fail beantwortet so viele der nächsten /asr-Requests mit
+    fail_status und healthy=False lässt /health mit 503 antworten.
+    """
+
+    def __init__(self):
+        self.delay = 0.0
+        self.fail = 0
+        self.fail_status = 503
+        self.healthy = True
+        # Größe jedes erfolgreich beantworteten Requests in Bytes
+        self.requests: List[int] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        # Kurzes Poll-Intervall, damit stop() nicht eine halbe Sekunde wartet
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> "StubASR":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _transcribe(self, body: bytes):
+        """Liefert Statuscode und Antwort für einen /asr-Request."""
+        with self._lock:
+            if self.fail > 0:
+                self.fail -= 1
+                return self.fail_status, b"busy"
+            self.requests.append(len(body))
+            number = len(self.requests)
+
+        if b'name="output"\r\n\r\njson' not in body:
+            return 200, f"Teil {number}".encode()
+        # Zeitstempel relativ zum Anfang der gesendeten Datei, wie bei Whisper
+        result = {
+            "text": f" Teil {number}. Ende",
+            "segments": [
+                {
+                    "start": 0.5,
+                    "end": 2.0,
+                    "text": f" Teil {number}.",
+                    "avg_logprob": -0.2,
+                },
+                {"start": 2.5, "end": 4.0, "text": " Ende", "avg_logprob": -0.7},
+            ],
+        }
+        return 200, json.dumps(result).encode()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _respond(self, status: int, body: bytes):
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path != "/health":
+                    self._respond(404, b"not found")
+                elif stub.healthy:
+                    self._respond(200, b"ok")
+                else:
+                    self._respond(503, b"model not loaded")
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                time.sleep(stub.delay)
+                if self.path.split("?")[0] != "/asr":
+                    self._respond(404, b"not found")
+                    return
+                self._respond(*stub._transcribe(body))
+
+        return Handler
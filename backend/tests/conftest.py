@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+
+import pytest
+import redis
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Wie im Container (WORKDIR /app): Datenbank, Daten und Templates liegen relativ
+# zum Arbeitsverzeichnis. Vor dem ersten Import der Module setzen, die beim
+# Import Verzeichnisse und die db-Singleton-Instanz anlegen.
+_workdir = Path(tempfile.mkdtemp(prefix="backend-tests-"))
+(_workdir / "templates").symlink_to(BACKEND_DIR / "templates")
+os.chdir(_workdir)
+os.environ["DATA_DIR"] = str(_workdir / "data")
+os.environ["UPLOAD_FOLDER"] = str(_workdir / "data" / "uploads")
+os.environ["IMPORT_DIR"] = str(_workdir / "data" / "import")
+
+import database  # noqa: E402
+import events  # noqa: E402
+from asr_stub import StubASR  # noqa: E402
+from cache import FragmentCache  # noqa: E402
+
+# Module, die die db-Singleton-Instanz beim Import übernehmen
+DB_MODULES = ("database", "main", "task", "export", "bulk_import")
+
+
+class StatementLog(List[str]):
+    """SQL-Statements der Verbindungen einer Database, in Ausführungsreihenfolge."""
+
+    def __call__(self, statement: str):
+        self.append(statement)
+
+    def issued(self) -> List[str]:
+        """
+        Nur die Statements, die die Anwendung selbst absetzt.
+
+        Ohne die internen Statements von FTS5 und ohne die Wiederholungen, mit
+        denen SQLite ein Statement für jeden ausgelösten Trigger erneut meldet.
+        """
+        issued: List[str] = []
+        for statement in self:
+            if statement.startswith("--") or "'main'." in statement:
+                continue
+            if not issued or issued[-1] != statement:
+                issued.append(statement)
+        return issued
+
+
+@pytest.fixture
+def statements(monkeypatch) -> StatementLog:
+    """
+    Zeichnet die Statements aller danach geöffneten Verbindungen auf.
+
+    Die PRAGMAs beim Öffnen einer Verbindung zählen nicht mit.
+    """
+    log = StatementLog()
+    open_connection = database.Database._open_connection
+
+    def traced(self) -> sqlite3.Connection:
+        connection = open_connection(self)
+        connection.set_trace_callback(log)
+        return connection
+
+    monkeypatch.setattr(database.Database, "_open_connection", traced)
+    return log
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch, statements) -> database.Database:
+    """Frische Datenbank pro Test, auch für die Handler und Tasks."""
+    import main  # noqa: F401  (lädt auch task, export und bulk_import)
+
+    test_db = database.Database(str(tmp_path / "meetings.db"))
+    test_adb = database.AsyncDatabase(test_db, max_workers=2)
+    for name in DB_MODULES:
+        module = sys.modules[name]
+        monkeypatch.setattr(module, "db", test_db)
+        if hasattr(module, "adb"):
+            monkeypatch.setattr(module, "adb", test_adb)
+    statements.clear()
+    yield test_db
+    test_db.close_all()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """
+    Redis im Prozess (fakeredis mit Lua), für alle danach angelegten Clients.
+
+    Der TCP-Server von fakeredis verträgt die großen SCRIPT LOAD-Payloads nicht,
+    deshalb wird Redis.from_url ersetzt.
+    """
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    server = fakeredis.FakeServer()
+
+    def from_url(url, **kwargs):
+        return fakeredis.FakeRedis(server=server)
+
+    monkeypatch.setattr(redis.Redis, "from_url", from_url)
+    # Verbindung für Queue-Updates neu anlegen lassen
+    monkeypatch.setattr(events, "_publisher", None)
+    return fakeredis.FakeRedis(server=server)
+
+
+@pytest.fixture
+def asr_stub():
+    """Startet Whisper-Stubs; Aufruf liefert ein neues, laufendes Backend."""
+    stubs = []
+
+    def start() -> StubASR:
+        stubs.append(StubASR().start())
+        return stubs[-1]
+
+    yield start
+    for stub in stubs:
+        stub.stop()
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    """TestClient der API mit leerem Antwort-Cache."""
+    from fastapi.testclient import TestClient
+
+    import main
+
+    monkeypatch.setattr(main, "fragment_cache", FragmentCache())
+    with TestClient(main.app) as test_client:
+        yield test_client
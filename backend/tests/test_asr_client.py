@@ -0,0 +1,222 @@
+"""Circuit Breaker, Lastverteilung und Durchsatzmessung des ASR-Pools."""
+
+import io
+import time
+
+import pytest
+import requests
+
+import asr_client
+from asr_client import ASRPool, ASRUnavailableError, CircuitOpenError
+
+REDIS_URL = "redis://redis:6379"
+
+
+@pytest.fixture
+def stubs(asr_stub):
+    return [asr_stub(), asr_stub()]
+
+
+@pytest.fixture
+def pool(fake_redis, stubs):
+    """Pool aus zwei Stub-Backends, je zwei gleichzeitige Requests."""
+    return ASRPool([stub.url for stub in stubs], REDIS_URL, concurrency=2)
+
+
+def leases(fake_redis, pool, index):
+    return fake_redis.zcard(pool._keys[index * 3])
+
+
+def transcribe(backend):
+    return backend.transcribe(io.BytesIO(b"\0" * 1000), "de")
+
+
+def fail_until_open(stub, backend):
+    stub.fail = asr_client.CIRCUIT_FAILURE_THRESHOLD
+    for _ in range(asr_client.CIRCUIT_FAILURE_THRESHOLD):
+        assert not backend.breaker.is_open()
+        with pytest.raises(ASRUnavailableError):
+            transcribe(backend)
+    assert backend.breaker.is_open()
+
+
+def test_acquire_prefers_least_outstanding_audio(pool):
+    assert pool._try_acquire("a", 600) == 0
+    assert pool._try_acquire("b", 60) == 1
+    # Backend 1 hat weniger ausstehende Audio-Sekunden
+    assert pool._try_acquire("c", 60) == 1
+    # Backend 1 ist voll (concurrency=2), Backend 0 hat noch einen Slot
+    assert pool._try_acquire("d", 60) == 0
+    assert pool._try_acquire("e", 60) == -1
+
+    pool._release(1, "b")
+    assert pool._try_acquire("e", 60) == 1
+
+
+def test_expired_leases_are_reclaimed(fake_redis, pool):
+    # Abgestürzte Worker geben ihre Leases nie frei
+    pool._lease_ttl = -1
+    for lease in "abc":
+        # Jeder Aufruf räumt die abgelaufenen Leases samt Last zuerst ab,
+        # Backend 0 ist also immer wieder frei
+        assert pool._try_acquire(lease, 60) == 0
+
+    assert leases(fake_redis, pool, 0) == 1
+    assert fake_redis.hkeys(pool._keys[1]) == [b"c"]
+
+
+def test_backend_releases_lease(fake_redis, pool):
+    with pool.backend(30) as backend:
+        assert leases(fake_redis, pool, pool.backends.index(backend)) == 1
+        assert transcribe(backend).text == "Teil 1"
+    assert leases(fake_redis, pool, 0) == leases(fake_redis, pool, 1) == 0
+
+    with pytest.raises(ASRUnavailableError):
+        with pool.backend(30):
+            raise ASRUnavailableError("Abbruch")
+    assert leases(fake_redis, pool, 0) == leases(fake_redis, pool, 1) == 0
+
+
+def test_open_circuit_drains_backend(pool):
+    pool.backends[0].breaker.open("Wartung")
+
+    assert pool._try_acquire("a", 60) == 1
+    assert pool._try_acquire("b", 60) == 1
+    assert pool._try_acquire("c", 60) == -1
+
+    pool.backends[1].breaker.open("Wartung")
+    assert pool._try_acquire("d", 60) == -2
+    with pytest.raises(CircuitOpenError):
+        with pool.backend(60):
+            pass
+
+
+def test_circuit_opens_after_consecutive_failures(stubs, pool):
+    fail_until_open(stubs[0], pool.backends[0])
+
+    # Offener Circuit: kein Request mehr an das Backend
+    with pytest.raises(CircuitOpenError):
+        transcribe(pool.backends[0])
+    assert stubs[0].requests == []
+
+
+def test_success_resets_failure_count(stubs, pool):
+    stub, backend = stubs[0], pool.backends[0]
+    stub.fail = asr_client.CIRCUIT_FAILURE_THRESHOLD - 1
+    for _ in range(stub.fail):
+        with pytest.raises(ASRUnavailableError):
+            transcribe(backend)
+    assert transcribe(backend).ok
+
+    stub.fail = 1
+    with pytest.raises(ASRUnavailableError):
+        transcribe(backend)
+    assert not backend.breaker.is_open()
+
+
+def test_open_circuit_expires_into_trial_request(monkeypatch, stubs, pool):
+    monkeypatch.setattr(asr_client, "CIRCUIT_OPEN_SECONDS", 1)
+    stub, backend = stubs[0], pool.backends[0]
+    fail_until_open(stub, backend)
+
+    time.sleep(1.1)
+
+    # Nach Ablauf geht wieder ein Request durch; die Fehler davor zählen noch,
+    # scheitert er, wird sofort wieder gesperrt
+    assert not backend.breaker.is_open()
+    stub.fail = 1
+    with pytest.raises(ASRUnavailableError):
+        transcribe(backend)
+    assert backend.breaker.is_open()
+
+    # Ein erfolgreicher Request setzt die Fehler zurück
+    time.sleep(1.1)
+    assert transcribe(backend).ok
+    stub.fail = 1
+    with pytest.raises(ASRUnavailableError):
+        transcribe(backend)
+    assert not backend.breaker.is_open()
+
+
+def test_health_check_opens_and_closes_circuit(stubs, pool):
+    stub, breaker = stubs[0], pool.backends[0].breaker
+
+    # Ein einzelner fehlgeschlagener Health-Check sperrt noch nicht
+    stub.healthy = False
+    for _ in range(asr_client.CIRCUIT_FAILURE_THRESHOLD):
+        assert not breaker.is_open()
+        statuses = [result["status"] for result in pool.health()]
+        assert statuses == ["unhealthy", "healthy"]
+    assert breaker.is_open()
+
+    stub.healthy = True
+    assert [result["status"] for result in pool.health()] == ["healthy", "healthy"]
+    assert not breaker.is_open()
+
+
+def test_unreachable_backend_counts_as_failure(fake_redis):
+    pool = ASRPool(["http://127.0.0.1:9"], REDIS_URL)
+    backend = pool.backends[0]
+    for _ in range(asr_client.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(requests.ConnectionError):
+            transcribe(backend)
+
+    assert backend.breaker.is_open()
+
+
+def test_client_errors_do_not_open_circuit(stubs, pool):
+    stub, backend = stubs[0], pool.backends[0]
+    stub.fail, stub.fail_status = asr_client.CIRCUIT_FAILURE_THRESHOLD, 400
+    for _ in range(asr_client.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(requests.HTTPError):
+            transcribe(backend)
+
+    assert not backend.breaker.is_open()
+
+
+def test_throughput_is_moving_average(monkeypatch, pool):
+    monkeypatch.setattr(asr_client, "ASR_THROUGHPUT_ALPHA", 0.25)
+    first, second = pool.backends
+
+    # Ohne Messung gilt die Schätzung aus der Konfiguration
+    assert pool.throughput()[first.base_url] == asr_client.ASR_REALTIME_FACTOR
+
+    # Erste Messung wird übernommen, danach gleitendes Mittel
+    pool._record_throughput(first, 60, 5)
+    assert pool.throughput()[first.base_url] == 12
+    pool._record_throughput(first, 60, 2.5)
+    assert pool.throughput()[first.base_url] == 15
+    assert pool.throughput()[second.base_url] == asr_client.ASR_REALTIME_FACTOR
+
+
+def test_successful_request_updates_throughput(stubs, pool):
+    for stub in stubs:
+        stub.delay = 0.2
+    with pool.backend(30) as backend:
+        transcribe(backend)
+
+    # 30 Audio-Sekunden in etwas mehr als 0,2 s
+    assert 30 < pool.throughput()[backend.base_url] < 150
+
+
+def test_pool_without_backends_is_rejected(fake_redis):
+    with pytest.raises(ValueError):
+        ASRPool([], REDIS_URL)
+
+
+def test_no_estimates_without_throughput(monkeypatch, pool):
+    import task
+    from models import TranscriptionJob, TranscriptionStatus
+
+    monkeypatch.setattr(task, "asr", pool)
+    monkeypatch.setattr(asr_client, "ASR_REALTIME_FACTOR", 0.0)
+    job = TranscriptionJob(
+        job_id="job-1",
+        meeting_id=1,
+        status=TranscriptionStatus.PROCESSING,
+        audio_seconds=600,
+    )
+
+    (job,) = task.annotate_job_estimates([job])
+
+    assert job.estimated_finish is None
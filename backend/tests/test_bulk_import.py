@@ -0,0 +1,118 @@
+"""Archiv-Import: keine verwaisten Blobs, Ausführung im Bulk-Worker."""
+
+import io
+import os
+import tarfile
+
+import pytest
+
+import bulk_import
+import storage
+
+MANIFEST = (
+    "title,date,file\n"
+    "Alt,2019-03-01,alt.mp3\n"
+    "Alt nochmal,2019-03-01,alt.mp3\n"
+    "Neu,2019-04-01,neu.mp3\n"
+)
+
+
+def write_archive(path, files):
+    with tarfile.open(path, "w:gz") as archive:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return str(path)
+
+
+def stored_files():
+    return {
+        os.path.relpath(os.path.join(root, name), storage.data_dir)
+        for root, _, names in os.walk(storage.audio_dir)
+        for name in names
+    }
+
+
+def test_archive_import_stores_only_new_meetings(db, tmp_path):
+    archive = write_archive(
+        tmp_path / "archiv.tar.gz",
+        {"alt.mp3": b"sitzung 2019-03", "neu.mp3": b"sitzung 2019-04"},
+    )
+    before = stored_files()
+    first = bulk_import.import_archive(
+        bulk_import.read_manifest("title,date,file\nAlt,2019-03-01,alt.mp3\n"),
+        archive,
+        transcribe=False,
+    )
+    assert first.meetings == 1
+
+    report = bulk_import.import_archive(
+        bulk_import.read_manifest(MANIFEST), archive, transcribe=False
+    )
+
+    assert (report.meetings, report.skipped) == (1, 2)
+    # Nichts Entpacktes bleibt liegen, jeder Blob gehört zu einem Meeting
+    assert stored_files() - before == db.get_referenced_audio_files() - before
+    assert len(stored_files() - before) == 2
+
+
+@pytest.fixture
+def import_queue(monkeypatch):
+    """Fängt den Import-Task ab, statt ihn an den Broker zu schicken."""
+    import main
+
+    submitted = []
+
+    class Result:
+        task_id = "import-1"
+        status = "PENDING"
+
+    def apply_async(args, **kwargs):
+        submitted.append((args, kwargs))
+        return Result()
+
+    monkeypatch.setattr(main.import_manifest, "apply_async", apply_async)
+    return submitted
+
+
+def test_import_endpoint_dispatches_to_bulk_queue(client, tmp_path, import_queue):
+    archive = write_archive(
+        tmp_path / "archiv.tar.gz",
+        {"alt.mp3": b"sitzung 2019-03", "neu.mp3": b"sitzung 2019-04"},
+    )
+    with open(archive, "rb") as f:
+        response = client.post(
+            "/imports",
+            files={
+                "manifest": ("manifest.csv", MANIFEST.encode()),
+                "archive": ("archiv.tar.gz", f.read()),
+            },
+            data={"transcribe": "false"},
+        )
+
+    assert response.status_code == 202
+    assert response.json() == {"id": "import-1", "status": "PENDING"}
+    ((args, kwargs),) = import_queue
+    assert kwargs["queue"] == bulk_import.BULK_QUEUE
+
+    # Wie im Worker: der Task importiert und räumt die Uploads auf
+    report = bulk_import.import_manifest(*args)
+
+    assert (report["meetings"], report["skipped"]) == (2, 1)
+    manifest_path, archive_path = args[:2]
+    assert not os.path.exists(manifest_path)
+    assert not os.path.exists(archive_path)
+
+
+def test_import_endpoint_rejects_invalid_archive(client, import_queue):
+    response = client.post(
+        "/imports",
+        files={
+            "manifest": ("manifest.csv", MANIFEST.encode()),
+            "archive": ("archiv.tar", b"kein archiv" * 100),
+        },
+    )
+
+    assert response.status_code == 400
+    assert import_queue == []
@@ -0,0 +1,139 @@
+"""Aufteilen langer Aufnahmen und Zusammensetzen der Teiltranskripte."""
+
+import os
+import shutil
+import subprocess
+import uuid
+from datetime import datetime
+
+import pytest
+
+import task
+from asr_client import ASRPool
+from models import MeetingCreate, TranscriptionStatus
+
+requires_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None,
+    reason="ffmpeg nicht installiert",
+)
+
+
+def write_recording(path: str, seconds: int):
+    """Ton mit zwei Sekunden Stille am Ende jedes zehnten Sekundenabschnitts."""
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency=440:duration={seconds}",
+            "-af",
+            "volume='if(lt(mod(t,10),8),1,0)':eval=frame",
+            path,
+        ],
+        check=True,
+    )
+
+
+@pytest.fixture
+def stub(db, fake_redis, asr_stub, monkeypatch, tmp_path):
+    """Whisper-Stub als einziges Backend; Aufnahmen ab 20 s werden geteilt."""
+    monkeypatch.setattr(task, "data_dir", str(tmp_path))
+    monkeypatch.setattr(task, "audio_dir", str(tmp_path / "audio"))
+    monkeypatch.setattr(task, "segments_dir", str(tmp_path / "segments"))
+    stub = asr_stub()
+    pool = ASRPool([stub.url], "redis://redis:6379", concurrency=2)
+    monkeypatch.setattr(task, "asr", pool)
+    monkeypatch.setattr(task, "chunk_threshold_seconds", 20)
+    monkeypatch.setattr(task, "segment_target_seconds", 10)
+    monkeypatch.setattr(task, "segment_max_seconds", 15)
+    return stub
+
+
+def transcribe_recording(db, seconds: int):
+    """Legt Meeting und Job an und führt submit_transcription synchron aus."""
+    meeting = db.create_meeting(MeetingCreate(title="Lang", date=datetime(2026, 1, 1)))
+    os.makedirs(task.audio_dir, exist_ok=True)
+    write_recording(os.path.join(task.audio_dir, f"{meeting.id}.wav"), seconds)
+    job = db.create_transcription_job(meeting.id, str(uuid.uuid4()))
+
+    result = task.submit_transcription.apply(
+        (meeting.id, f"audio/{meeting.id}.wav"), {"job_id": job.job_id}
+    ).get()
+    return meeting.id, job.job_id, result
+
+
+@requires_ffmpeg
+def test_long_recording_is_split_at_silences(db, stub):
+    meeting_id, job_id, result = transcribe_recording(db, 60)
+
+    assert result["status"] == "completed"
+    assert result["chunks"] == 6
+    assert len(stub.requests) == 6
+
+    blocks = list(db.iter_transcript_segments(meeting_id))
+    # Grenzen in der Mitte der Stillen (8-10 s, 18-20 s, ...)
+    assert [round(block.start) for block in blocks] == [0, 9, 19, 29, 39, 49]
+    assert blocks[-1].end == pytest.approx(60)
+    assert [block.text for block in blocks] == [
+        f"Teil {number}.\nEnde" for number in range(1, 7)
+    ]
+    # Zeitstempel der Cues beziehen sich auf die ganze Aufnahme
+    for block in blocks:
+        assert block.cues[0].start == pytest.approx(block.start + 0.5, abs=0.01)
+
+    job = db.get_transcription_job(job_id)
+    assert job.status == TranscriptionStatus.COMPLETED
+    assert job.audio_seconds == pytest.approx(60)
+    assert os.listdir(task.segments_dir) == []
+
+
+@requires_ffmpeg
+def test_short_recording_is_sent_whole(db, stub):
+    meeting_id, _, result = transcribe_recording(db, 15)
+
+    assert result["status"] == "completed"
+    assert "chunks" not in result
+    assert len(stub.requests) == 1
+    assert db.get_transcript(meeting_id) == "Teil 1.\nEnde"
+
+
+@requires_ffmpeg
+def test_failed_segment_is_retried(db, stub):
+    stub.fail = 1
+
+    meeting_id, job_id, result = transcribe_recording(db, 60)
+
+    assert result["status"] == "completed"
+    assert len(stub.requests) == 6
+    assert len(list(db.iter_transcript_segments(meeting_id))) == 6
+
+
+def test_stitch_orders_segments_by_index(db, tmp_path):
+    meeting = db.create_meeting(MeetingCreate(title="Lang", date=datetime(2026, 1, 1)))
+    job = db.create_transcription_job(meeting.id, str(uuid.uuid4()))
+    results = [
+        {
+            "index": index,
+            "bytes": 100,
+            "block": task._transcript_block(
+                {"segments": [{"start": 1.0, "end": 2.0, "text": f" Teil {index}"}]},
+                index * 10.0,
+                index * 10.0 + 10,
+            ),
+        }
+        for index in (2, 0, 1)
+    ]
+
+    result = task.stitch_transcript_segments(
+        results, meeting.id, "sha", str(tmp_path / "segments"), job_id=job.job_id
+    )
+
+    assert result["chunks"] == 3
+    assert result["asr_bytes"] == 300
+    assert db.get_transcript(meeting.id) == "Teil 0\nTeil 1\nTeil 2"
+    assert db.get_transcription_job(job.job_id).status == TranscriptionStatus.COMPLETED
@@ -0,0 +1,30 @@
+"""Verbindungspool der Database: eine Verbindung pro Thread."""
+
+import gc
+import threading
+
+
+def run_in_thread(target):
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+
+
+def test_connection_of_finished_thread_is_released(db):
+    db.get_connection()
+    for _ in range(3):
+        run_in_thread(db.get_connection)
+
+    # Verbindungen beendeter Threads hängen in einem Referenzzyklus (Statement-
+    # Cache) und verschwinden mit der nächsten Garbage Collection
+    gc.collect()
+    assert list(db._connections) == [threading.get_ident()]
+
+
+def test_close_all_empties_pool(db):
+    db.get_connection()
+
+    db.close_all()
+
+    assert len(db._connections) == 0
+    assert db.get_connection().execute("SELECT 1").fetchone()[0] == 1
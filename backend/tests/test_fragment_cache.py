@@ -0,0 +1,69 @@
+"""Antwort-Cache der API."""
+
+import re
+from datetime import datetime
+
+from cache import CachedResponse, FragmentCache
+from models import MeetingCreate
+
+
+def response(size: int) -> CachedResponse:
+    return CachedResponse(b"x" * size, "text/html", {})
+
+
+def test_evicts_least_recently_used_by_size():
+    cache = FragmentCache(max_entries=100, max_bytes=1000)
+    for key in "abcd":
+        cache.put(key, response(250))
+    cache.get("a")
+
+    cache.put("e", response(250))
+    cache.put("f", response(250))
+
+    # b und c waren am längsten unbenutzt
+    assert cache.get("b") is None and cache.get("c") is None
+    assert all(cache.get(key) for key in "adef")
+    assert cache.stats()["bytes"] == 1000
+
+
+def test_large_responses_are_not_stored():
+    cache = FragmentCache(max_entries=100, max_bytes=1000)
+    cache.put("small", response(100))
+
+    cache.put("large", response(251))
+
+    assert cache.get("large") is None
+    assert cache.get("small") is not None
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 1,
+        "not_modified": 0,
+        "entries": 1,
+        "bytes": 100,
+    }
+
+
+def test_replacing_an_entry_keeps_byte_count():
+    cache = FragmentCache(max_entries=100, max_bytes=1000)
+    cache.put("a", response(100))
+    cache.put("a", response(50))
+
+    assert cache.stats()["bytes"] == 50
+
+
+def submit_keys(html: str):
+    return set(re.findall(r'"Idempotency-Key": "([^"]+)"', html))
+
+
+def test_meeting_detail_gets_fresh_idempotency_key(db, client):
+    meeting = db.create_meeting(MeetingCreate(title="Rat", date=datetime(2026, 1, 1)))
+    db.attach_audio(meeting.id, "audio/rat.wav", "sha", 100)
+
+    first = client.get(f"/meetings/{meeting.id}")
+    second = client.get(f"/meetings/{meeting.id}")
+
+    assert first.headers["etag"] == second.headers["etag"]
+    (first_key,) = submit_keys(first.text)
+    (second_key,) = submit_keys(second.text)
+    assert first_key != second_key
+    assert "placeholder" not in first_key
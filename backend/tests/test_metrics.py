@@ -0,0 +1,64 @@
+"""Metriken mehrerer Prozesse über PROMETHEUS_MULTIPROC_DIR."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def run_process(multiproc_dir, code: str) -> str:
+    # Eigener Prozess: prometheus_client liest das Verzeichnis beim Import
+    env = {
+        **os.environ,
+        "METRICS_ENABLED": "true",
+        "PROMETHEUS_MULTIPROC_DIR": str(multiproc_dir),
+        "PYTHONPATH": str(BACKEND_DIR),
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", "import metrics\n" + code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout
+
+
+def render(multiproc_dir) -> str:
+    return run_process(
+        multiproc_dir,
+        "import sys\n"
+        "sys.stdout.write(metrics.render("
+        "{'celery_queue_length': {('bulk',): 3}}).decode())",
+    )
+
+
+def test_counters_are_summed_over_processes(tmp_path):
+    for _ in range(2):
+        run_process(
+            tmp_path,
+            "metrics.inc('asr_audio_seconds_total', 30, backend='a')\n"
+            "metrics.observe('transcription_run_seconds', 42, queue='bulk')",
+        )
+
+    text = render(tmp_path)
+
+    assert 'asr_audio_seconds_total{backend="a"} 60.0' in text
+    assert 'transcription_run_seconds_count{queue="bulk"} 2.0' in text
+    assert 'celery_queue_length{queue="bulk"} 3.0' in text
+
+
+def test_gauges_of_dead_processes_are_dropped(tmp_path):
+    pid = run_process(
+        tmp_path,
+        "import os\n"
+        "metrics.set_gauge('fragment_cache_bytes', 1000)\n"
+        "print(os.getpid())",
+    ).strip()
+    assert "fragment_cache_bytes 1000.0" in render(tmp_path)
+
+    run_process(tmp_path, f"metrics.mark_process_dead({pid})")
+
+    assert "fragment_cache_bytes 1000.0" not in render(tmp_path)
@@ -0,0 +1,94 @@
+"""Volltextsuche über den Suchindex ohne eigene Textkopie."""
+
+from datetime import datetime
+
+from models import MeetingCreate, MeetingUpdate
+
+
+def create_meeting(db, title, transcript=None):
+    meeting = db.create_meeting(MeetingCreate(title=title, date=datetime(2026, 1, 1)))
+    if transcript is not None:
+        db.update_meeting(meeting.id, MeetingUpdate(transcript=transcript))
+    return meeting
+
+
+def search_ids(db, query):
+    return [result.id for result in db.search_meetings(query).items]
+
+
+def check_index(db):
+    conn = db.get_connection()
+    try:
+        conn.execute(
+            "INSERT INTO meetings_fts (meetings_fts) VALUES ('integrity-check')"
+        )
+    finally:
+        db.close_connection(conn)
+
+
+def test_index_stores_no_text(db):
+    create_meeting(db, "Haushalt", "Die Überprüfung des Haushalts")
+
+    conn = db.get_connection()
+    try:
+        tables = {
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+    finally:
+        db.close_connection(conn)
+    assert "meetings_fts" in tables
+    assert "meetings_fts_content" not in tables
+
+
+def test_search_matches_without_diacritics_and_by_prefix(db):
+    meeting = create_meeting(db, "Haushalt", "Die Überprüfung des Haushalts")
+    create_meeting(db, "Bauausschuss", "Neue Radwege")
+
+    assert search_ids(db, "uberprufung") == [meeting.id]
+    assert search_ids(db, "Haush*") == [meeting.id]
+
+    result = db.search_meetings("uberprufung").items[0]
+    assert "<mark>Überprüfung</mark>" in result.snippet
+
+
+def test_snippet_escapes_html(db):
+    create_meeting(db, "Sitzung", "Antrag <b>Radwege</b> angenommen")
+
+    result = db.search_meetings("radwege").items[0]
+    assert "&lt;b&gt;<mark>Radwege</mark>&lt;/b&gt;" in result.snippet
+
+
+def test_rename_replaces_old_title(db):
+    meeting = create_meeting(db, "Haushalt", "Radwege")
+
+    db.update_meeting(meeting.id, MeetingUpdate(title="Verkehr"))
+
+    assert search_ids(db, "haushalt") == []
+    assert search_ids(db, "verkehr") == [meeting.id]
+    assert search_ids(db, "radwege") == [meeting.id]
+    check_index(db)
+
+
+def test_new_transcript_replaces_old_one(db):
+    meeting = create_meeting(db, "Sitzung", "Radwege")
+
+    db.update_meeting(meeting.id, MeetingUpdate(title="Verkehr", transcript="Busse"))
+
+    assert search_ids(db, "radwege") == []
+    assert search_ids(db, "busse") == [meeting.id]
+    assert search_ids(db, "sitzung") == []
+    check_index(db)
+
+
+def test_delete_removes_meeting_from_index(db):
+    meeting = create_meeting(db, "Haushalt", "Radwege")
+    other = create_meeting(db, "Haushalt 2027")
+
+    db.delete_meeting(meeting.id)
+
+    assert search_ids(db, "haushalt") == [other.id]
+    assert search_ids(db, "radwege") == []
+    check_index(db)
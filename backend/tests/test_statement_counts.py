@@ -0,0 +1,154 @@
+"""
+Anzahl der SQL-Statements pro Anfrage.
+
+Die Zahlen dürfen nicht mit der Anzahl der Meetings wachsen (kein N+1), deshalb
+wird jede Prüfung mit wenigen und mit vielen Meetings ausgeführt.
+"""
+
+import uuid
+from datetime import datetime
+
+import pytest
+
+from models import MeetingCreate, MeetingUpdate, TranscriptionStatus
+
+
+@pytest.fixture(params=[3, 30], ids=lambda n: f"{n}-meetings")
+def meeting_ids(request, db, statements):
+    """Legt Meetings mit Job und Transkript an und liefert ihre IDs."""
+    ids = []
+    for i in range(request.param):
+        meeting = db.create_meeting(
+            MeetingCreate(title=f"Sitzung {i}", date=datetime(2026, 1, 1 + i % 28))
+        )
+        db.create_transcription_job(meeting.id, str(uuid.uuid4()))
+        db.save_transcript(meeting.id, f"Text {i}\nZweite Zeile")
+        ids.append(meeting.id)
+    statements.clear()
+    return ids
+
+
+def test_list_meetings_is_a_single_statement(db, meeting_ids, statements):
+    page = db.list_meetings(limit=50)
+
+    assert len(page.items) == len(meeting_ids)
+    assert len(statements) == 1
+
+
+def test_meeting_list_endpoint(client, meeting_ids, statements):
+    response = client.get("/meetings")
+
+    assert response.status_code == 200
+    # Datenversion für den Cache-Schlüssel, dann die Liste selbst
+    assert len(statements) == 2
+
+
+def test_index_page(client, meeting_ids, statements):
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert len(statements) == 2
+
+
+def test_meeting_detail(client, meeting_ids, statements):
+    response = client.get(f"/meetings/{meeting_ids[0]}")
+
+    assert response.status_code == 200
+    # Version für das ETag, Meeting, Transkript
+    assert len(statements) == 3
+
+
+def test_meeting_detail_not_modified(client, meeting_ids, statements):
+    etag = client.get(f"/meetings/{meeting_ids[0]}").headers["etag"]
+    statements.clear()
+
+    response = client.get(
+        f"/meetings/{meeting_ids[0]}", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 304
+    assert len(statements) == 1
+
+
+# Schreibende Anfragen: BEGIN und COMMIT zählen mit, Trigger und FTS5-interne
+# Statements nicht (StatementLog.issued)
+
+
+@pytest.fixture
+def queue_stub(monkeypatch):
+    """Ersetzt Celery und die Redis-Benachrichtigungen beim Einreichen."""
+    import main
+
+    submitted = []
+
+    class NormalizeAudio:
+        @staticmethod
+        def apply_async(*args, **kwargs):
+            submitted.append((args, kwargs))
+
+    monkeypatch.setattr(main, "normalize_audio", NormalizeAudio)
+    monkeypatch.setattr(main, "publish_job_update", lambda *args, **kwargs: None)
+    return submitted
+
+
+def test_create_meeting_endpoint(client, meeting_ids, statements):
+    response = client.post(
+        "/meetings",
+        data={"title": "Neue Sitzung", "date": "2026-02-01T18:00"},
+        headers={"HX-Request": "true"},
+    )
+
+    assert response.status_code == 200
+    # BEGIN, Meeting, Suchindex, COMMIT
+    assert len(statements.issued()) == 4
+
+
+def test_update_meeting_endpoint(client, meeting_ids, statements):
+    response = client.put(
+        f"/meetings/{meeting_ids[0]}",
+        data={"title": "Umbenannt", "date": "2026-02-01T18:00"},
+    )
+
+    assert response.status_code == 200
+    # BEGIN, indizierter Titel und Text, UPDATE, Suchindex alt und neu, COMMIT,
+    # Transkript für die Detailseite
+    assert len(statements.issued()) == 8
+
+
+def test_transcribe_endpoint(client, db, meeting_ids, statements, queue_stub):
+    meeting = db.create_meeting(
+        MeetingCreate(title="Mit Audio", date=datetime(2026, 2, 1))
+    )
+    db.update_meeting(meeting.id, MeetingUpdate(audio_file="sitzung.wav"))
+    statements.clear()
+
+    response = client.post(f"/meetings/{meeting.id}/transcribe")
+
+    assert response.status_code == 200
+    assert len(queue_stub) == 1
+    # Meeting, BEGIN, Job, Meeting-Status, COMMIT
+    assert len(statements.issued()) == 5
+
+
+def test_delete_meeting_endpoint(client, meeting_ids, statements):
+    response = client.delete(
+        f"/meetings/{meeting_ids[0]}", headers={"HX-Request": "true"}
+    )
+
+    assert response.status_code == 200
+    # BEGIN, Jobs, Upload-Sitzungen, indizierter Titel und Text, Suchindex,
+    # Meeting, Transkriptblöcke, COMMIT
+    assert len(statements.issued()) == 9
+
+
+def test_update_transcription_job_status(db, meeting_ids, statements):
+    meeting = db.create_meeting(
+        MeetingCreate(title="Mit Job", date=datetime(2026, 2, 1))
+    )
+    job = db.create_transcription_job(meeting.id, str(uuid.uuid4()))
+    statements.clear()
+
+    db.update_transcription_job_status(job.job_id, TranscriptionStatus.PROCESSING)
+
+    # BEGIN, Job, Meeting-Status, COMMIT
+    assert len(statements.issued()) == 4
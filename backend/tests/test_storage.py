@@ -0,0 +1,76 @@
+"""Inhaltsadressierter Audio-Speicher."""
+
+import hashlib
+import os
+
+import storage
+
+
+def write_file(path, content: bytes) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+def test_move_ignores_temporary_files_of_the_same_content(tmp_path):
+    content = b"sitzung"
+    sha256 = hashlib.sha256(content).hexdigest()
+    shard_dir = os.path.join(storage.audio_dir, sha256[:2])
+    # Noch nicht fertig kopiert, z.B. von einem laufenden Import
+    write_file(os.path.join(shard_dir, f"{sha256}.wav.0123abcd.part"), b"sit")
+
+    relative_path = storage.move_into_store(
+        write_file(str(tmp_path / "upload"), content), sha256, ".WAV"
+    )
+
+    assert relative_path == os.path.join("audio", sha256[:2], f"{sha256}.wav")
+    with open(os.path.join(storage.data_dir, relative_path), "rb") as f:
+        assert f.read() == content
+
+
+def test_move_reuses_existing_blob(tmp_path):
+    content = b"zweite sitzung"
+    sha256 = hashlib.sha256(content).hexdigest()
+    first = storage.move_into_store(
+        write_file(str(tmp_path / "a"), content), sha256, ".m4a"
+    )
+
+    upload = write_file(str(tmp_path / "b"), content)
+    second = storage.move_into_store(upload, sha256, ".mp3")
+
+    assert second == first
+    assert not os.path.exists(upload)
+
+
+def test_link_ignores_temporary_files_and_keeps_source_mtime(tmp_path):
+    content = b"archivierte sitzung"
+    sha256 = hashlib.sha256(content).hexdigest()
+    write_file(
+        os.path.join(storage.audio_dir, sha256[:2], f"{sha256}.mp3.0123abcd.part"),
+        b"arch",
+    )
+    source = write_file(str(tmp_path / "2019-03-01.mp3"), content)
+    os.utime(source, (0, 0))
+
+    relative_path = storage.link_into_store(source, sha256, ".mp3")
+
+    assert relative_path == storage.blob_path(sha256, ".mp3")
+    assert relative_path == os.path.join("audio", sha256[:2], f"{sha256}.mp3")
+    assert os.path.getmtime(source) == 0
+
+
+def test_registered_blob_with_old_mtime_survives_cleanup(db, tmp_path):
+    import task
+
+    content = b"sitzung von 2019"
+    sha256 = hashlib.sha256(content).hexdigest()
+    source = write_file(str(tmp_path / "alt.mp3"), content)
+    os.utime(source, (0, 0))
+
+    # Wie beim Import: eingetragen und verlinkt, das Meeting fehlt noch
+    db.register_audio_blobs([(sha256, storage.blob_path(sha256, ".mp3"), len(content))])
+    relative_path = storage.link_into_store(source, sha256, ".mp3")
+    task.cleanup_audio_files(days=7)
+
+    assert os.path.exists(os.path.join(storage.data_dir, relative_path))
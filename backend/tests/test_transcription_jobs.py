@@ -0,0 +1,75 @@
+"""Gleichzeitige Einreichungen von Transcription Jobs."""
+
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from models import MeetingCreate, TranscriptionStatus
+
+THREADS = 8
+
+
+def create_meeting(db, title="Sitzung"):
+    return db.create_meeting(MeetingCreate(title=title, date=datetime(2026, 1, 1)))
+
+
+def count_jobs(db) -> int:
+    conn = db.get_connection()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM transcription_jobs").fetchone()[0]
+    finally:
+        db.close_connection(conn)
+
+
+def submit_concurrently(db, meeting_ids, idempotency_key=None):
+    """Reicht pro Meeting-ID gleichzeitig einen Job ein, jeweils eigener Thread."""
+    barrier = threading.Barrier(len(meeting_ids))
+
+    def submit(meeting_id):
+        barrier.wait()
+        return db.create_transcription_job(
+            meeting_id, str(uuid.uuid4()), idempotency_key=idempotency_key
+        )
+
+    with ThreadPoolExecutor(max_workers=len(meeting_ids)) as pool:
+        return list(pool.map(submit, meeting_ids))
+
+
+def test_same_idempotency_key_creates_one_job(db):
+    # Verschiedene Meetings, damit nur der Key die Einreichungen zusammenführt
+    meeting_ids = [create_meeting(db, f"Sitzung {i}").id for i in range(THREADS)]
+
+    jobs = submit_concurrently(db, meeting_ids, idempotency_key="upload-42")
+
+    assert count_jobs(db) == 1
+    assert len({job.job_id for job in jobs}) == 1
+
+
+def test_without_key_one_active_job_per_meeting(db):
+    meeting_id = create_meeting(db).id
+
+    jobs = submit_concurrently(db, [meeting_id] * THREADS)
+
+    assert count_jobs(db) == 1
+    assert len({job.job_id for job in jobs}) == 1
+    assert jobs[0].status == TranscriptionStatus.PENDING
+    # Das Meeting gilt ab dem Einreichen als in Bearbeitung
+    assert db.get_meeting(meeting_id).status == TranscriptionStatus.PROCESSING
+
+    # Solange der Job aktiv ist, liefert auch eine spätere Einreichung ihn
+    again = db.create_transcription_job(meeting_id, str(uuid.uuid4()))
+    assert again.job_id == jobs[0].job_id
+    assert count_jobs(db) == 1
+
+
+def test_failed_job_does_not_block_resubmission(db):
+    meeting_id = create_meeting(db).id
+    first = db.create_transcription_job(meeting_id, "job-1", idempotency_key="k")
+    db.update_transcription_job_status(first.job_id, TranscriptionStatus.FAILED)
+
+    jobs = submit_concurrently(db, [meeting_id] * THREADS, idempotency_key="k")
+
+    assert count_jobs(db) == 2
+    assert len({job.job_id for job in jobs}) == 1
+    assert jobs[0].job_id != first.job_id
@@ -0,0 +1,127 @@
+"""Uploads: Größenbegrenzung, auch ohne Content-Length, und resumierbare Uploads."""
+
+import os
+from datetime import datetime
+
+import pytest
+
+import storage
+from models import MeetingCreate
+
+LIMIT = 64 * 1024
+BOUNDARY = "grenze"
+
+
+def multipart_chunks(size: int, chunk_size: int = 8 * 1024):
+    """Multipart-Body mit einer Datei, als Generator (ohne Content-Length)."""
+    yield (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="sitzung.wav"\r\n'
+        "Content-Type: audio/wav\r\n\r\n"
+    ).encode()
+    for start in range(0, size, chunk_size):
+        yield b"\0" * min(chunk_size, size - start)
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+@pytest.fixture
+def limited_client(client):
+    """TestClient der API mit einer kleinen Upload-Grenze."""
+    from fastapi.testclient import TestClient
+
+    import main
+
+    return TestClient(main.UploadSizeLimit(main.app, max_size=LIMIT))
+
+
+@pytest.fixture
+def meeting_id(db):
+    meeting = db.create_meeting(
+        MeetingCreate(title="Sitzung", date=datetime(2026, 1, 1))
+    )
+    return meeting.id
+
+
+def stored_files():
+    return [name for _, _, names in os.walk(storage.audio_dir) for name in names]
+
+
+def test_chunked_upload_over_limit_is_rejected(limited_client, meeting_id):
+    before = stored_files()
+
+    response = limited_client.post(
+        f"/meetings/{meeting_id}/upload",
+        content=multipart_chunks(4 * LIMIT),
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+
+    assert response.status_code == 413
+    assert stored_files() == before
+
+
+def test_content_length_over_limit_is_rejected(limited_client, meeting_id):
+    response = limited_client.post(
+        f"/meetings/{meeting_id}/upload",
+        content=b"".join(multipart_chunks(2 * LIMIT)),
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+
+    assert response.status_code == 413
+
+
+def test_chunked_upload_under_limit_is_stored(limited_client, db, meeting_id):
+    response = limited_client.post(
+        f"/meetings/{meeting_id}/upload",
+        content=multipart_chunks(LIMIT // 2),
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+
+    assert response.status_code == 200
+    audio_file = db.get_meeting(meeting_id).audio_file
+    assert os.path.getsize(os.path.join(storage.data_dir, audio_file)) == LIMIT // 2
+
+
+def create_upload_session(client, meeting_id, size):
+    response = client.post(
+        f"/meetings/{meeting_id}/uploads",
+        data={"filename": "sitzung.wav", "size": str(size)},
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def patch_chunk(client, upload_id, offset, body):
+    return client.patch(
+        f"/uploads/{upload_id}",
+        content=body,
+        headers={"Upload-Offset": str(offset)},
+    )
+
+
+def test_chunk_is_rejected_while_another_request_writes(client, meeting_id):
+    upload_id = create_upload_session(client, meeting_id, 8)
+    assert patch_chunk(client, upload_id, 0, b"aaaa").status_code == 204
+    part_path = storage.upload_part_path(upload_id)
+
+    # Wie ein paralleler Request, der die Teildatei gerade beschreibt
+    with storage.open_upload_part(part_path):
+        response = patch_chunk(client, upload_id, 4, b"bbbb")
+
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "4"
+    with open(part_path, "rb") as f:
+        assert f.read() == b"aaaa"
+
+
+def test_chunk_with_stale_offset_does_not_touch_part_file(client, meeting_id):
+    upload_id = create_upload_session(client, meeting_id, 8)
+    assert patch_chunk(client, upload_id, 0, b"aaaa").status_code == 204
+
+    response = patch_chunk(client, upload_id, 0, b"bbbb")
+
+    assert response.status_code == 409
+    with open(storage.upload_part_path(upload_id), "rb") as f:
+        assert f.read() == b"aaaa"
+
+    response = patch_chunk(client, upload_id, 4, b"cccc")
+    assert response.status_code == 200